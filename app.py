@@ -1,243 +1,254 @@
-from src.searcher import search_collection
+from src.searcher import search_collection, search_ranked_tiered
+from src.searcher import start_speculative_search, resolve_speculative_search, discard_speculative_search
+from src.searcher import get_speculative_search_stats, normalize_query
 from src.searcher import fetch_by_filters, fetch_by_filters_page
-from src.extractor import extractor
+from src.searcher import get_embedding_cache_stats, get_embedding_batcher_stats
+from src.searcher import warmup, is_ready, get_warmup_state, get_facet_index_stats
+from src.sessions import create_session, get_session_page, get_session_stats
+from src.singleflight import SingleFlight
+from src.admission import AdmissionPool, admission_controlled
+from src.resilient_llm import ResilientLLM
+from src.catalog import CATALOG_CATEGORIES, CATALOG_PAYLOAD_FIELDS, normalize_item
+from src.catalog_version import get_catalog_version
+from src.http_cache import cached_by_catalog_version, served_catalog_version
+from src.json_provider import init_json_provider
+from src.compression import init_compression
+from src.static_assets import init_static_assets, render_page
+from src.metrics import init_metrics, stage_timer, observe_ranking
+from src.slots import extract_slots, get_slot_extraction_stats
 from src.parser import parser
 from config import TEMPERATURE, MODEL_NAME  # GROQ_API_KEY removed here
-from flask import Flask, request, jsonify, render_template
+from config import SEARCH_SESSION_DEPTH, WARMUP_ON_START, BROWSE_CACHE_MAX_AGE, SPECULATIVE_SEARCH
+from config import JSON_SERIALIZER, COMPRESSION_MIN_SIZE, GZIP_LEVEL, BROTLI_QUALITY
+from config import SEARCH_MAX_CONCURRENT, SEARCH_MAX_QUEUE, SEARCH_QUEUE_TIMEOUT
+from config import BROWSE_MAX_CONCURRENT, BROWSE_MAX_QUEUE, BROWSE_QUEUE_TIMEOUT
+from config import ASSET_BUILD_DIR, LLM_DEADLINE
+from flask import Flask, Response, request, jsonify, stream_with_context
 from langchain_groq import ChatGroq
 import json
 import random
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 # Load environment variables from .env
 load_dotenv()
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
+init_json_provider(app, JSON_SERIALIZER)
+init_compression(app, COMPRESSION_MIN_SIZE, GZIP_LEVEL, BROTLI_QUALITY)
+init_static_assets(app, ASSET_BUILD_DIR)  # hashed + precompressed files from build_assets.py
+
+# Separate capacity for the LLM-bound search and the cheap browse endpoints
+search_pool = AdmissionPool("search", SEARCH_MAX_CONCURRENT, SEARCH_MAX_QUEUE, SEARCH_QUEUE_TIMEOUT)
+browse_pool = AdmissionPool("browse", BROWSE_MAX_CONCURRENT, BROWSE_MAX_QUEUE, BROWSE_QUEUE_TIMEOUT)
 # api_key = os.getenv("GROQ_API_KEY")
 
-llm = ChatGroq(
+# Deadline, hedged requests and a circuit breaker around Groq; when it fails
+# /search falls back to local slot extraction instead of hanging
+llm = ResilientLLM(ChatGroq(
     temperature = TEMPERATURE,
     groq_api_key = "add urs",
-    model_name = "ur wish"  #mine - llama-3.1-8b-instant
-)
+    model_name = "ur wish",  #mine - llama-3.1-8b-instant
+    request_timeout = LLM_DEADLINE  # upper bound; ResilientLLM sends each request the time left
+))
 
 # ---------- ROUTES ----------
 
 @app.route('/')
 def home():
-    return render_template('home_immersive.html')
+    return render_page('home_immersive.html')
 
 @app.route('/chatbot')
 def chatbot():
-    return render_template('chatbot_3d.html')
+    return render_page('chatbot_3d.html')
 
 @app.route('/wishlist')
 def wishlist():
-    return render_template('wishlist_3d.html')
+    return render_page('wishlist_3d.html')
 
 @app.route('/cart')
 def cart():
-    return render_template('cart_3d.html')
+    return render_page('cart_3d.html')
 
 @app.route('/skirts')
 def skirts():
-    return render_template('skirts_3d.html')
+    return render_page('skirts_3d.html')
 
 @app.route('/jeans')
 def jeans():
-    return render_template('jeans_3d.html')
+    return render_page('jeans_3d.html')
 
 @app.route('/jumpsuits')
 def jumpsuits():
-    return render_template('jumpsuits_3d.html')
+    return render_page('jumpsuits_3d.html')
 
 @app.route("/kurtis")
 def kurtis():
-    return render_template("kurtis_3d.html")
+    return render_page("kurtis_3d.html")
 
 
-@app.route("/api/kurtis", methods=["GET"])
-def api_kurtis():
-    # Query params: colour, gender, limit, page_offset
+@app.route("/api/catalog/<category>", methods=["GET"])
+@cached_by_catalog_version(max_age=BROWSE_CACHE_MAX_AGE)
+@admission_controlled(browse_pool)
+def api_catalog(category):
+    # Query params: colour, gender, article_type, page_limit, page_offset
+    spec = CATALOG_CATEGORIES.get(category)
+    if spec is None:
+        return jsonify({"results": [], "error": f"Unknown catalog category: {category}"}), 404
+
     colour = request.args.get("colour") or None
     gender = request.args.get("gender") or None
-    limit = request.args.get("limit", default=1000, type=int)
     page_limit = request.args.get("page_limit", default=48, type=int)
     page_offset = request.args.get("page_offset")
     article_type = request.args.get("article_type") or None
 
-    # Accept common variations as kurtis
-    kurtis_like = [
-        "Kurtis",
-        "Kurtas",
-        "Kurta Sets",
-        "kurti",
-        "kurtis",
-        "kurtas",
-        "kurta",
-    ]
-
     if page_offset == "None":
         page_offset = None
 
     page = fetch_by_filters_page(
-        article_types=[article_type] if article_type else kurtis_like,
+        article_types=[article_type] if article_type else spec["article_types"],
         base_colour=colour,
         gender=gender,
         limit=page_limit,
         offset=page_offset,
+        payload_fields=CATALOG_PAYLOAD_FIELDS,
     )
 
+    # Validators follow the snapshot that served the page, not the newest stamp
+    served_catalog_version(page.get("catalog_stamp"))
+
     # Normalize minimal fields for frontend expectation
-    normalized = []
-    for it in page["items"]:
-        normalized.append({
-            "id": it.get("id") or it.get("product_id") or it.get("name"),
-            # ✅ Use image_link if available, fallback to image_url
-            "image_url": it.get("image_link") or it.get("image_url"),
-            "gender": it.get("gender"),
-            "masterCategory": it.get("masterCategory") or it.get("Category"),
-            "subCategory": it.get("subCategory"),
-            "articleType": it.get("articleType") or it.get("Individual_category"),
-            "baseColour": it.get("baseColour") or it.get("colour"),
-            "productDisplayName": it.get("productDisplayName") or it.get("name"),
-        })
+    normalized = [normalize_item(it) for it in page["items"]]
 
-    return jsonify({"results": normalized, "next_offset": page.get("next_offset")})
+    return jsonify({"results": normalized, "next_offset": page.get("next_offset"), "total": page.get("total")})
 
 
-@app.route("/api/skirts", methods=["GET"])
-def api_skirts():
-    colour = request.args.get("colour") or None
-    gender = request.args.get("gender") or None
-    page_limit = request.args.get("page_limit", default=48, type=int)
-    page_offset = request.args.get("page_offset")
-    article_type = request.args.get("article_type") or None
-
-    if page_offset == "None":
-        page_offset = None
-
-    items_like = ["Skirts", "skirt", "skirts", "Mini Skirt", "Midi Skirt", "Maxi Skirt"]
-    page = fetch_by_filters_page(
-        article_types=[article_type] if article_type else items_like,
-        base_colour=colour,
-        gender=gender,
-        limit=page_limit,
-        offset=page_offset,
-    )
+# Per-category URLs used by the browse pages
+@app.route("/api/kurtis", methods=["GET"])
+def api_kurtis():
+    return api_catalog("kurtis")
 
-    normalized = []
-    for it in page["items"]:
-        normalized.append({
-            "id": it.get("id") or it.get("product_id") or it.get("name"),
-            # ✅ normalize image field (image_link or image_url)
-            "image_url": it.get("image_link") or it.get("image_url"),
-            "gender": it.get("gender"),
-            "masterCategory": it.get("masterCategory") or it.get("Category"),
-            "subCategory": it.get("subCategory"),
-            "articleType": it.get("articleType") or it.get("Individual_category"),
-            "baseColour": it.get("baseColour") or it.get("colour"),
-            "productDisplayName": it.get("productDisplayName") or it.get("name"),
-        })
 
-    return jsonify({"results": normalized, "next_offset": page.get("next_offset")})
+@app.route("/api/skirts", methods=["GET"])
+def api_skirts():
+    return api_catalog("skirts")
 
 
 @app.route("/api/jeans", methods=["GET"])
 def api_jeans():
-    colour = request.args.get("colour") or None
-    gender = request.args.get("gender") or None
-    page_limit = request.args.get("page_limit", default=48, type=int)
-    page_offset = request.args.get("page_offset")
-    article_type = request.args.get("article_type") or None
+    return api_catalog("jeans")
 
-    if page_offset == "None":
-        page_offset = None
-
-    items_like = [
-        "Jeans", "jeans", "Skinny Jeans", "Straight Jeans",
-        "Bootcut Jeans", "Wide Leg Jeans"
-    ]
-    page = fetch_by_filters_page(
-        article_types=[article_type] if article_type else items_like,
-        base_colour=colour,
-        gender=gender,
-        limit=page_limit,
-        offset=page_offset,
-    )
-
-    normalized = []
-    for it in page["items"]:
-        normalized.append({
-            "id": it.get("id") or it.get("product_id") or it.get("name"),
-            # ✅ normalize image (support image_link or image_url)
-            "image_url": it.get("image_link") or it.get("image_url"),
-            "gender": it.get("gender"),
-            "masterCategory": it.get("masterCategory") or it.get("Category"),
-            "subCategory": it.get("subCategory"),
-            "articleType": it.get("articleType") or it.get("Individual_category"),
-            "baseColour": it.get("baseColour") or it.get("colour"),
-            "productDisplayName": it.get("productDisplayName") or it.get("name"),
-        })
-
-    return jsonify({"results": normalized, "next_offset": page.get("next_offset")})
 
 @app.route("/api/jumpsuits", methods=["GET"])
 def api_jumpsuits():
-    colour = request.args.get("colour") or None
-    gender = request.args.get("gender") or None
-    page_limit = request.args.get("page_limit", default=48, type=int)
-    page_offset = request.args.get("page_offset")
-    article_type = request.args.get("article_type") or None
-
-    if page_offset == "None":
-        page_offset = None
-
-    items_like = ["Jumpsuit", "Jumpsuits", "jumpsuit", "jumpsuits"]
-    page = fetch_by_filters_page(
-        article_types=[article_type] if article_type else items_like,
-        base_colour=colour,
-        gender=gender,
-        limit=page_limit,
-        offset=page_offset,
-    )
-
-    normalized = []
-    for it in page["items"]:
-        normalized.append({
-            "id": it.get("id") or it.get("product_id") or it.get("name"),
-            # ✅ normalize image
-            "image_url": it.get("image_link") or it.get("image_url"),
-            "gender": it.get("gender"),
-            "masterCategory": it.get("masterCategory") or it.get("Category"),
-            "subCategory": it.get("subCategory"),
-            "articleType": it.get("articleType") or it.get("Individual_category"),
-            "baseColour": it.get("baseColour") or it.get("colour"),
-            "productDisplayName": it.get("productDisplayName") or it.get("name"),
-        })
-
-    return jsonify({"results": normalized, "next_offset": page.get("next_offset")})
+    return api_catalog("jumpsuits")
 
 @app.route('/store')
 def store():
-    return render_template('store_3d.html')
+    return render_page('store_3d.html')
 
 @app.route('/checkout')
 def checkout():
-    return render_template('checkout_3d.html')
+    return render_page('checkout_3d.html')
 
 @app.route('/product')
 def product():
-    return render_template('product.html')
+    return render_page('product.html')
 
 @app.route('/order-confirmation')
 def order_confirmation():
-    return render_template('order_confirmation.html')
+    return render_page('order_confirmation.html')
 
 # ---------- SEARCH API ----------
 
+def search_filters(parsed_data):
+    """Extracted slots -> search_ranked keyword arguments."""
+    return {
+        "colour": parsed_data.get("colour", "NA"),
+        "individual_category": parsed_data.get("Individual_category", "NA"),
+        "category": parsed_data.get("Category", "NA"),
+        "category_by_gender": parsed_data.get("category_by_Gender", "NA"),
+    }
+
+# Identical concurrent searches share one LLM call and one ranking
+extraction_flight = SingleFlight("extraction")
+ranking_flight = SingleFlight("ranking")
+
+def extract_for_query(query):
+    """
+    Step 1 of /search, coalesced on the normalized query:
+    ((extracted_response, speculation), shared). Only the leader starts the
+    speculative search; followers reuse its future. Queries answered by the
+    exact cache or the fast path need no speculation (speculation is None).
+    """
+    def run():
+        speculation = []
+
+        def speculate():
+            # Embedding + unfiltered search don't need the slots: run them during the LLM call
+            if SPECULATIVE_SEARCH:
+                speculation.append(start_speculative_search(query))
+
+        with stage_timer("extract"):
+            extracted = extract_slots(llm, query, on_local_miss=speculate)
+        return extracted, (speculation[0] if speculation else None)
+
+    return extraction_flight.do(normalize_query(query), run)
+
+def rank_for_query(query, parsed_data, offset, limit, speculation=None):
+    """Step 2 of /search, coalesced on (normalized query, slots, depth)."""
+    key = (normalize_query(query), tuple(sorted(search_filters(parsed_data).items())), offset + limit)
+    result, _ = ranking_flight.do(key, lambda: rank_for_slots(query, parsed_data, offset, limit, speculation))
+    return result
+
+def rank_for_slots(query, parsed_data, offset, limit, speculation=None):
+    """
+    Step 2 of /search: (tier, ranked, complete). Uses the speculative candidates
+    started before the LLM call when enough of them match the slots.
+    """
+    top_k = max(SEARCH_SESSION_DEPTH, offset + limit)
+    if speculation is not None:
+        tier, ranked, complete = resolve_speculative_search(
+            speculation, query, top_k=top_k, min_results=offset + limit, **search_filters(parsed_data)
+        )
+    else:
+        tier, ranked = search_ranked_tiered(query_text=query, top_k=top_k, **search_filters(parsed_data))
+        complete = True
+    observe_ranking(tier, len(ranked))
+    return tier, ranked, complete
+
+def build_search_response(ranked, offset, limit, complete=True, source=None):
+    """
+    /search body for a ranking (shared with the async pipeline in asgi.py).
+    source is (query, search_filters(), tier): what /search/more extends an
+    incomplete ranking from.
+    """
+    results = [payload for _, payload in ranked]
+
+    # Store the ranking so /search/more only fetches the next page's payloads
+    cursor = create_session(ranked, complete, source)
+
+    # Apply pagination
+    paginated_results = results[offset:offset + limit]
+    has_more = len(results) > offset + limit or not complete
+    total_count = len(results)
+
+    return {
+        "results": paginated_results,
+        "message": "Here are some recommended products based on your query.",
+        "pagination": {
+            "offset": offset,
+            "limit": limit,
+            "has_more": has_more,
+            "total_count": total_count,
+            "cursor": cursor
+        }
+    }
+
 @app.route('/search', methods=['POST'])
+@admission_controlled(search_pool)
 def search():
     try:
         data = request.json
@@ -249,40 +260,24 @@ def search():
             return jsonify({"results": [], "message": "Please provide a query."}), 400
 
         # Step 1: Extract + Parse query
-        extracted_response = extractor(llm, query)
+        (extracted_response, speculation), shared = extract_for_query(query)
         print("\n🔍 Raw LLM Response:\n", extracted_response)
 
-        parsed_data = parser(extracted_response)
+        with stage_timer("parse"):
+            parsed_data = parser(extracted_response)
         print("\n✅ Parsed Data:", parsed_data)
 
         if parsed_data.get("MOVE_ON"):
-            # Step 2: Hybrid vector + metadata search
-            results = search_collection(
-                query_text=query,
-                colour=parsed_data.get("colour", "NA"),
-                individual_category=parsed_data.get("Individual_category", "NA"),
-                category=parsed_data.get("Category", "NA"),
-                category_by_gender=parsed_data.get("category_by_Gender", "NA"),
-                top_k=limit + offset  # Get more results to support pagination
-            )
-
-            # Apply pagination
-            paginated_results = results[offset:offset + limit]
-            has_more = len(results) > offset + limit
-            total_count = len(results)
-
-            return jsonify({
-                "results": paginated_results,
-                "message": "Here are some recommended products based on your query.",
-                "pagination": {
-                    "offset": offset,
-                    "limit": limit,
-                    "has_more": has_more,
-                    "total_count": total_count
-                }
-            })
+            # Step 2: Hybrid vector + metadata search, ranked once for the whole session
+            tier, ranked, complete = rank_for_query(query, parsed_data, offset, limit, speculation)
+            body = build_search_response(ranked, offset, limit, complete,
+                                         (query, search_filters(parsed_data), tier))
+            with stage_timer("serialize"):
+                return jsonify(body)
 
         else:
+            if speculation is not None and not shared:
+                discard_speculative_search(speculation)
             return jsonify({
                 "results": [],
                 "message": parsed_data.get("FOLLOW_UP_MESSAGE", "Please provide more product details.")
@@ -296,7 +291,73 @@ def search():
             "error": f"Internal Server Error: {str(e)}"
         }), 500
 
+@app.route('/search/stream', methods=['POST'])
+@admission_controlled(search_pool)
+def search_stream():
+    """
+    Streaming /search as NDJSON, one event per line, in this order:
+      {"type": "slots", ...}       extracted slots + follow-up message, right after the LLM
+      {"type": "results", ...}     first page and the tier that produced it
+      {"type": "pagination", ...}  offsets, totals and the /search/more cursor
+      {"type": "done"}
+    Errors arrive as {"type": "error", "error": ...}.
+    """
+    data = request.json or {}
+    query = data.get('query', '')
+    offset = data.get('offset', 0)
+    limit = data.get('limit', 12)
+
+    if not query.strip():
+        return jsonify({"results": [], "message": "Please provide a query."}), 400
+
+    def event(body):
+        return app.json.dumps(body) + "\n"
+
+    def generate():
+        try:
+            # Step 1: Extract + Parse query, sent before the search starts
+            (extracted_response, speculation), shared = extract_for_query(query)
+            with stage_timer("parse"):
+                parsed_data = parser(extracted_response)
+            print("\n✅ Parsed Data:", parsed_data)
+            yield event({
+                "type": "slots",
+                "slots": search_filters(parsed_data),
+                "move_on": parsed_data.get("MOVE_ON", False),
+                # parser() blanks the message when it moves on; keep the LLM's confirmation
+                "message": parsed_data.get("FOLLOW_UP_MESSAGE") or extracted_response.get("FOLLOW_UP_MESSAGE", "")
+            })
+
+            if parsed_data.get("MOVE_ON"):
+                # Step 2: the cascade is one batched round trip; emit its first page immediately
+                tier, ranked, complete = rank_for_query(query, parsed_data, offset, limit, speculation)
+                response = build_search_response(ranked, offset, limit, complete,
+                                                 (query, search_filters(parsed_data), tier))
+                yield event({
+                    "type": "results",
+                    "tier": tier,
+                    "results": response["results"],
+                    "message": response["message"]
+                })
+                yield event({"type": "pagination", "pagination": response["pagination"]})
+
+            elif speculation is not None and not shared:
+                discard_speculative_search(speculation)
+
+            yield event({"type": "done"})
+
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            yield event({"type": "error", "error": f"Internal Server Error: {str(e)}"})
+
+    response = Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # let nginx pass events through unbuffered
+    return response
+
 @app.route('/search/more', methods=['POST'])
+@admission_controlled(browse_pool)
 def search_more():
     """Load more products for an existing search query"""
     try:
@@ -305,18 +366,35 @@ def search_more():
         offset = data.get('offset', 0)
         limit = data.get('limit', 6)
         filters = data.get('filters', {})
+        cursor = data.get('cursor')
+
+        # Fast path: slice the ranking stored by /search (extended server-side past its depth)
+        if cursor:
+            page = get_session_page(cursor, offset, limit)
+            if page is not None:
+                return jsonify({
+                    "results": page["results"],
+                    "pagination": {
+                        "offset": offset,
+                        "limit": limit,
+                        "has_more": page["has_more"],
+                        "total_count": page["total_count"],
+                        "cursor": cursor
+                    }
+                })
+            print("⚠️ Search session expired or unknown, re-running search.")
 
         if not query.strip():
             return jsonify({"results": [], "message": "Please provide a query."}), 400
 
-        # Use the same search logic but with different offset
+        # No live session: use the same search logic but with different offset
         results = search_collection(
             query_text=query,
             colour=filters.get("colour", "NA"),
             individual_category=filters.get("individual_category", "NA"),
             category=filters.get("category", "NA"),
             category_by_gender=filters.get("category_by_gender", "NA"),
-            top_k=offset + limit
+            top_k=offset + limit + 1  # one extra to know whether more exist
         )
 
         # Apply pagination
@@ -341,6 +419,59 @@ def search_more():
             "error": f"Internal Server Error: {str(e)}"
         }), 500
 
+# ---------- HEALTH ----------
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness: the process is up and serving HTTP."""
+    return jsonify({"status": "ok"})
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness: model loaded and Qdrant reachable; 503 until warmup succeeds."""
+    state = get_warmup_state()
+    if not is_ready():
+        return jsonify({"status": "warming_up", "error": state["error"]}), 503
+    return jsonify({"status": "ready"})
+
+# ---------- STATS ----------
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """In-process cache counters, used to size caches from live traffic."""
+    body = {name: source() for name, source in STATS_SOURCES.items()}
+    body["catalog_version"] = get_catalog_version()
+    return jsonify(body)
+
+# ---------- METRICS ----------
+
+# In-process stats, served by /stats and bridged into /metrics as gauges
+STATS_SOURCES = {
+    "embedding_cache": get_embedding_cache_stats,
+    "embedding_batcher": get_embedding_batcher_stats,
+    "search_sessions": get_session_stats,
+    "facet_index": get_facet_index_stats,
+    "speculative_search": get_speculative_search_stats,
+    "slot_extraction": get_slot_extraction_stats,
+    "llm": lambda: llm.stats(),
+    "admission": lambda: {"search": search_pool.stats(), "browse": browse_pool.stats()},
+    "single_flight": lambda: {"extraction": extraction_flight.stats(), "ranking": ranking_flight.stats()},
+}
+
+# Stage histograms, tier / result-count / backend error counters on /metrics,
+# Server-Timing on every response
+init_metrics(app, STATS_SOURCES)
+
+# ---------- WARMUP ----------
+
+def _warmup_until_ready(retry_seconds=5):
+    # Keep retrying so /readyz recovers once Qdrant becomes reachable
+    while not warmup():
+        time.sleep(retry_seconds)
+
+if WARMUP_ON_START:
+    threading.Thread(target=_warmup_until_ready, name="warmup", daemon=True).start()
+
 # ---------- RUN ----------
 
 if __name__ == '__main__':
@@ -0,0 +1,162 @@
+"""
+ASGI entry point with an async /search pipeline.
+
+POST /search runs fully async: the Groq call goes through llm.ainvoke, the
+query embedding is awaited from the embedding batcher (or an executor), and
+Qdrant is queried with AsyncQdrantClient. A request waiting on the network
+therefore holds no worker thread, so one process can keep many chats in
+flight. Every other route is the existing Flask app, mounted as WSGI.
+
+It keeps the protections of the Flask /search: the same search admission pool
+(awaited, so queued chats hold no thread either), the same single-flight
+layers for extraction and ranking (shared with the Flask routes in this
+process), the speculative unfiltered search during the LLM call, and stage
+metrics with a Server-Timing header.
+
+Usage:
+  uvicorn asgi:app --host 0.0.0.0 --port 8000 --workers 4
+  python asgi.py
+"""
+import asyncio
+import time
+
+from starlette.applications import Starlette
+from starlette.middleware.wsgi import WSGIMiddleware
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+from werkzeug.http import parse_accept_header
+
+from app import app as flask_app, llm, search_filters, build_search_response
+from app import extraction_flight, ranking_flight, search_pool
+from config import SEARCH_SESSION_DEPTH, COMPRESSION_MIN_SIZE, GZIP_LEVEL, BROTLI_QUALITY
+from config import PREFORK_BIND, PREFORK_WORKERS, SPECULATIVE_SEARCH
+from src.admission import AdmissionRejected
+from src.compression import choose_encoding, compress_body
+from src.metrics import collect_stage_timings, finish_request, observe_ranking, stage_timer
+from src.parser import parser
+from src.searcher import asearch_ranked_tiered, normalize_query
+from src.searcher import start_speculative_search, resolve_speculative_search, discard_speculative_search
+from src.slots import aextract_slots
+
+
+def json_response(request, body, status_code=200):
+    # Same serializer and compression rules as the Flask app
+    data = flask_app.json.dumps(body).encode()
+    headers = {"Vary": "Accept-Encoding"}
+    if len(data) >= COMPRESSION_MIN_SIZE:
+        encoding = choose_encoding(parse_accept_header(request.headers.get("accept-encoding", "")))
+        if encoding:
+            data = compress_body(data, encoding, GZIP_LEVEL, BROTLI_QUALITY)
+            headers["Content-Encoding"] = encoding
+    return Response(data, status_code=status_code, media_type="application/json", headers=headers)
+
+
+async def aextract_for_query(query):
+    """Async extract_for_query() (app.py): coalesced with Flask and ASGI callers alike."""
+    async def run():
+        speculation = []
+
+        def speculate():
+            if SPECULATIVE_SEARCH:
+                speculation.append(start_speculative_search(query))
+
+        with stage_timer("extract"):
+            extracted = await aextract_slots(llm, query, on_local_miss=speculate)
+        return extracted, (speculation[0] if speculation else None)
+
+    return await extraction_flight.ado(normalize_query(query), run)
+
+
+async def arank_for_query(query, parsed_data, offset, limit, speculation=None):
+    """Async rank_for_query() (app.py): (tier, ranked, complete)."""
+    top_k = max(SEARCH_SESSION_DEPTH, offset + limit)
+
+    async def run():
+        if speculation is not None:
+            # Waits on the background candidates; a thread is only held for that wait
+            tier, ranked, complete = await asyncio.to_thread(
+                resolve_speculative_search, speculation, query,
+                top_k=top_k, min_results=offset + limit, **search_filters(parsed_data)
+            )
+        else:
+            tier, ranked = await asearch_ranked_tiered(query_text=query, top_k=top_k, **search_filters(parsed_data))
+            complete = True
+        observe_ranking(tier, len(ranked))
+        return tier, ranked, complete
+
+    key = (normalize_query(query), tuple(sorted(search_filters(parsed_data).items())), offset + limit)
+    result, _ = await ranking_flight.ado(key, run)
+    return result
+
+
+async def search(request):
+    start = time.perf_counter()
+    timings = collect_stage_timings()
+    try:
+        await search_pool.aacquire()
+    except AdmissionRejected as e:
+        response = json_response(request, {"results": [], "error": f"Service busy: {e.reason}. Please retry shortly."},
+                                 e.status)
+        response.headers["Retry-After"] = str(e.retry_after)
+    else:
+        try:
+            response = await _search(request)
+        finally:
+            search_pool.release(time.perf_counter() - start)
+    finish_request(response.headers, "search", request.method, response.status_code,
+                   time.perf_counter() - start, timings)
+    return response
+
+
+async def _search(request):
+    try:
+        data = await request.json()
+        query = data.get('query', '')
+        offset = data.get('offset', 0)
+        limit = data.get('limit', 12)
+
+        if not query.strip():
+            return json_response(request, {"results": [], "message": "Please provide a query."}, 400)
+
+        # Step 1: Extract + Parse query (cached, or awaits the LLM with no thread held)
+        (extracted_response, speculation), shared = await aextract_for_query(query)
+        print("\n🔍 Raw LLM Response:\n", extracted_response)
+
+        with stage_timer("parse"):
+            parsed_data = parser(extracted_response)
+        print("\n✅ Parsed Data:", parsed_data)
+
+        if not parsed_data.get("MOVE_ON"):
+            if speculation is not None and not shared:
+                discard_speculative_search(speculation)
+            return json_response(request, {
+                "results": [],
+                "message": parsed_data.get("FOLLOW_UP_MESSAGE", "Please provide more product details.")
+            })
+
+        # Step 2: Async hybrid search, ranked once for the whole session
+        tier, ranked, complete = await arank_for_query(query, parsed_data, offset, limit, speculation)
+        body = build_search_response(ranked, offset, limit, complete, (query, search_filters(parsed_data), tier))
+        with stage_timer("serialize"):
+            return json_response(request, body)
+
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return json_response(request, {
+            "results": [],
+            "error": f"Internal Server Error: {str(e)}"
+        }, 500)
+
+
+app = Starlette(routes=[
+    Route("/search", search, methods=["POST"]),
+    Mount("/", app=WSGIMiddleware(flask_app)),
+])
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    host, port = PREFORK_BIND.rsplit(":", 1)
+    uvicorn.run("asgi:app", host=host, port=int(port), workers=PREFORK_WORKERS)
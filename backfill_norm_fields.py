@@ -0,0 +1,48 @@
+from collections import defaultdict
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+from config import CLUSTER_URL, QDRANT_API_KEY
+from src.vocabulary import canonical_fields
+from src.catalog_version import bump_catalog_version
+
+# Adds article_type_norm / colour_norm / gender_norm to points ingested before
+# those fields existed. Run create_indexes.py afterwards (or before) so the
+# fields get keyword indexes.
+
+COLLECTION = "my_collection"
+SOURCE_FIELDS = ["articleType", "baseColour", "gender", "Individual_category", "colour", "category_by_Gender"]
+
+client = QdrantClient(url=CLUSTER_URL, api_key=QDRANT_API_KEY, timeout=60.0)
+
+# Group point ids by their canonical values so each group is one set_payload call
+groups = defaultdict(list)
+next_offset = None
+scanned = 0
+
+while True:
+    points, next_offset = client.scroll(
+        collection_name=COLLECTION,
+        with_payload=models.PayloadSelectorInclude(include=SOURCE_FIELDS),
+        with_vectors=False,
+        limit=1000,
+        offset=next_offset,
+    )
+    for p in points:
+        fields = canonical_fields(p.payload or {})
+        groups[tuple(sorted(fields.items()))].append(p.id)
+    scanned += len(points)
+    print(f"🔎 Scanned {scanned} points...")
+    if not next_offset:
+        break
+
+print(f"⚙️ Writing canonical fields for {scanned} points in {len(groups)} groups...")
+for key, point_ids in groups.items():
+    for i in range(0, len(point_ids), 1000):
+        client.set_payload(
+            collection_name=COLLECTION,
+            payload=dict(key),
+            points=point_ids[i:i + 1000],
+        )
+
+print("🎉 Canonical facet fields backfilled!")
+bump_catalog_version("backfill_norm_fields")
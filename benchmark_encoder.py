@@ -0,0 +1,113 @@
+"""
+Parity check + latency/throughput benchmark for encoder backends.
+
+Compares a candidate backend (default: onnx-int8) against the reference
+sentence-transformers model on catalog texts built the same way ingestion
+builds them (productDisplayName, baseColour, masterCategory, usage):
+
+  - cosine drift between reference and candidate vectors for the same text
+  - recall@k: candidate query vectors searched against the reference catalog
+    vectors (what Qdrant holds today), compared to the reference top-k
+  - single-query latency (p50/p95) and batched throughput
+
+Usage:
+  python -m src.encoder export
+  python benchmark_encoder.py --csv data/fashion/styles.csv --limit 5000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.encoder import get_encoder
+
+SAMPLE_QUERIES = [
+    "black kurti for women",
+    "red saree",
+    "blue jeans for men",
+    "white cotton tops",
+    "navy blue trousers",
+    "pink ethnic dress",
+    "green kurta set for festive wear",
+    "grey sports shorts",
+    "maroon silk saree for wedding",
+    "denim skirt",
+]
+
+
+def load_catalog_texts(csv_path, limit):
+    df = pd.read_csv(csv_path, on_bad_lines="skip").fillna("NA")
+    if limit:
+        df = df.head(limit)
+    return [
+        f"{row['productDisplayName']} {row['baseColour']} {row['masterCategory']} {row['usage']}"
+        for _, row in df.iterrows()
+    ], df["productDisplayName"].astype(str).tolist()
+
+
+def timed_encode(encoder, texts, batch_size=64):
+    start = time.perf_counter()
+    vectors = encoder.encode(texts, batch_size=batch_size)
+    return vectors, time.perf_counter() - start
+
+
+def recall_at_k(reference_queries, candidate_queries, ref_catalog, cand_catalog, k):
+    """Overlap of the candidate top-k with the reference top-k (reference queries vs reference catalog)."""
+    ref_top = np.argsort(-(reference_queries @ ref_catalog.T), axis=1)[:, :k]
+    cand_top = np.argsort(-(candidate_queries @ cand_catalog.T), axis=1)[:, :k]
+    overlaps = [len(set(r) & set(c)) / k for r, c in zip(ref_top, cand_top)]
+    return float(np.mean(overlaps))
+
+
+def single_query_latency(encoder, queries, rounds=20):
+    encoder.encode(queries[0])  # exclude first-call overhead
+    samples = []
+    for _ in range(rounds):
+        for q in queries:
+            start = time.perf_counter()
+            encoder.encode(q)
+            samples.append((time.perf_counter() - start) * 1000.0)
+    return np.percentile(samples, 50), np.percentile(samples, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", required=True, help="Path to the Myntra styles.csv")
+    parser.add_argument("--limit", type=int, default=5000, help="Catalog rows to use (0 = all)")
+    parser.add_argument("--reference", default="sentence-transformers")
+    parser.add_argument("--candidate", default="onnx-int8")
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    catalog_texts, names = load_catalog_texts(args.csv, args.limit)
+    queries = SAMPLE_QUERIES + names[:: max(1, len(names) // 200)][:200]
+    print(f"📄 {len(catalog_texts)} catalog texts, {len(queries)} queries")
+
+    reference = get_encoder(args.reference)
+    candidate = get_encoder(args.candidate)
+
+    # ---- Parity ----
+    ref_catalog, ref_time = timed_encode(reference, catalog_texts)
+    cand_catalog, cand_time = timed_encode(candidate, catalog_texts)
+    drift = 1.0 - np.sum(ref_catalog * cand_catalog, axis=1)
+    print("\n🎯 Parity (catalog texts)")
+    print(f"   cosine drift  mean={drift.mean():.5f}  p99={np.percentile(drift, 99):.5f}  max={drift.max():.5f}")
+
+    ref_queries = reference.encode(queries)
+    cand_queries = candidate.encode(queries)
+    print(f"   recall@{args.k} (candidate queries vs reference catalog): "
+          f"{recall_at_k(ref_queries, cand_queries, ref_catalog, ref_catalog, args.k):.4f}")
+    print(f"   recall@{args.k} (end-to-end: candidate queries vs candidate catalog): "
+          f"{recall_at_k(ref_queries, cand_queries, ref_catalog, cand_catalog, args.k):.4f}")
+
+    # ---- Latency / throughput ----
+    print("\n⏱️ Performance")
+    for encoder, batch_time in ((reference, ref_time), (candidate, cand_time)):
+        p50, p95 = single_query_latency(encoder, SAMPLE_QUERIES)
+        print(f"   {encoder.name:<22} single query p50={p50:.2f} ms  p95={p95:.2f} ms  "
+              f"batch throughput={len(catalog_texts) / batch_time:.0f} texts/s")
+
+
+if __name__ == "__main__":
+    main()
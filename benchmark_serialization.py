@@ -0,0 +1,111 @@
+"""
+Serialize time and bytes on the wire for typical JSON responses.
+
+Builds a /search response (50 full payloads + pagination) and an /api/kurtis
+page (48 projected items) from styles.csv rows, the way ingestion writes them,
+then compares:
+
+  - stdlib json with Flask's defaults (sort_keys, ensure_ascii) vs orjson
+  - raw vs gzip vs brotli (if installed) body size, and compression time
+
+Usage:
+  python benchmark_serialization.py --csv data/fashion/styles.csv
+"""
+import argparse
+import gzip
+import json
+import time
+
+import pandas as pd
+
+from src.catalog import normalize_item
+from src.vocabulary import canonical_fields
+from config import GZIP_LEVEL, BROTLI_QUALITY
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def load_payloads(csv_path, limit):
+    df = pd.read_csv(csv_path, on_bad_lines="skip").fillna("")
+    payloads = []
+    for i, row in df.head(limit).iterrows():
+        payload = {
+            "id": str(row.get("id", "")),
+            "image_url": f"https://cdn.example.com/images/{row.get('id', i)}.jpg",
+            "gender": row.get("gender", ""),
+            "masterCategory": row.get("masterCategory", ""),
+            "subCategory": row.get("subCategory", ""),
+            "articleType": row.get("articleType", ""),
+            "baseColour": row.get("baseColour", ""),
+            "season": row.get("season", ""),
+            "year": str(row.get("year", "")),
+            "usage": row.get("usage", ""),
+            "productDisplayName": row.get("productDisplayName", ""),
+        }
+        payload.update(canonical_fields(payload))
+        payload["score"] = 0.5 + (i % 50) / 100.0
+        payloads.append(payload)
+    return payloads
+
+
+def sample_responses(payloads):
+    search = {
+        "results": payloads[:50],
+        "pagination": {"offset": 0, "limit": 50, "has_more": True, "total_count": 120,
+                       "cursor": "Zt0m1q0yq4c2l8k2m0cJb1mYf2w"},
+    }
+    kurtis = {
+        "results": [normalize_item(p) for p in payloads[:48]],
+        "next_offset": "f:48",
+        "total": len(payloads),
+    }
+    return {"/search": search, "/api/kurtis": kurtis}
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    return out, (time.perf_counter() - start) / repeat * 1000.0  # ms
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", default="data/fashion/styles.csv")
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    responses = sample_responses(load_payloads(args.csv, 200))
+
+    serializers = {
+        "stdlib (flask defaults)": lambda o: json.dumps(o, ensure_ascii=True, sort_keys=True).encode(),
+    }
+    if orjson is not None:
+        serializers["orjson"] = lambda o: orjson.dumps(o, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        print("⚠️ orjson not installed; only the stdlib serializer is measured.")
+
+    for name, obj in responses.items():
+        print(f"\n📦 {name}")
+        print(f"{'serializer':<26}{'serialize ms':>14}{'raw B':>10}{'gzip B':>10}{'gzip ms':>10}{'br B':>10}{'br ms':>10}")
+        for label, dump in serializers.items():
+            body, ser_ms = timed(lambda: dump(obj), args.repeat)
+            gz, gz_ms = timed(lambda: gzip.compress(body, compresslevel=GZIP_LEVEL), max(args.repeat // 10, 1))
+            if brotli is not None:
+                br, br_ms = timed(lambda: brotli.compress(body, quality=BROTLI_QUALITY), max(args.repeat // 10, 1))
+                br_cols = f"{len(br):>10}{br_ms:>10.3f}"
+            else:
+                br_cols = f"{'-':>10}{'-':>10}"
+            print(f"{label:<26}{ser_ms:>14.3f}{len(body):>10}{len(gz):>10}{gz_ms:>10.3f}{br_cols}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Build step for static assets and pages.
+
+  build/static/<path>              original files (for relative url() references)
+  build/static/<name>.<hash><ext>  content-hashed copies, served as immutable
+  build/pages/<template>           rendered page templates with /static refs
+                                   rewritten to the hashed names
+  *.gz / *.br                      precompressed variants of every text file
+                                   (.br only if the brotli package is installed)
+  build/manifest.json              {"static": {path: hashed path}, "pages": {template: etag}}
+
+CSS/JS are minified when rcssmin / rjsmin are installed (files already named
+*.min.* are left alone). HTML is not minified: pages carry inline JS.
+
+Usage:
+  python build_assets.py        # then restart the app; it picks up build/manifest.json
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+
+import config
+from config import ASSET_BUILD_DIR
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+STATIC_DIR = "static"
+
+# Page routes in app.py that render a template with no server context:
+# every render_page("<template>") call, so a new page route is built too
+RENDER_PAGE_CALL = re.compile(r"""render_page\(\s*["']([^"']+)["']\s*\)""")
+
+
+def page_templates(app_path: str = "app.py") -> list:
+    with open(app_path, encoding="utf-8") as f:
+        return list(dict.fromkeys(RENDER_PAGE_CALL.findall(f.read())))
+
+
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".html", ".svg", ".json", ".txt", ".ttf", ".otf", ".eot", ".ico"}
+
+# ../static/x, /static/x in pages (hrefs, srcs and strings inside inline JS)
+STATIC_REF = re.compile(r"(?:\.\./|/)static/([^\"'\s()?#]+)")
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def minify(path: str, data: bytes) -> bytes:
+    if ".min." in os.path.basename(path):
+        return data
+    if path.endswith(".css") and rcssmin is not None:
+        return rcssmin.cssmin(data.decode("utf-8")).encode("utf-8")
+    if path.endswith(".js") and rjsmin is not None:
+        return rjsmin.jsmin(data.decode("utf-8")).encode("utf-8")
+    return data
+
+
+def write_with_variants(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    if os.path.splitext(path)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+        return  # images and woff/woff2 are already compressed
+    with open(path + ".gz", "wb") as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + ".br", "wb") as f:
+            f.write(brotli.compress(data, quality=11))
+
+
+def link_variants(src: str, dst: str) -> None:
+    # The original name is the same bytes: hard-link instead of storing a second copy
+    for suffix in ("", ".gz", ".br"):
+        if os.path.exists(src + suffix):
+            try:
+                os.link(src + suffix, dst + suffix)
+            except OSError:
+                shutil.copyfile(src + suffix, dst + suffix)
+
+
+def build_static(out_dir: str) -> dict:
+    manifest = {}
+    for root, _, files in os.walk(STATIC_DIR):
+        for name in files:
+            src = os.path.join(root, name)
+            rel = os.path.relpath(src, STATIC_DIR).replace(os.sep, "/")
+            with open(src, "rb") as f:
+                data = minify(rel, f.read())
+
+            stem, ext = os.path.splitext(rel)
+            hashed = f"{stem}.{content_hash(data)}{ext}"
+            write_with_variants(os.path.join(out_dir, hashed), data)
+            link_variants(os.path.join(out_dir, hashed), os.path.join(out_dir, rel))
+            manifest[rel] = hashed
+    return manifest
+
+
+def build_pages(out_dir: str, static_manifest: dict) -> dict:
+    config.WARMUP_ON_START = False  # only templates are needed, not the model
+    from app import app  # rendered exactly as the page routes would
+
+    def to_hashed(match):
+        hashed = static_manifest.get(match.group(1))
+        return f"/static/{hashed}" if hashed else match.group(0)
+
+    pages = {}
+    with app.test_request_context("/"):
+        from flask import render_template
+        from jinja2 import TemplateNotFound
+
+        for template in page_templates():
+            try:
+                html = STATIC_REF.sub(to_hashed, render_template(template)).encode("utf-8")
+            except TemplateNotFound:
+                print(f"⚠️ {template} is routed in app.py but missing from templates/, skipped.")
+                continue
+            write_with_variants(os.path.join(out_dir, template), html)
+            pages[template] = content_hash(html)
+    return pages
+
+
+def main():
+    if os.path.isdir(ASSET_BUILD_DIR):
+        shutil.rmtree(ASSET_BUILD_DIR)
+
+    print("📦 Fingerprinting static assets...")
+    static_manifest = build_static(os.path.join(ASSET_BUILD_DIR, "static"))
+    print(f"✅ {len(static_manifest)} static files")
+
+    print("📄 Rendering pages...")
+    pages = build_pages(os.path.join(ASSET_BUILD_DIR, "pages"), static_manifest)
+    print(f"✅ {len(pages)} pages")
+
+    with open(os.path.join(ASSET_BUILD_DIR, "manifest.json"), "w") as f:
+        json.dump({"static": static_manifest, "pages": pages}, f, indent=2)
+
+    if brotli is None:
+        print("⚠️ brotli not installed: only .gz variants were written.")
+    print(f"🎉 Assets built in {ASSET_BUILD_DIR}/")
+
+
+if __name__ == "__main__":
+    main()
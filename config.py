@@ -5,3 +5,100 @@ COLLECTION_NAME   = 'add yours'
 TEMPERATURE       = 0.5
 MODEL_NAME        = 'llama3-8b-8192'
 GROQ_API_KEY      = 'add yours'
+
+# Query-embedding cache (src/searcher.py)
+EMBEDDING_CACHE_SIZE = 2048     # max cached query vectors
+EMBEDDING_CACHE_TTL  = 3600     # seconds
+
+# Ranked result sessions for /search/more pagination (src/sessions.py)
+SEARCH_SESSION_DEPTH = 120      # ranked ids kept per search
+SEARCH_SESSION_MAX   = 5000     # max live sessions
+SEARCH_SESSION_TTL   = 1800     # seconds
+
+# Micro-batched query encoding (src/embedding_batcher.py)
+EMBEDDING_BATCHING        = True
+EMBEDDING_BATCH_WINDOW_MS = 5     # wait this long to coalesce concurrent queries
+EMBEDDING_MAX_BATCH_SIZE  = 32
+
+# Warm the model and Qdrant client in the background when app.py is imported
+WARMUP_ON_START = True
+
+# Text encoder (src/encoder.py)
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+ENCODER_BACKEND      = 'sentence-transformers'   # or 'onnx-int8'
+ONNX_MODEL_DIR       = 'models/minilm-onnx'
+
+# Serving engine for search_collection / fetch_by_filters_page
+SEARCH_ENGINE   = 'qdrant'              # or 'local' (src/local_index.py snapshot)
+LOCAL_INDEX_DIR = 'data/local_index'    # written by: python -m src.local_index export
+
+# In-memory facet index for the /api/* browse endpoints (src/facet_index.py)
+FACET_INDEX_ENABLED = True
+FACET_INDEX_MAX_AGE = 900       # seconds before a background rebuild picks up catalog changes
+
+# Preforked production server (serve.py)
+PREFORK_BIND             = '0.0.0.0:8000'
+PREFORK_WORKERS          = 4
+PREFORK_THREADS          = 32   # threads per worker; must exceed the /search admission limits below
+TORCH_THREADS_PER_WORKER = 1
+
+# Catalog version stamp, bumped by the ingestion scripts (src/catalog_version.py)
+CATALOG_VERSION_FILE = 'catalog_version.json'
+BROWSE_CACHE_MAX_AGE = 300      # seconds browsers/CDN may reuse a browse page
+
+# Response encoding (src/json_provider.py, src/compression.py)
+JSON_SERIALIZER          = 'orjson'     # 'orjson' or 'stdlib'
+COMPRESSION_MIN_SIZE     = 1024         # bytes; smaller bodies are sent as-is
+GZIP_LEVEL               = 6
+BROTLI_QUALITY           = 5            # brotli is used only if the package is installed
+
+# Speculative vector search overlapped with LLM slot extraction in /search
+SPECULATIVE_SEARCH       = True
+SPECULATIVE_SEARCH_LIMIT = 300          # unfiltered candidates fetched while the LLM runs
+SPECULATIVE_WORKERS      = 8
+
+# Admission control per endpoint group, per worker process (src/admission.py)
+# A queued request holds a server thread, so keep search concurrent + queue
+# well below PREFORK_THREADS: the remaining threads stay free for browsing.
+SEARCH_MAX_CONCURRENT    = 12           # /search, /search/stream (LLM-bound)
+SEARCH_MAX_QUEUE         = 8
+SEARCH_QUEUE_TIMEOUT     = 2.0          # seconds a request may wait for a slot
+BROWSE_MAX_CONCURRENT    = 8            # /api/*, /search/more
+BROWSE_MAX_QUEUE         = 4
+BROWSE_QUEUE_TIMEOUT     = 0.5
+
+# Built static assets and pages (build_assets.py, src/static_assets.py)
+ASSET_BUILD_DIR          = 'build'
+
+# Slot extraction cache in front of the LLM (src/slots.py)
+EXTRACTION_CACHE_SIZE         = 10000    # exact: normalized query -> extracted slots
+EXTRACTION_CACHE_TTL          = 21600    # seconds, both levels
+EXTRACTION_SEMANTIC_CACHE     = True     # reuse slots of a near-duplicate query embedding
+EXTRACTION_SEMANTIC_SIZE      = 4096
+EXTRACTION_SEMANTIC_THRESHOLD = 0.92     # min cosine similarity (MiniLM) for a reuse
+
+# Deterministic vocabulary matcher tried before the LLM (src/fast_extractor.py)
+FAST_EXTRACTOR                = True
+FAST_EXTRACTOR_MAX_WORDS      = 12      # longer, conversational queries go to the LLM
+
+# Slot classifier on the query embedding (src/slot_classifier.py)
+SLOT_CLASSIFIER                = True
+SLOT_CLASSIFIER_PATH           = 'models/slot_classifier.npz'   # python -m src.slot_classifier train <styles.csv>
+SLOT_CLASSIFIER_THRESHOLD      = 0.85     # min calibrated probability to skip the LLM
+SLOT_CLASSIFIER_MIN_SIMILARITY = 0.35     # min cosine to the product-type centroid (out-of-distribution guard)
+
+# LLM slot extraction prompt (src/extractor.py)
+EXTRACTION_MODE                = 'compact'  # 'compact': short system prompt + enum-constrained tool call; 'full': original prompt
+
+# Resilient LLM client: deadline, hedging, circuit breaker (src/resilient_llm.py)
+LLM_DEADLINE                   = 4.0      # seconds before /search falls back to local extraction
+LLM_HEDGE                      = True     # race a second request when the first is slower than p95
+LLM_HEDGE_PERCENTILE           = 95
+LLM_HEDGE_DEFAULT_DELAY        = 1.5      # seconds, until LLM_LATENCY_WINDOW has 20 samples
+LLM_HEDGE_MIN_DELAY            = 0.3
+LLM_LATENCY_WINDOW             = 200      # recent successful call latencies kept
+LLM_WORKERS                    = 32       # threads running sync LLM requests per process
+LLM_BREAKER_WINDOW             = 20       # recent calls the failure rate is computed over
+LLM_BREAKER_MIN_CALLS          = 10
+LLM_BREAKER_FAILURE_RATE       = 0.5
+LLM_BREAKER_COOLDOWN           = 30       # seconds open before a trial call
@@ -14,7 +14,11 @@ indexes = [
     "season",
     "year",
     "usage",
-    "productDisplayName"
+    "productDisplayName",
+    # Canonical facet fields (src/vocabulary.py) used by search and browse filters
+    "article_type_norm",
+    "colour_norm",
+    "gender_norm"
 ]
 
 for field in indexes:
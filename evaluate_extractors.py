@@ -0,0 +1,143 @@
+"""
+Coverage and agreement of the local slot extractors (the vocabulary fast
+path and the embedding slot classifier) on a labeled query set.
+
+For every query in the set (JSON lines: query + expected Category,
+Individual_category, category_by_Gender, colour) each extractor either
+resolves the slots or falls through to the LLM. Reports:
+
+  - coverage: share of queries resolved without the LLM
+  - agreement: share of resolved queries whose four slots all match the labels
+  - per-slot accuracy on resolved queries, fall-through reasons, avg time
+  - with --llm, the Groq extractor on the same set in each prompt mode
+    (compact / full) with latency and token counts per call, and how often
+    the local extractors agree with what the LLM actually returned
+
+The labels in data/slot_queries.jsonl are hand-written, by the same people
+who maintain the fast-path vocabulary, so label agreement is a consistency
+check rather than independent evidence. The independent number is the
+agreement with the live LLM that --llm reports.
+
+Usage:
+  python evaluate_extractors.py
+  python evaluate_extractors.py --queries data/slot_queries.jsonl --llm
+  python evaluate_extractors.py --llm --llm-mode compact
+"""
+import argparse
+import json
+import os
+import time
+
+from src.fast_extractor import match_slots
+
+SLOT_FIELDS = ["Category", "Individual_category", "category_by_Gender", "colour"]
+
+
+def load_queries(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def same(a, b):
+    return str(a).strip().lower() == str(b).strip().lower()
+
+
+def fast_extractor(query):
+    return match_slots(query)
+
+
+def classifier_extractor(query):
+    # Timing includes encoding the query; in /search that vector is already computed
+    from src.encoder import get_encoder
+    from src.slot_classifier import get_slot_classifier
+
+    classifier = get_slot_classifier()
+    if classifier is None:
+        return None, "not_trained"
+    return classifier.extract(get_encoder().encode(query))
+
+
+# name -> fn(query) -> (slots or None, reason)
+EXTRACTORS = {
+    "fast": fast_extractor,
+    "classifier": classifier_extractor,
+}
+
+
+def evaluate(name, fn, rows, llm_outputs=None):
+    resolved = agreed = llm_agreed = 0
+    field_hits = {field: 0 for field in SLOT_FIELDS}
+    reasons = {}
+    mismatches = []
+    start = time.perf_counter()
+    outputs = [fn(row["query"]) for row in rows]
+    elapsed = time.perf_counter() - start
+
+    for i, (row, (slots, reason)) in enumerate(zip(rows, outputs)):
+        if slots is None:
+            reasons[reason] = reasons.get(reason, 0) + 1
+            continue
+        resolved += 1
+        hits = [field for field in SLOT_FIELDS if same(slots[field], row[field])]
+        for field in hits:
+            field_hits[field] += 1
+        if len(hits) == len(SLOT_FIELDS):
+            agreed += 1
+        else:
+            mismatches.append((row["query"], {f: (slots[f], row[f]) for f in SLOT_FIELDS if f not in hits}))
+        if llm_outputs is not None and all(same(slots[f], llm_outputs[i][f]) for f in SLOT_FIELDS):
+            llm_agreed += 1
+
+    print(f"\n⚡ {name}: {len(rows)} queries, {elapsed / len(rows) * 1e6:.1f} µs/query")
+    print(f"   coverage   {resolved}/{len(rows)} = {resolved / len(rows):.1%}")
+    if resolved:
+        print(f"   agreement  {agreed}/{resolved} = {agreed / resolved:.1%} (all four slots match the hand-written labels)")
+        for field in SLOT_FIELDS:
+            print(f"     {field:<22}{field_hits[field] / resolved:.1%}")
+        if llm_outputs is not None:
+            print(f"   agrees with the LLM on {llm_agreed}/{resolved} = {llm_agreed / resolved:.1%} of resolved queries")
+    print(f"   fall-through reasons: {reasons}")
+    for query, diff in mismatches:
+        print(f"   ❌ {query!r}: {diff}  (got, expected)")
+
+
+def run_llm(rows, modes):
+    from langchain_groq import ChatGroq
+
+    from config import MODEL_NAME, TEMPERATURE
+    from src.extractor import extract_with_llm, get_extraction_mode_stats
+
+    llm = ChatGroq(temperature=TEMPERATURE, groq_api_key=os.getenv("GROQ_API_KEY"), model_name=MODEL_NAME)
+    outputs = None
+    for mode in modes:
+        mode_outputs, agreed = [], 0
+        for row in rows:
+            slots = extract_with_llm(llm, row["query"], mode=mode)
+            mode_outputs.append(slots)
+            agreed += all(same(slots[f], row[f]) for f in SLOT_FIELDS)
+        stats = get_extraction_mode_stats().get(mode, {})
+        print(f"\n🤖 llm ({mode}): all four slots match the labels on {agreed}/{len(rows)} = {agreed / len(rows):.1%}")
+        print(f"   {stats.get('avg_ms')} ms/call, {stats.get('avg_input_tokens')} input + "
+              f"{stats.get('avg_output_tokens')} output tokens/call, {stats.get('invalid', 0)} invalid replies")
+        outputs = outputs or mode_outputs
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", default="data/slot_queries.jsonl")
+    parser.add_argument("--extractor", choices=sorted(EXTRACTORS), action="append",
+                        help="local extractor(s) to evaluate (default: all)")
+    parser.add_argument("--llm", action="store_true", help="also run the Groq extractor (needs GROQ_API_KEY)")
+    parser.add_argument("--llm-mode", choices=["compact", "full"], action="append",
+                        help="extraction prompt(s) to run with --llm (default: both); the first is compared with the local extractors")
+    args = parser.parse_args()
+
+    rows = load_queries(args.queries)
+    llm_outputs = run_llm(rows, args.llm_mode or ["compact", "full"]) if args.llm else None
+    for name in args.extractor or sorted(EXTRACTORS):
+        evaluate(name, EXTRACTORS[name], rows, llm_outputs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Per-process memory breakdown of a running preforked server (Linux only).
+
+Reads /proc/<pid>/smaps_rollup for the gunicorn master and each worker:
+  RSS      - resident pages, counting shared pages fully in every process
+  PSS      - shared pages split evenly between the processes mapping them
+  Shared   - pages also mapped by another process (model weights after fork)
+  Private  - pages only this process has (what each extra worker really costs)
+
+Usage:
+  python serve.py &
+  python measure_worker_memory.py <master pid>
+"""
+import os
+import sys
+
+FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def read_rollup(pid):
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts and parts[0].rstrip(":") in FIELDS:
+                values[parts[0].rstrip(":")] = int(parts[1]) / 1024.0  # MB
+    return values
+
+
+def children(pid):
+    found = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        try:
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                found += [int(c) for c in f.read().split()]
+        except FileNotFoundError:
+            continue
+    return found
+
+
+def main():
+    if len(sys.argv) != 2:
+        print(__doc__)
+        sys.exit(1)
+
+    master = int(sys.argv[1])
+    workers = children(master)
+    print(f"{'process':<16}{'RSS MB':>10}{'PSS MB':>10}{'Shared MB':>12}{'Private MB':>12}")
+
+    totals = {"Pss": 0.0, "Private": 0.0}
+    worker_private = []
+    for label, pid in [("master", master)] + [(f"worker {w}", w) for w in workers]:
+        m = read_rollup(pid)
+        shared = m.get("Shared_Clean", 0) + m.get("Shared_Dirty", 0)
+        private = m.get("Private_Clean", 0) + m.get("Private_Dirty", 0)
+        totals["Pss"] += m.get("Pss", 0)
+        totals["Private"] += private
+        if pid != master:
+            worker_private.append(private)
+        print(f"{label:<16}{m.get('Rss', 0):>10.1f}{m.get('Pss', 0):>10.1f}{shared:>12.1f}{private:>12.1f}")
+
+    print(f"\n🧮 Total PSS (real footprint of the whole server): {totals['Pss']:.1f} MB")
+    if worker_private:
+        print(f"🧮 Marginal cost per extra worker (avg private): {sum(worker_private) / len(worker_private):.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
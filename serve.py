@@ -0,0 +1,81 @@
+"""
+Preforked production entry point.
+
+Loads the app, the encoder weights, the Qdrant/local search backend and the
+facet index ONCE in the gunicorn master, then forks workers. The workers
+share those pages copy-on-write instead of each loading torch + MiniLM.
+Fork-unsafe state (Qdrant HTTP pool, encoder runtime threads, embedding
+batcher thread) is re-created in every worker after fork.
+
+Usage:
+  python serve.py
+  python measure_worker_memory.py <master pid>   # per-worker memory breakdown
+"""
+import gc
+import os
+import threading
+
+from gunicorn.app.base import BaseApplication
+
+import config
+from config import PREFORK_BIND, PREFORK_WORKERS, PREFORK_THREADS, TORCH_THREADS_PER_WORKER
+
+# Warm up synchronously in the master below instead of in a background thread:
+# threads started before fork() do not exist in the workers.
+config.WARMUP_ON_START = False
+
+
+def post_fork(server, worker):
+    from src.searcher import reset_after_fork, is_ready
+    from app import _warmup_until_ready
+
+    reset_after_fork(num_threads=TORCH_THREADS_PER_WORKER)
+    if not is_ready():
+        # Master could not warm up (e.g. Qdrant unreachable): keep retrying per worker
+        threading.Thread(target=_warmup_until_ready, name="warmup", daemon=True).start()
+    server.log.info("Worker %s ready for requests (shared model pages)", worker.pid)
+
+
+def child_exit(server, worker):
+    # Drop the dead worker's live gauges from the shared /metrics directory
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
+
+
+class PreforkServer(BaseApplication):
+    def __init__(self, options=None):
+        self.options = options or {}
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        from app import app
+        from src.searcher import warmup
+
+        if not warmup():
+            print("⚠️ Warmup failed in master; workers will retry on their own.")
+
+        # Move everything allocated so far out of the GC's generations so the
+        # collector in each worker doesn't touch (and copy) the shared pages.
+        gc.collect()
+        gc.freeze()
+        return app
+
+
+if __name__ == "__main__":
+    PreforkServer({
+        "bind": PREFORK_BIND,
+        "workers": PREFORK_WORKERS,
+        "threads": PREFORK_THREADS,
+        "worker_class": "gthread",
+        "preload_app": True,
+        "post_fork": post_fork,
+        "child_exit": child_exit,
+        "timeout": 60,
+    }).run()
@@ -0,0 +1,192 @@
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from functools import wraps
+from typing import Any, Dict
+
+from flask import jsonify, make_response
+
+# ------------------- 🚦 ADMISSION CONTROL -------------------
+# Each endpoint group gets its own pool: at most `max_concurrent` requests run,
+# at most `max_queue` wait, and nobody waits longer than `queue_timeout`.
+# Everything else is shed immediately with Retry-After, so a slow LLM backs up
+# /search only and the browse endpoints keep their own capacity.
+#
+#   429 - the wait queue is full (back off and retry)
+#   503 - the request would not (or did not) get a slot before its deadline
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class AdmissionPool:
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = {"queue_full": 0, "predicted_timeout": 0, "timeout": 0}
+        self._service_ewma = None  # seconds, smoothed service time
+        self._async_waiters = deque()  # (loop, future) of coroutines queued in aacquire()
+
+    def _retry_after(self) -> int:
+        # Roughly how long until the current backlog drains
+        service = self._service_ewma or self.queue_timeout
+        return max(1, math.ceil(service * (self.waiting + 1) / self.max_concurrent))
+
+    def _admit(self):
+        self.active += 1
+        self.admitted += 1
+
+    def _queue_deadline(self) -> float:
+        """With the lock held and no free slot: shed now, or return how long we may wait."""
+        if self.waiting >= self.max_queue:
+            self.shed["queue_full"] += 1
+            raise AdmissionRejected(429, f"{self.name} queue is full", self._retry_after())
+
+        # Shed now rather than after the timeout if the queue can't drain in time
+        if self._service_ewma is not None:
+            expected_wait = self._service_ewma * (self.waiting + 1) / self.max_concurrent
+            if expected_wait > self.queue_timeout:
+                self.shed["predicted_timeout"] += 1
+                raise AdmissionRejected(503, f"{self.name} is overloaded", self._retry_after())
+
+        return time.monotonic() + self.queue_timeout
+
+    def _timed_out(self):
+        self.shed["timeout"] += 1
+        return AdmissionRejected(503, f"{self.name} is overloaded", self._retry_after())
+
+    def _wake_one(self):
+        """A slot was freed: wake one waiting thread and one waiting coroutine (they race for it)."""
+        self._cond.notify()
+        while self._async_waiters:
+            loop, waiter = self._async_waiters.popleft()
+            if not waiter.done():
+                loop.call_soon_threadsafe(_wake, waiter)
+                break
+
+    def acquire(self):
+        with self._cond:
+            if self.active < self.max_concurrent and self.waiting == 0:
+                self._admit()
+                return
+
+            deadline = self._queue_deadline()
+            self.waiting += 1
+            try:
+                while self.active >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._timed_out()
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self._admit()
+
+    async def aacquire(self):
+        """acquire() for coroutines: queues on the event loop instead of blocking a thread."""
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            if self.active < self.max_concurrent and self.waiting == 0:
+                self._admit()
+                return
+            deadline = self._queue_deadline()
+            self.waiting += 1
+
+        admitted = False
+        try:
+            while True:
+                with self._cond:
+                    if self.active < self.max_concurrent:
+                        self.waiting -= 1
+                        self._admit()
+                        admitted = True
+                        return
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._timed_out()
+                    waiter = loop.create_future()
+                    self._async_waiters.append((loop, waiter))
+                try:
+                    await asyncio.wait_for(waiter, remaining)
+                except asyncio.TimeoutError:
+                    pass  # re-checked above: a slot may have freed at the last moment
+                finally:
+                    with self._cond:
+                        if (loop, waiter) in self._async_waiters:
+                            self._async_waiters.remove((loop, waiter))
+        finally:
+            if not admitted:
+                with self._cond:
+                    self.waiting -= 1
+                    # A cancelled waiter may have swallowed a wake-up: pass it on
+                    self._wake_one()
+
+    def release(self, service_seconds: float = None):
+        with self._cond:
+            self.active -= 1
+            if service_seconds is not None:
+                if self._service_ewma is None:
+                    self._service_ewma = service_seconds
+                else:
+                    self._service_ewma = 0.8 * self._service_ewma + 0.2 * service_seconds
+            self._wake_one()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "active": self.active,
+                "queue_depth": self.waiting,
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "queue_timeout": self.queue_timeout,
+                "admitted": self.admitted,
+                "shed": dict(self.shed),
+                "avg_service_ms": round(self._service_ewma * 1000.0, 1) if self._service_ewma else 0.0,
+            }
+
+
+def admission_controlled(pool: AdmissionPool):
+    """Run the view inside `pool`; streamed responses keep their slot until the stream closes."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                pool.acquire()
+            except AdmissionRejected as e:
+                response = jsonify({"results": [], "error": f"Service busy: {e.reason}. Please retry shortly."})
+                response.status_code = e.status
+                response.headers["Retry-After"] = str(e.retry_after)
+                return response
+
+            start = time.monotonic()
+            try:
+                response = make_response(view(*args, **kwargs))
+            except BaseException:
+                pool.release(time.monotonic() - start)
+                raise
+
+            if response.is_streamed:
+                response.call_on_close(lambda: pool.release(time.monotonic() - start))
+            else:
+                pool.release(time.monotonic() - start)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,179 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Sequence
+
+import numpy as np
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe bounded LRU cache with a per-entry time-to-live.
+
+    - maxsize: max number of entries; the least recently used entry is evicted first.
+    - ttl: seconds an entry stays valid (None = never expires).
+
+    Keeps hit / miss / eviction counters so the cache can be sized from real traffic.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            self._data[key] = (value, expires_at)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class SimilarityCache:
+    """
+    Thread-safe bounded nearest-neighbour cache keyed on embedding vectors.
+
+    get() returns the value of the most similar live entry whose cosine
+    similarity to the lookup vector is >= threshold and whose `guard` equals
+    the caller's guard (any hashable; used to refuse near-duplicates that
+    differ in a way the embedding hides).
+
+    - maxsize: max number of entries; the oldest entry is overwritten first.
+    - ttl: seconds an entry stays valid (None = never expires).
+    - threshold: minimum cosine similarity for a hit.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None, threshold: float = 0.95):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        self._vectors: Optional[np.ndarray] = None  # (maxsize, dim), allocated on first set
+        self._entries = [None] * maxsize            # (guard, value, expires_at)
+        self._next = 0
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.guard_rejections = 0
+        self.evictions = 0
+        self.similarity_sum = 0.0
+
+    @staticmethod
+    def _unit(vector: Sequence[float]) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(v))
+        return v / norm if norm else v
+
+    def get(self, vector: Sequence[float], guard: Hashable = None, default: Any = None) -> Any:
+        v = self._unit(vector)
+        now = time.monotonic()
+        with self._lock:
+            if self._size and self._vectors is not None and self._vectors.shape[1] == v.shape[0]:
+                sims = self._vectors[:self._size] @ v
+                candidates = np.flatnonzero(sims >= self.threshold)
+                rejected = False
+                for i in candidates[np.argsort(-sims[candidates])]:
+                    entry_guard, value, expires_at = self._entries[i]
+                    if expires_at is not None and expires_at <= now:
+                        continue
+                    if entry_guard != guard:
+                        rejected = True
+                        continue
+                    self.hits += 1
+                    self.similarity_sum += float(sims[i])
+                    return value
+                self.guard_rejections += rejected
+            self.misses += 1
+            return default
+
+    def set(self, vector: Sequence[float], value: Any, guard: Hashable = None) -> None:
+        v = self._unit(vector)
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != v.shape[0]:
+                # First entry (or a new encoder dimension): start over
+                self._vectors = np.zeros((self.maxsize, v.shape[0]), dtype=np.float32)
+                self._entries = [None] * self.maxsize
+                self._next = self._size = 0
+            i = self._next
+            self._vectors[i] = v
+            self._entries[i] = (guard, value, expires_at)
+            self._next = (i + 1) % self.maxsize
+            if self._size < self.maxsize:
+                self._size += 1
+            else:
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vectors = None
+            self._entries = [None] * self.maxsize
+            self._next = self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": self._size,
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "guard_rejections": self.guard_rejections,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "avg_hit_similarity": round(self.similarity_sum / self.hits, 4) if self.hits else 0.0,
+            }
@@ -0,0 +1,41 @@
+from typing import Any, Dict, List
+
+# ------------------- 🛍️ CATALOG BROWSE REGISTRY -------------------
+# Drives /api/catalog/<category>. Each browse category lists the canonical
+# article types it shows (see src/vocabulary.py).
+
+CATALOG_CATEGORIES: Dict[str, Dict[str, Any]] = {
+    # Kurtis page also lists kurtas / kurta sets
+    "kurtis": {"article_types": ["kurtis", "kurtas"]},
+    "skirts": {"article_types": ["skirts"]},
+    "jeans": {"article_types": ["jeans"]},
+    "jumpsuits": {"article_types": ["jumpsuit"]},
+}
+
+# Response field -> payload fields tried in order (both ingestion layouts)
+CATALOG_FIELDS: Dict[str, List[str]] = {
+    "id": ["id", "product_id", "name"],
+    "image_url": ["image_link", "image_url"],
+    "gender": ["gender"],
+    "masterCategory": ["masterCategory", "Category"],
+    "subCategory": ["subCategory"],
+    "articleType": ["articleType", "Individual_category"],
+    "baseColour": ["baseColour", "colour"],
+    "productDisplayName": ["productDisplayName", "name"],
+}
+
+# Only these payload keys are requested from the search backend
+CATALOG_PAYLOAD_FIELDS: List[str] = sorted({f for sources in CATALOG_FIELDS.values() for f in sources})
+
+
+def normalize_item(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Map one projected payload onto the fields the browse pages expect."""
+    item = {}
+    for field, sources in CATALOG_FIELDS.items():
+        value = None
+        for source in sources:
+            value = payload.get(source)
+            if value:
+                break
+        item[field] = value
+    return item
@@ -0,0 +1,60 @@
+import json
+import os
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from config import CATALOG_VERSION_FILE
+
+# ------------------- 🏷️ CATALOG VERSION STAMP -------------------
+# A small JSON file ({"version": ..., "updated_at": ...}) that every ingestion
+# script bumps after writing to the collection. Web workers re-read it only
+# when its mtime changes, so checking the version costs one stat() and never
+# a Qdrant call. It drives HTTP validators (ETag / Last-Modified) and facet
+# index rebuilds.
+
+_PROCESS_START = time.time()
+_cached = {"mtime": None, "value": None}
+
+
+def get_catalog_version(path: str = CATALOG_VERSION_FILE) -> Dict[str, Any]:
+    try:
+        mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        # No stamp yet: treat the catalog as unchanged since this process started
+        return {"version": "initial", "updated_at": _PROCESS_START}
+
+    if _cached["mtime"] != mtime:
+        try:
+            with open(path) as f:
+                _cached["value"] = json.load(f)
+            _cached["mtime"] = mtime
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not read catalog version file: {e}")
+            if _cached["value"] is None:
+                return {"version": "initial", "updated_at": _PROCESS_START}
+    return _cached["value"]
+
+
+def bump_catalog_version(note: Optional[str] = None, path: str = CATALOG_VERSION_FILE) -> Dict[str, Any]:
+    """Record that the catalog changed. Call at the end of every ingestion run."""
+    stamp = {
+        "version": uuid.uuid4().hex[:16],
+        "updated_at": time.time(),
+        "note": note,
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(stamp, f)
+    os.replace(tmp_path, path)  # atomic: readers never see a half-written file
+    print(f"🏷️ Catalog version bumped to {stamp['version']}")
+    return stamp
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "bump":
+        bump_catalog_version(" ".join(sys.argv[2:]) or "manual bump")
+    else:
+        print(get_catalog_version())
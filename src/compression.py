@@ -0,0 +1,69 @@
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# ------------------- 🗜️ RESPONSE COMPRESSION -------------------
+# after_request hook negotiating br / gzip from Accept-Encoding for textual
+# responses above a size threshold. Streamed, passthrough (static files),
+# already-encoded and non-2xx responses are left untouched.
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "text/html",
+    "text/css",
+    "text/plain",
+    "application/javascript",
+    "text/javascript",
+    "image/svg+xml",
+}
+
+
+def choose_encoding(accept_encodings) -> str:
+    """Best content-coding the client accepts: br, then gzip, else identity ("")."""
+    if brotli is not None and accept_encodings.quality("br") > 0:
+        return "br"
+    if accept_encodings.quality("gzip") > 0:
+        return "gzip"
+    return ""
+
+
+def compress_body(data: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 5) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+def init_compression(app, min_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5):
+    @app.after_request
+    def compress_response(response):
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+        response.vary.add("Accept-Encoding")
+
+        if (
+            not 200 <= response.status_code < 300
+            or response.status_code == 204
+            or response.direct_passthrough
+            or response.is_streamed
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+
+        encoding = choose_encoding(request.accept_encodings)
+        if not encoding:
+            return response
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        response.set_data(compress_body(data, encoding, gzip_level, brotli_quality))
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    return compress_response
@@ -0,0 +1,131 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Sequence
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-text encode calls into batched `encode_fn` calls.
+
+    Request threads enqueue their text and block on a Future; one worker thread
+    collects everything that arrives within `window_ms` of the first queued text
+    (or until `max_batch_size` texts are waiting) and encodes them in one call.
+
+    - encode_fn: takes a list of texts, returns one vector per text (array-like).
+    - window_ms: how long the worker waits for more texts before encoding.
+    - max_batch_size: upper bound on texts per encode call.
+    """
+
+    def __init__(self, encode_fn: Callable[[List[str]], Sequence[Any]],
+                 window_ms: float = 5.0, max_batch_size: int = 32):
+        self.encode_fn = encode_fn
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker = None
+
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_encode = 0.0
+
+    # ---------- public API ----------
+
+    def submit(self, text: str) -> Future:
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((text, future, time.monotonic()))
+        return future
+
+    def encode(self, text: str, timeout: float = None) -> List[float]:
+        """Encode one text through the batcher and return it as a plain list."""
+        return self.submit(text).result(timeout=timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "window_ms": self.window * 1000.0,
+                "max_batch_size": self.max_batch_size,
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "largest_batch": self.largest_batch,
+                "avg_wait_ms": round(self.total_wait * 1000.0 / self.items, 3) if self.items else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000.0, 3),
+                "avg_encode_ms": round(self.total_encode * 1000.0 / self.batches, 3) if self.batches else 0.0,
+            }
+
+    # ---------- worker ----------
+
+    def _ensure_worker(self) -> None:
+        # Threads do not survive fork(): restart the worker in each new process.
+        if self._pid == os.getpid() and self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._worker = None
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, args=(self._queue,), name="embedding-batcher", daemon=True
+                )
+                self._worker.start()
+                self._pid = os.getpid()
+
+    def _collect(self, work_queue: "queue.Queue") -> list:
+        batch = [work_queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(work_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self, work_queue: "queue.Queue") -> None:
+        while True:
+            batch = self._collect(work_queue)
+            started = time.monotonic()
+
+            # Identical texts in the same window are encoded once
+            unique_texts = list(dict.fromkeys(text for text, _, _ in batch))
+            by_text, error = {}, None
+            try:
+                vectors = self.encode_fn(unique_texts)
+                by_text = {text: list(map(float, vec)) for text, vec in zip(unique_texts, vectors)}
+                if len(by_text) != len(unique_texts):
+                    raise ValueError(f"encode_fn returned {len(by_text)} vectors for {len(unique_texts)} texts")
+            except Exception as e:
+                error = e
+
+            # A caller may have cancelled its future (asyncio.wrap_future does when
+            # the client goes away); skip it without failing the rest of the batch.
+            for text, future, _ in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(by_text[text])
+
+            finished = time.monotonic()
+            with self._lock:
+                self.batches += 1
+                self.items += len(batch)
+                self.largest_batch = max(self.largest_batch, len(batch))
+                self.total_encode += finished - started
+                for _, _, enqueued_at in batch:
+                    wait = started - enqueued_at
+                    self.total_wait += wait
+                    self.max_wait = max(self.max_wait, wait)
@@ -0,0 +1,220 @@
+import os
+import threading
+from importlib.util import find_spec
+from typing import Any, Dict, List, Union
+
+import numpy as np
+
+from config import EMBEDDING_MODEL_NAME, ENCODER_BACKEND, ONNX_MODEL_DIR
+
+# ------------------- 🧩 ENCODER INTERFACE -------------------
+# Every place that turns text into vectors (search, ingestion, benchmarks) goes
+# through get_encoder(), so the inference backend is a single config switch.
+#
+# Backends:
+#   "sentence-transformers" - reference PyTorch model (default)
+#   "onnx-int8"             - same model exported to ONNX with int8 dynamic
+#                             quantization, run with onnxruntime on CPU
+#                             (optional deps: onnxruntime, transformers)
+
+
+class Encoder:
+    """
+    Minimal encoder interface, call-compatible with SentenceTransformer.encode:
+    a single string returns a 1-D vector, a list of strings returns a 2-D array.
+    Vectors are L2-normalized, like the all-MiniLM-L6-v2 pipeline.
+    """
+
+    name = "base"
+    dimension = 384
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32,
+               show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        vectors = self._encode_batch(texts, batch_size=batch_size)
+        return vectors[0] if single else vectors
+
+    def _encode_batch(self, texts: List[str], batch_size: int) -> np.ndarray:
+        raise NotImplementedError
+
+    def reset_after_fork(self, num_threads: int = None) -> None:
+        """Re-create per-process runtime state in a forked worker (weights stay shared)."""
+
+
+class SentenceTransformerEncoder(Encoder):
+    name = "sentence-transformers"
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+        self.dimension = self.model.get_sentence_embedding_dimension()
+
+    def _encode_batch(self, texts, batch_size):
+        return np.asarray(
+            self.model.encode(texts, batch_size=batch_size, show_progress_bar=False),
+            dtype=np.float32,
+        )
+
+    def reset_after_fork(self, num_threads=None):
+        # Keep each worker's intra-op pool small so N workers don't oversubscribe the CPU
+        if num_threads:
+            import torch
+
+            torch.set_num_threads(num_threads)
+
+
+class OnnxEncoder(Encoder):
+    """
+    ONNX Runtime backend for a model exported with export_onnx().
+    Reproduces the sentence-transformers pipeline: mean pooling over the
+    attention mask followed by L2 normalization.
+    """
+
+    name = "onnx-int8"
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR, model_file: str = "model_int8.onnx",
+                 max_length: int = 256):
+        missing = "The onnx-int8 encoder needs `onnxruntime` and `transformers` installed."
+        if find_spec("onnxruntime") is None:
+            raise ImportError(missing)
+        try:
+            from transformers import AutoTokenizer
+        except ImportError as e:
+            raise ImportError(missing) from e
+
+        model_path = os.path.join(model_dir, model_file)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"{model_path} not found. Export it first with: python -m src.encoder export"
+            )
+
+        self.model_path = model_path
+        self.session = self._create_session()
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_length = max_length
+
+    def _create_session(self, num_threads: int = None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        return ort.InferenceSession(
+            self.model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+
+    def reset_after_fork(self, num_threads=None):
+        # onnxruntime thread pools do not survive fork(): build a fresh session
+        self.session = self._create_session(num_threads)
+
+    def _encode_batch(self, texts, batch_size):
+        out = []
+        for start in range(0, len(texts), batch_size):
+            tokens = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            feed = {k: v.astype(np.int64) for k, v in tokens.items() if k in self.input_names}
+            hidden = self.session.run(None, feed)[0]
+
+            mask = tokens["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+            out.append((pooled / np.clip(norms, 1e-12, None)).astype(np.float32))
+
+        if not out:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return np.vstack(out)
+
+
+_BACKENDS = {
+    SentenceTransformerEncoder.name: SentenceTransformerEncoder,
+    OnnxEncoder.name: OnnxEncoder,
+}
+_encoders: Dict[str, Encoder] = {}
+_lock = threading.Lock()
+
+
+def get_encoder(backend: str = None) -> Encoder:
+    """Return the process-wide encoder for `backend` (defaults to ENCODER_BACKEND)."""
+    backend = backend or ENCODER_BACKEND
+    if backend not in _BACKENDS:
+        raise ValueError(f"Unknown encoder backend '{backend}'. Choose from {sorted(_BACKENDS)}")
+
+    encoder = _encoders.get(backend)
+    if encoder is None:
+        with _lock:
+            encoder = _encoders.get(backend)
+            if encoder is None:
+                print(f"🧩 Loading '{backend}' encoder...")
+                encoder = _BACKENDS[backend]()
+                _encoders[backend] = encoder
+    return encoder
+
+
+def reset_encoders_after_fork(num_threads: int = None) -> None:
+    """Call in each forked worker for every encoder loaded by the parent."""
+    for encoder in list(_encoders.values()):
+        encoder.reset_after_fork(num_threads)
+
+
+# ------------------- 📦 ONNX EXPORT + INT8 QUANTIZATION -------------------
+
+def export_onnx(output_dir: str = ONNX_MODEL_DIR, model_name: str = EMBEDDING_MODEL_NAME) -> Dict[str, Any]:
+    """
+    Export the transformer behind `model_name` to ONNX and write an int8
+    dynamically-quantized copy next to it, together with the tokenizer files.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(output_dir, exist_ok=True)
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+
+    fp32_path = os.path.join(output_dir, "model.onnx")
+    int8_path = os.path.join(output_dir, "model_int8.onnx")
+
+    dummy = tokenizer(["warmup query"], return_tensors="pt")
+    input_names = list(dummy.keys())
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    print(f"📦 Exporting {model_name} to {fp32_path}...")
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(dummy[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+
+    print(f"🗜️ Quantizing to int8: {int8_path}...")
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    tokenizer.save_pretrained(output_dir)
+
+    sizes = {path: os.path.getsize(path) for path in (fp32_path, int8_path)}
+    for path, size in sizes.items():
+        print(f"✅ {path}: {size / 1e6:.1f} MB")
+    return sizes
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "export":
+        export_onnx(sys.argv[2] if len(sys.argv) > 2 else ONNX_MODEL_DIR)
+    else:
+        print("Usage: python -m src.encoder export [output_dir]")
@@ -1,7 +1,23 @@
 import json
+import threading
+import time
+from typing import Any, Dict, Literal
 
-def extractor(llm, conversation_history):
-    prompt = f'''
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+
+from config import EXTRACTION_MODE
+from src.metrics import record_llm_call
+from src.resilient_llm import llm_deadline
+from src.vocabulary import CATEGORIES, COLOURS, GENDERS, INDIVIDUAL_CATEGORIES
+
+# Choice lists embedded in the prompt, from the shared slot vocabulary
+CATEGORY_CHOICES = ", ".join(CATEGORIES)
+INDIVIDUAL_CATEGORY_CHOICES = ", ".join(INDIVIDUAL_CATEGORIES)
+GENDER_CHOICES = " or ".join(GENDERS)
+COLOUR_CHOICES = ", ".join(COLOURS)
+
+def build_extraction_prompt(conversation_history):
+    return f'''
 ## CONTEXT ##
 Analyze the following Fashion e-commerce conversation history:
 {conversation_history}
@@ -10,10 +26,10 @@ Analyze the following Fashion e-commerce conversation history:
 Extract and infer relevant information about the customer's primary product request, focusing only on the parameters specified below. If multiple products are mentioned, focus on the first or main product. Make reasonable assumptions based on context, but do not introduce information outside the given categories.
 
 ## GUIDELINES ##
-1. Category: Choose ONE from Indian Wear, Plus Size, Western, Sports Wear, Inner Wear & Sleep Wear, Lingerie & Sleep Wear. If none fit, use "Other". If multiple categories apply, choose the most relevant for the main product.
-2. Individual Category: Choose ONE from kurta-sets, kurtas, tops, thermal-tops, jeans, skirts, shorts, trousers, palazzos, jumpsuit, co-ords, clothing-set, kurtis, tunics, saree, lehengas, anarkalis, salwar-kameez, dupattas, blouses, ethnic-dresses, traditional-wear. If none fit, use "Other".
-3. Category by Gender: Choose Women or Men. If unclear, use your best judgment.
-4. Colour: Choose from Black, Orange, Navy Blue, Red, Beige, Yellow, Green, Mustard, Teal, Peach, Blue, Sea Green, Pink, Burgundy, Maroon, Lavender, Purple, White, Grey, Lime Green, Brown, Cream, Rust, Off White, Turquoise Blue, Multi, Mauve, Assorted, Magenta, Fuchsia, Coral, Olive, Rose, Gold, Fluorescent Green, Silver, Nude, Violet, Charcoal, Grey Melange, Khaki, Coffee Brown, Taupe, Copper. If unclear or not listed, use "Other".
+1. Category: Choose ONE from {CATEGORY_CHOICES}. If none fit, use "Other". If multiple categories apply, choose the most relevant for the main product.
+2. Individual Category: Choose ONE from {INDIVIDUAL_CATEGORY_CHOICES}. If none fit, use "Other".
+3. Category by Gender: Choose {GENDER_CHOICES}. If unclear, use your best judgment.
+4. Colour: Choose from {COLOUR_CHOICES}. If unclear or not listed, use "Other".
 
 5. Move On:
    - Use "true" if Category, Individual Category, and at least one of Colour or Category by Gender are available.
@@ -45,8 +61,8 @@ Input: {conversation_history}
 Your output:
 '''
 
-    response = llm.invoke(prompt)
 
+def parse_extraction(content):
     # ------------------- Parse ------------------------
     parsed_data = {
         "Category": "NA",
@@ -58,7 +74,7 @@ Your output:
     }
 
     try:
-        lines = response.content.strip().split("\n")
+        lines = content.strip().split("\n")
         for line in lines:
             if ":" in line:
                 key, value = line.split(":", 1)
@@ -72,7 +88,7 @@ Your output:
                         parsed_data[key] = value
 
         # Fill follow-up message if present
-        if "FOLLOW_UP_MESSAGE" in response.content:
+        if "FOLLOW_UP_MESSAGE" in content:
             follow_up = [l for l in lines if "FOLLOW_UP_MESSAGE" in l]
             if follow_up:
                 parsed_data["FOLLOW_UP_MESSAGE"] = follow_up[0].split(":", 1)[1].strip().strip('"')
@@ -83,6 +99,161 @@ Your output:
     return parsed_data
 
 
+def extractor(llm, conversation_history):
+    start = time.perf_counter()
+    response = llm.invoke(build_extraction_prompt(conversation_history))
+    _record("full", time.perf_counter() - start, response)
+    return parse_extraction(response.content)
+
+
+async def aextractor(llm, conversation_history):
+    # Same extraction without holding a thread while the LLM call is in flight
+    start = time.perf_counter()
+    response = await llm.ainvoke(build_extraction_prompt(conversation_history))
+    _record("full", time.perf_counter() - start, response)
+    return parse_extraction(response.content)
+
+
+# ------------------- ⚡ COMPACT STRUCTURED EXTRACTION -------------------
+# Short system prompt sent once, the query sent once as the user message, and
+# the answer decoded as a tool call whose JSON schema carries the closed
+# vocabularies as enums. The reply is validated strictly against
+# ExtractedSlots: wrong types, values outside the enums or extra keys fall back
+# to the full prompt above, within the same LLM deadline as the first attempt.
+
+COMPACT_SYSTEM_PROMPT = (
+    "Extract the customer's main fashion product request into the schema. "
+    'Use "NA" when a field is not stated or inferable, "Other" when it fits none of the options. '
+    "Map kurta=kurtas, kurti=kurtis, dress=ethnic-dresses. "
+    "MOVE_ON is true only if Category, Individual_category and colour or category_by_Gender are known. "
+    "FOLLOW_UP_MESSAGE: one short sentence confirming the search, asking for what is missing, "
+    "or saying only fashion products are available."
+)
+
+
+class ExtractedSlots(BaseModel):
+    """Slots of the customer's main fashion product request."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    Category: Literal[tuple(CATEGORIES + ["Other", "NA"])]
+    Individual_category: Literal[tuple(INDIVIDUAL_CATEGORIES + ["Other", "NA"])]
+    category_by_Gender: Literal[tuple(GENDERS + ["NA"])]
+    colour: Literal[tuple(COLOURS + ["Other", "NA"])]
+    MOVE_ON: bool
+    FOLLOW_UP_MESSAGE: str = Field(max_length=300)
+
+
+# id(llm) -> (llm, tool-bound client): building the tool schema once per client
+_structured_llms: Dict[int, tuple] = {}
+
+
+def _structured(llm):
+    # bind_tools rather than with_structured_output: call kwargs (the per-request
+    # timeout) reach the model, and the reply is validated below
+    entry = _structured_llms.get(id(llm))
+    if entry is None or entry[0] is not llm:
+        entry = (llm, llm.bind_tools([ExtractedSlots], tool_choice=ExtractedSlots.__name__))
+        _structured_llms[id(llm)] = entry
+    return entry[1]
+
+
+def _compact_messages(conversation_history):
+    return [("system", COMPACT_SYSTEM_PROMPT), ("human", str(conversation_history))]
+
+
+def _compact_result(message, elapsed):
+    calls = [c for c in (getattr(message, "tool_calls", None) or []) if c.get("name") == ExtractedSlots.__name__]
+    try:
+        if not calls:
+            raise ValueError("no ExtractedSlots tool call in the reply")
+        parsed = ExtractedSlots.model_validate(calls[0]["args"])
+    except (ValueError, ValidationError) as e:
+        _record("compact", elapsed, message, valid=False)
+        print("⚠️ Compact extraction failed validation, using the full prompt:", e)
+        return None
+    _record("compact", elapsed, message)
+    return parsed.model_dump()
+
+
+def _deadline_of(llm):
+    # ResilientLLM exposes its deadline; a bare client gets no shared deadline
+    return getattr(llm, "deadline", None)
+
+
+def compact_extractor(llm, conversation_history):
+    with llm_deadline(_deadline_of(llm)):  # the full-prompt retry gets only the time left
+        start = time.perf_counter()
+        message = _structured(llm).invoke(_compact_messages(conversation_history))
+        extracted = _compact_result(message, time.perf_counter() - start)
+        return extracted if extracted is not None else extractor(llm, conversation_history)
+
+
+async def acompact_extractor(llm, conversation_history):
+    with llm_deadline(_deadline_of(llm)):
+        start = time.perf_counter()
+        message = await _structured(llm).ainvoke(_compact_messages(conversation_history))
+        extracted = _compact_result(message, time.perf_counter() - start)
+        return extracted if extracted is not None else await aextractor(llm, conversation_history)
+
+
+def extract_with_llm(llm, conversation_history, mode=EXTRACTION_MODE):
+    """LLM slot extraction in the configured mode: 'compact' or 'full'."""
+    if mode == "compact":
+        return compact_extractor(llm, conversation_history)
+    return extractor(llm, conversation_history)
+
+
+async def aextract_with_llm(llm, conversation_history, mode=EXTRACTION_MODE):
+    if mode == "compact":
+        return await acompact_extractor(llm, conversation_history)
+    return await aextractor(llm, conversation_history)
+
+
+# ------------------- 🧾 TOKEN ACCOUNTING -------------------
+
+_mode_lock = threading.Lock()
+_mode_stats: Dict[str, Dict[str, float]] = {}
+
+
+def _usage(message) -> Dict[str, int]:
+    usage = getattr(message, "usage_metadata", None) or {}
+    if not usage:
+        # Older clients only report OpenAI-style counts in response_metadata
+        token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+        usage = {"input_tokens": token_usage.get("prompt_tokens", 0),
+                 "output_tokens": token_usage.get("completion_tokens", 0)}
+    return {"input_tokens": int(usage.get("input_tokens") or 0), "output_tokens": int(usage.get("output_tokens") or 0)}
+
+
+def _record(mode, seconds, message, valid=True):
+    usage = _usage(message)
+    record_llm_call(mode, seconds, usage["input_tokens"], usage["output_tokens"])
+    with _mode_lock:
+        stats = _mode_stats.setdefault(mode, {"calls": 0, "invalid": 0, "seconds": 0.0,
+                                              "input_tokens": 0, "output_tokens": 0})
+        stats["calls"] += 1
+        stats["invalid"] += not valid
+        stats["seconds"] += seconds
+        stats["input_tokens"] += usage["input_tokens"]
+        stats["output_tokens"] += usage["output_tokens"]
+
+
+def get_extraction_mode_stats() -> Dict[str, Any]:
+    """Per mode: calls, invalid replies, average latency and tokens per call."""
+    with _mode_lock:
+        return {
+            mode: {
+                "calls": int(s["calls"]),
+                "invalid": int(s["invalid"]),
+                "avg_ms": round(s["seconds"] / s["calls"] * 1000.0, 1),
+                "avg_input_tokens": round(s["input_tokens"] / s["calls"], 1),
+                "avg_output_tokens": round(s["output_tokens"] / s["calls"], 1),
+            }
+            for mode, s in _mode_stats.items()
+        }
+
+
 
 
 # import json
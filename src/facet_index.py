@@ -0,0 +1,104 @@
+import time
+from functools import reduce
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from qdrant_client.http import models
+
+from src.vocabulary import NORM_FIELDS
+
+# ------------------- 🗂️ CATEGORICAL FACET INDEX -------------------
+# In-memory postings for the browse endpoints: for every value of a facet field
+# a sorted int32 array of row positions (rows are in point-id order, the same
+# order Qdrant scroll returns). A filter combination is a union over the
+# accepted values of each field followed by an intersection across fields,
+# which gives exact totals and O(1) access to any page; only the page's
+# payloads are then fetched from the search backend.
+
+# Canonical fields written at ingestion (article_type_norm, colour_norm, gender_norm)
+FACET_FIELDS = tuple(NORM_FIELDS)
+
+
+class FacetIndex:
+    def __init__(self, point_ids: List[Any], postings: Dict[str, Dict[Any, np.ndarray]]):
+        self.point_ids = point_ids
+        self.postings = postings
+        self.built_at = time.time()
+        self.catalog_version = None  # catalog version when this index was built
+        self.catalog_stamp = None    # full version stamp (version, updated_at) for HTTP validators
+
+    @classmethod
+    def build(cls, client, collection_name: str, fields: Sequence[str] = FACET_FIELDS,
+              batch_size: int = 1000) -> "FacetIndex":
+        """Scroll the whole collection (facet fields only) and build the postings."""
+        started = time.monotonic()
+        point_ids: List[Any] = []
+        values: Dict[str, List[Any]] = {field: [] for field in fields}
+        next_offset = None
+
+        while True:
+            points, next_offset = client.scroll(
+                collection_name=collection_name,
+                with_payload=models.PayloadSelectorInclude(include=list(fields)),
+                with_vectors=False,
+                limit=batch_size,
+                offset=next_offset,
+            )
+            for p in points:
+                payload = p.payload or {}
+                point_ids.append(p.id)
+                for field in fields:
+                    values[field].append(payload.get(field))
+            if not next_offset:
+                break
+
+        postings: Dict[str, Dict[Any, np.ndarray]] = {}
+        for field in fields:
+            rows_by_value: Dict[Any, List[int]] = {}
+            for row, value in enumerate(values[field]):
+                if value is not None:
+                    rows_by_value.setdefault(value, []).append(row)
+            postings[field] = {v: np.asarray(rows, dtype=np.int32) for v, rows in rows_by_value.items()}
+
+        index = cls(point_ids, postings)
+        print(f"🗂️ Facet index built: {len(point_ids)} points, "
+              + ", ".join(f"{f}={len(postings[f])} values" for f in fields)
+              + f" in {time.monotonic() - started:.2f}s")
+        return index
+
+    def _rows_for(self, field: str, accepted: Sequence[Any]) -> np.ndarray:
+        lists = [self.postings[field][v] for v in accepted if v in self.postings[field]]
+        if not lists:
+            return np.empty(0, dtype=np.int32)
+        if len(lists) == 1:
+            return lists[0]
+        return np.unique(np.concatenate(lists))
+
+    def lookup(self, filters: Dict[str, Optional[Sequence[Any]]]) -> np.ndarray:
+        """
+        Sorted row positions matching every field in `filters`
+        (field -> accepted values; None / empty means unfiltered).
+        """
+        selected = [self._rows_for(field, accepted) for field, accepted in filters.items() if accepted]
+        if not selected:
+            return np.arange(len(self.point_ids), dtype=np.int32)
+        selected.sort(key=len)  # intersect smallest first
+        return reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), selected)
+
+    def page(self, filters: Dict[str, Optional[Sequence[Any]]], limit: int, offset: int = 0) -> Dict[str, Any]:
+        """Point ids for one page plus the exact total for the filter combination."""
+        rows = self.lookup(filters)
+        page_rows = rows[offset:offset + limit]
+        return {
+            "point_ids": [self.point_ids[int(r)] for r in page_rows],
+            "total": int(rows.size),
+            "next_offset": offset + limit if offset + limit < rows.size else None,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "points": len(self.point_ids),
+            "values": {field: len(values) for field, values in self.postings.items()},
+            "age_seconds": round(time.time() - self.built_at, 1),
+            "catalog_version": self.catalog_version,
+        }
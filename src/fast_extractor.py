@@ -0,0 +1,213 @@
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import FAST_EXTRACTOR_MAX_WORDS
+from src.vocabulary import CATEGORIES, CATEGORY_BY_INDIVIDUAL, CATEGORY_SYNONYMS, COLOUR_ALIASES, COLOURS
+from src.vocabulary import GENDER_ALIASES, GENDERS, INDIVIDUAL_CATEGORY_SYNONYMS, NEGATIONS, WOMEN_ONLY_INDIVIDUAL
+
+# ------------------- ⚡ FAST-PATH SLOT EXTRACTION -------------------
+# Resolves the extractor() slots locally for queries that are plain
+# combinations of the closed vocabularies ("red kurti", "navy blue jeans for
+# men"). Phrases are matched with a token trie compiled once at import, longest
+# phrase first. Anything missing or ambiguous returns None so the caller falls
+# through to the LLM:
+#   - no individual category, or more than one
+#   - more than one colour / gender / category, or a gender the LLM can't output
+#   - neither colour nor gender (stated or implied)
+#   - negations ("not red", "without embroidery"), colour words outside the
+#     prompt's list ("crimson", "dark", "floral") and long conversational queries
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9'&-]*")
+# Colour words outside the prompt's list: the LLM maps them ("crimson" -> Red), we can't
+UNLISTED_COLOURS = {
+    "crimson", "scarlet", "wine", "golden", "emerald", "indigo", "ivory", "lilac", "aqua", "tan",
+    "mint", "sky", "bottle", "dark", "light", "pastel", "neon", "printed", "floral",
+}
+
+SLOT_FIELDS = ["Category", "Individual_category", "category_by_Gender", "colour"]
+
+
+class PhraseMatcher:
+    """Token trie over phrases; match() emits the longest phrase at each position."""
+
+    _END = None  # key of the (field, value) stored on a phrase's last node
+
+    def __init__(self):
+        self._root: Dict[Any, Any] = {}
+
+    def add(self, phrase: str, field: str, value: str) -> None:
+        node = self._root
+        for word in _WORD.findall(phrase.lower()):
+            node = node.setdefault(word, {})
+        node[self._END] = (field, value)
+
+    def match(self, words: List[str]) -> List[Tuple[str, str]]:
+        found = []
+        i = 0
+        while i < len(words):
+            node, j, best = self._root, i, None
+            while j < len(words) and words[j] in node:
+                node = node[words[j]]
+                j += 1
+                if self._END in node:
+                    best = (j, node[self._END])
+            if best is None:
+                i += 1
+            else:
+                i = best[0]
+                found.append(best[1])
+        return found
+
+
+def _build_matcher() -> PhraseMatcher:
+    matcher = PhraseMatcher()
+    for value in CATEGORIES:
+        matcher.add(value, "Category", value)
+    for value, spellings in CATEGORY_SYNONYMS.items():
+        for spelling in spellings:
+            matcher.add(spelling, "Category", value)
+    for value, spellings in INDIVIDUAL_CATEGORY_SYNONYMS.items():
+        for spelling in [value] + spellings:
+            matcher.add(spelling, "Individual_category", value)
+    for value, spellings in GENDER_ALIASES.items():
+        # girls / boys / unisex are kept so they make the query ambiguous, not ignored
+        label = next((g for g in GENDERS if g.lower() == value), value)
+        for spelling in [value] + spellings:
+            matcher.add(spelling, "category_by_Gender", label)
+    by_lower = {c.lower(): c for c in COLOURS}
+    for value in COLOURS:
+        matcher.add(value, "colour", value)
+    for canonical, spellings in COLOUR_ALIASES.items():
+        if canonical in by_lower:
+            for spelling in spellings:
+                matcher.add(spelling, "colour", by_lower[canonical])
+    return matcher
+
+
+_matcher = _build_matcher()
+
+
+def match_slots(query: str) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    (slots, reason): slots in extractor() format when the query is unambiguous,
+    else (None, why it falls through to the LLM).
+    """
+    words = _WORD.findall(str(query).lower())
+    if not words:
+        return None, "empty"
+    if len(words) > FAST_EXTRACTOR_MAX_WORDS:
+        return None, "too_long"
+    if NEGATIONS.intersection(words):
+        return None, "negation"
+    if UNLISTED_COLOURS.intersection(words):
+        return None, "unlisted_colour"
+
+    found = _find(words)
+    for field in SLOT_FIELDS:
+        if len(found[field]) > 1:
+            return None, f"ambiguous_{field.lower()}"
+    if not found["Individual_category"]:
+        return None, "missing_individual_category"
+    if found["category_by_Gender"] and found["category_by_Gender"][0] not in GENDERS:
+        return None, "unsupported_gender"
+
+    individual = found["Individual_category"][0]
+    gender = found["category_by_Gender"][0] if found["category_by_Gender"] else None
+    if gender is None and individual in WOMEN_ONLY_INDIVIDUAL:
+        gender = "Women"
+    colour = found["colour"][0] if found["colour"] else None
+    if gender is None and colour is None:
+        return None, "missing_colour_and_gender"
+
+    category = found["Category"][0] if found["Category"] else CATEGORY_BY_INDIVIDUAL[individual]
+    return _slots(category, individual, gender, colour), "resolved"
+
+
+def _find(words: List[str]) -> Dict[str, List[str]]:
+    found = {field: [] for field in SLOT_FIELDS}
+    for field, value in _matcher.match(words):
+        if value not in found[field]:
+            found[field].append(value)
+    return found
+
+
+def _slots(category, individual, gender, colour) -> Dict[str, Any]:
+    described = " ".join(v for v in (colour and colour.lower(), individual.replace("-", " ")) if v)
+    return {
+        "Category": category,
+        "Individual_category": individual,
+        "category_by_Gender": gender or "NA",
+        "colour": colour or "NA",
+        "MOVE_ON": True,
+        "FOLLOW_UP_MESSAGE": f"Searching for {described}" + (f" for {gender.lower()}." if gender else "."),
+    }
+
+
+def best_effort_slots(query: str) -> Dict[str, Any]:
+    """
+    Lenient match_slots() for when the LLM is unavailable: the first value of
+    each slot wins, kids' genders map to Women / Men, negated colours are
+    dropped, and a query without a product type gets MOVE_ON false with a
+    request for more details.
+    """
+    words = _WORD.findall(str(query).lower())
+    found = _find(words)
+    if NEGATIONS.intersection(words):
+        found["colour"] = []  # "not red": a colour filter would do more harm than none
+    if not found["Individual_category"]:
+        return {
+            "Category": found["Category"][0] if found["Category"] else "NA",
+            "Individual_category": "NA",
+            "category_by_Gender": "NA",
+            "colour": found["colour"][0] if found["colour"] else "NA",
+            "MOVE_ON": False,
+            "FOLLOW_UP_MESSAGE": "Which product are you looking for (kurti, saree, jeans...)? "
+                                 "Adding a colour or gender helps too.",
+        }
+
+    individual = found["Individual_category"][0]
+    gender = found["category_by_Gender"][0] if found["category_by_Gender"] else None
+    gender = {"girls": "Women", "boys": "Men"}.get(gender, gender)
+    if gender not in GENDERS:
+        gender = None
+    if gender is None and individual in WOMEN_ONLY_INDIVIDUAL:
+        gender = "Women"
+    category = found["Category"][0] if found["Category"] else CATEGORY_BY_INDIVIDUAL[individual]
+    colour = found["colour"][0] if found["colour"] else None
+    return _slots(category, individual, gender, colour)
+
+
+# ------------------- 📊 COVERAGE -------------------
+
+_stats_lock = threading.Lock()
+_stats = {"attempts": 0, "resolved": 0, "total_us": 0.0}
+_fallthrough: Dict[str, int] = {}
+
+
+def fast_extract(query: str) -> Optional[Dict[str, Any]]:
+    """match_slots() with coverage counters; None means ask the LLM."""
+    start = time.perf_counter()
+    slots, reason = match_slots(query)
+    elapsed_us = (time.perf_counter() - start) * 1e6
+    with _stats_lock:
+        _stats["attempts"] += 1
+        _stats["total_us"] += elapsed_us
+        if slots is None:
+            _fallthrough[reason] = _fallthrough.get(reason, 0) + 1
+        else:
+            _stats["resolved"] += 1
+    return slots
+
+
+def get_fast_extractor_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        attempts = _stats["attempts"]
+        return {
+            "attempts": attempts,
+            "resolved": _stats["resolved"],
+            "coverage_rate": round(_stats["resolved"] / attempts, 4) if attempts else 0.0,
+            "avg_us": round(_stats["total_us"] / attempts, 1) if attempts else 0.0,
+            "fallthrough": dict(_fallthrough),
+        }
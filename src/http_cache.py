@@ -0,0 +1,80 @@
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import g, make_response, request
+
+from src.catalog_version import get_catalog_version
+
+# ------------------- 🧾 HTTP CONDITIONAL CACHING -------------------
+# Responses that only change when the catalog changes get a weak ETag derived
+# from (catalog version, path, query string) plus Last-Modified from the
+# version stamp. A request whose validator still matches is answered with 304
+# before the view runs, so it never reaches the search backend. A view served
+# from an older snapshot (e.g. a facet index still rebuilding after a bump)
+# reports that stamp via served_catalog_version(), so its validators describe
+# the data actually sent.
+
+
+def _etag_for(version: str) -> str:
+    digest = hashlib.sha1()
+    digest.update(version.encode())
+    digest.update(request.path.encode())
+    digest.update(b"?" + "&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True))).encode())
+    return digest.hexdigest()[:32]
+
+
+def _validators(stamp):
+    etag = _etag_for(str(stamp["version"]))
+    last_modified = datetime.fromtimestamp(int(stamp["updated_at"]), tz=timezone.utc)
+    return etag, last_modified
+
+
+def served_catalog_version(stamp) -> None:
+    """Record the catalog stamp the current response was built from (None = current)."""
+    if stamp is not None:
+        g.served_catalog_version = stamp
+
+
+def _apply_validators(response, etag, last_modified, max_age, public):
+    response.set_etag(etag, weak=True)
+    response.last_modified = last_modified
+    if public:
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+    return response
+
+
+def cached_by_catalog_version(max_age: int = 0, public: bool = True):
+    """
+    Decorate a GET JSON view whose output depends only on the URL and the catalog.
+    (POST responses are not revalidated by browsers or proxies; don't use it there.)
+    - max_age: seconds shared caches / browsers may reuse it without revalidating.
+    - public: False for per-user endpoints (private, always revalidate).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag, last_modified = _validators(get_catalog_version())
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                since = request.if_modified_since
+                not_modified = since is not None and last_modified <= since
+
+            if not_modified:
+                return _apply_validators(make_response("", 304), etag, last_modified, max_age, public)
+
+            response = make_response(view(*args, **kwargs))
+            served = g.pop("served_catalog_version", None)
+            if served is not None:
+                etag, last_modified = _validators(served)
+            if response.status_code == 200:
+                _apply_validators(response, etag, last_modified, max_age, public)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,292 @@
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from qdrant_client.http import models
+
+from src.catalog_version import bump_catalog_version
+from src.vocabulary import NORM_FIELDS
+
+# ------------------- 💾 LOCAL SERVING ENGINE -------------------
+# In-process replacement for the subset of QdrantClient that searcher uses
+# (search_batch / scroll / retrieve / get_collections), answering queries from
+# an exported snapshot instead of the network:
+#
+#   <dir>/vectors.npy     float32 [N, dim], L2-normalized, memory-mapped
+#   <dir>/point_ids.json  Qdrant point ids, row-aligned with vectors
+#   <dir>/payloads.jsonl  one payload per row
+#
+# Filters are the same models.Filter objects sent to Qdrant: must / should /
+# must_not over MatchValue / MatchAny keyword conditions, evaluated as
+# vectorized masks over per-field code columns. Semantics follow Qdrant's:
+# a list-valued field matches if any element does, a missing field never
+# matches, and an empty should list is no constraint.
+
+# Payload fields turned into integer code columns for vectorized filtering
+INDEXED_FIELDS = NORM_FIELDS + ["articleType", "baseColour", "gender", "masterCategory", "subCategory"]
+
+
+class LocalIndex:
+    def __init__(self, vectors: np.ndarray, point_ids: List[Any], payloads: List[Dict[str, Any]],
+                 indexed_fields: Sequence[str] = INDEXED_FIELDS):
+        if len(vectors) != len(point_ids) or len(point_ids) != len(payloads):
+            raise ValueError("❌ Mismatch between vectors, point ids and payloads in snapshot")
+
+        self.vectors = vectors
+        self.point_ids = point_ids
+        self.payloads = payloads
+        self._row_of = {pid: row for row, pid in enumerate(point_ids)}
+
+        # field -> (codes[N], {value: code})
+        self._columns: Dict[str, tuple] = {}
+        for field in indexed_fields:
+            self._columns[field] = self._build_column(field)
+
+    @classmethod
+    def load(cls, snapshot_dir: str) -> "LocalIndex":
+        print(f"💾 Loading local index from {snapshot_dir}...")
+        vectors = np.load(os.path.join(snapshot_dir, "vectors.npy"), mmap_mode="r")
+        with open(os.path.join(snapshot_dir, "point_ids.json")) as f:
+            point_ids = json.load(f)
+        with open(os.path.join(snapshot_dir, "payloads.jsonl")) as f:
+            payloads = [json.loads(line) for line in f if line.strip()]
+        index = cls(vectors, point_ids, payloads)
+        print(f"✅ Local index ready: {len(point_ids)} points, dim={vectors.shape[1]}")
+        return index
+
+    def _build_column(self, field: str) -> tuple:
+        vocab: Dict[Any, int] = {}
+        codes = np.empty(len(self.payloads), dtype=np.int32)
+        for row, payload in enumerate(self.payloads):
+            value = payload.get(field)
+            codes[row] = -1 if value is None else vocab.setdefault(value, len(vocab))
+        return codes, vocab
+
+    # ---------- filter evaluation ----------
+
+    def filter_mask(self, flt: Optional[models.Filter]) -> Optional[np.ndarray]:
+        """Boolean row mask for `flt`, or None when there is nothing to filter on."""
+        if flt is None or not (flt.must or flt.should or flt.must_not):
+            return None
+
+        mask = np.ones(len(self.point_ids), dtype=bool)
+        for cond in flt.must or []:
+            mask &= self._condition_mask(cond)
+        if flt.should:
+            any_should = np.zeros(len(self.point_ids), dtype=bool)
+            for cond in flt.should:
+                any_should |= self._condition_mask(cond)
+            mask &= any_should
+        for cond in flt.must_not or []:
+            mask &= ~self._condition_mask(cond)
+        return mask
+
+    def _condition_mask(self, cond) -> np.ndarray:
+        if isinstance(cond, models.Filter):
+            nested = self.filter_mask(cond)
+            return np.ones(len(self.point_ids), dtype=bool) if nested is None else nested
+
+        values = _match_values(cond)
+        if cond.key in self._columns:
+            codes, vocab = self._columns[cond.key]
+            wanted = [vocab[v] for v in values if v in vocab]
+            if not wanted:
+                return np.zeros(len(self.point_ids), dtype=bool)
+            return np.isin(codes, wanted)
+
+        # Non-indexed field (possibly list-valued): evaluate row by row
+        return np.fromiter(
+            (_payload_condition(p, cond) for p in self.payloads), dtype=bool, count=len(self.payloads)
+        )
+
+    # ---------- QdrantClient-compatible API ----------
+
+    def search(self, query_vector, limit: int = 10, query_filter: Optional[models.Filter] = None,
+               with_payload=True, score_threshold: Optional[float] = None, offset: int = 0,
+               **kwargs) -> List[models.ScoredPoint]:
+        query = np.array(query_vector, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+
+        mask = self.filter_mask(query_filter)
+        if mask is None:
+            rows = None
+            scores = self.vectors @ query
+        else:
+            rows = np.flatnonzero(mask)
+            if rows.size == 0:
+                return []
+            scores = self.vectors[rows] @ query
+
+        wanted = min(offset + limit, scores.shape[0])
+        if wanted <= 0:
+            return []
+        top = np.argpartition(-scores, wanted - 1)[:wanted]
+        top = top[np.argsort(-scores[top], kind="stable")][offset:]
+
+        hits = []
+        for i in top:
+            score = float(scores[i])
+            if score_threshold is not None and score < score_threshold:
+                break
+            row = int(i) if rows is None else int(rows[i])
+            hits.append(models.ScoredPoint(
+                id=self.point_ids[row],
+                version=0,
+                score=score,
+                payload=self._select_payload(self.payloads[row], with_payload),
+                vector=None,
+            ))
+        return hits
+
+    def search_batch(self, collection_name: str = None, requests: Sequence[models.SearchRequest] = (),
+                     **kwargs) -> List[List[models.ScoredPoint]]:
+        return [
+            self.search(
+                query_vector=req.vector,
+                limit=req.limit,
+                query_filter=req.filter,
+                with_payload=req.with_payload if req.with_payload is not None else False,
+                score_threshold=req.score_threshold,
+                offset=req.offset or 0,
+            )
+            for req in requests
+        ]
+
+    def scroll(self, collection_name: str = None, scroll_filter: Optional[models.Filter] = None,
+               limit: int = 10, offset: Any = None, with_payload=True, with_vectors=False, **kwargs):
+        mask = self.filter_mask(scroll_filter)
+        rows = np.arange(len(self.point_ids)) if mask is None else np.flatnonzero(mask)
+
+        # Qdrant scroll offsets are point ids; rows are kept in point-id order.
+        # Offsets echoed back through query strings arrive as text.
+        if isinstance(offset, str) and offset.isdigit():
+            offset = int(offset)
+        if offset is not None:
+            start = self._row_of.get(offset)
+            if start is None:
+                return [], None
+            rows = rows[np.searchsorted(rows, start):]
+
+        page, rest = rows[:limit], rows[limit:limit + 1]
+        records = [
+            models.Record(
+                id=self.point_ids[row],
+                payload=self._select_payload(self.payloads[row], with_payload),
+                vector=None,
+            )
+            for row in page
+        ]
+        next_offset = self.point_ids[int(rest[0])] if rest.size else None
+        return records, next_offset
+
+    def retrieve(self, collection_name: str = None, ids: Sequence[Any] = (), with_payload=True,
+                 with_vectors=False, **kwargs) -> List[models.Record]:
+        return [
+            models.Record(
+                id=pid,
+                payload=self._select_payload(self.payloads[self._row_of[pid]], with_payload),
+                vector=None,
+            )
+            for pid in ids
+            if pid in self._row_of
+        ]
+
+    def get_collections(self):
+        return {"collections": [{"name": "local_index", "points_count": len(self.point_ids)}]}
+
+    @staticmethod
+    def _select_payload(payload: Dict[str, Any], with_payload) -> Optional[Dict[str, Any]]:
+        # Always return a copy: callers annotate payloads (e.g. with "score")
+        if with_payload is True:
+            return dict(payload)
+        if not with_payload:
+            return None
+        include = getattr(with_payload, "include", with_payload)
+        return {k: payload[k] for k in include if k in payload}
+
+
+def _match_values(cond) -> List[Any]:
+    """Accepted values of a keyword FieldCondition (MatchValue / MatchAny)."""
+    if not isinstance(cond, models.FieldCondition) or cond.match is None:
+        raise NotImplementedError(f"Local index does not support condition: {cond!r}")
+    if isinstance(cond.match, models.MatchValue):
+        return [cond.match.value]
+    if isinstance(cond.match, models.MatchAny):
+        return list(cond.match.any)
+    raise NotImplementedError(f"Local index does not support match: {cond.match!r}")
+
+
+def payload_matches(payload: Dict[str, Any], flt: Optional[models.Filter]) -> bool:
+    """Evaluate `flt` against a single payload, with the same semantics as filter_mask."""
+    if flt is None:
+        return True
+    if not all(_payload_condition(payload, cond) for cond in flt.must or []):
+        return False
+    if flt.should and not any(_payload_condition(payload, cond) for cond in flt.should):
+        return False
+    return not any(_payload_condition(payload, cond) for cond in flt.must_not or [])
+
+
+def _payload_condition(payload: Dict[str, Any], cond) -> bool:
+    if isinstance(cond, models.Filter):
+        return payload_matches(payload, cond)
+    value = payload.get(cond.key)
+    wanted = _match_values(cond)
+    if isinstance(value, list):
+        return any(v in wanted for v in value)
+    return value in wanted
+
+
+# ------------------- 📤 SNAPSHOT EXPORT -------------------
+
+def export_snapshot(client, collection_name: str, out_dir: str, batch_size: int = 1000) -> int:
+    """
+    Dump every point of `collection_name` (vector + payload) into a snapshot
+    directory that LocalIndex.load() can serve. Returns the number of points.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    vectors, point_ids = [], []
+    next_offset = None
+
+    with open(os.path.join(out_dir, "payloads.jsonl"), "w") as payload_file:
+        while True:
+            points, next_offset = client.scroll(
+                collection_name=collection_name,
+                with_payload=True,
+                with_vectors=True,
+                limit=batch_size,
+                offset=next_offset,
+            )
+            for p in points:
+                point_ids.append(p.id)
+                vectors.append(p.vector)
+                payload_file.write(json.dumps(p.payload or {}) + "\n")
+            print(f"📤 Exported {len(point_ids)} points...")
+            if not next_offset:
+                break
+
+    matrix = np.asarray(vectors, dtype=np.float32)
+    matrix /= np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+    np.save(os.path.join(out_dir, "vectors.npy"), matrix)
+    with open(os.path.join(out_dir, "point_ids.json"), "w") as f:
+        json.dump(point_ids, f)
+
+    print(f"✅ Snapshot written to {out_dir} ({matrix.nbytes / 1e6:.1f} MB of vectors)")
+    bump_catalog_version("local index snapshot")
+    return len(point_ids)
+
+
+if __name__ == "__main__":
+    import sys
+    from qdrant_client import QdrantClient
+    from config import CLUSTER_URL, QDRANT_API_KEY, LOCAL_INDEX_DIR
+
+    if len(sys.argv) > 1 and sys.argv[1] == "export":
+        export_snapshot(
+            QdrantClient(url=CLUSTER_URL, api_key=QDRANT_API_KEY, timeout=60.0),
+            "my_collection",
+            sys.argv[2] if len(sys.argv) > 2 else LOCAL_INDEX_DIR,
+        )
+    else:
+        print("Usage: python -m src.local_index export [output_dir]")
@@ -0,0 +1,199 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict
+
+from flask import Response, g, has_request_context, request
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY
+    from prometheus_client import generate_latest, multiprocess
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:  # optional: stage timings still feed Server-Timing
+    Counter = Histogram = None
+
+# ------------------- 📈 METRICS -------------------
+# Prometheus histograms / counters for the /search pipeline, exposed on
+# /metrics together with the in-process stats() dicts (caches, batcher,
+# sessions, admission pools...). Every stage timed here is also appended to
+# the current request's Server-Timing header.
+#
+# Under gunicorn set PROMETHEUS_MULTIPROC_DIR so /metrics aggregates all workers.
+# Outside a Flask request (the ASGI /search) stages go to the list installed by
+# collect_stage_timings() instead of flask.g.
+
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RESULT_COUNT_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 150, 250)
+
+if Histogram is not None:
+    STAGE_SECONDS = Histogram(
+        "search_stage_seconds", "Time spent in each /search pipeline stage", ["stage"], buckets=STAGE_BUCKETS
+    )
+    REQUEST_SECONDS = Histogram(
+        "http_request_seconds", "End-to-end request latency", ["endpoint", "method", "status"], buckets=STAGE_BUCKETS
+    )
+    TIER_ANSWERED = Counter("search_tier_answered_total", "Fallback tier that produced the ranking", ["tier"])
+    RESULT_COUNT = Histogram("search_results_count", "Products in a search ranking", buckets=RESULT_COUNT_BUCKETS)
+    BACKEND_ERRORS = Counter(
+        "search_backend_errors_total", "Failed calls to external backends", ["backend", "operation"]
+    )
+    BACKEND_CALLS = Counter("search_backend_calls_total", "Calls to external backends", ["backend", "operation"])
+    SLOT_EXTRACTIONS = Counter("slot_extraction_total", "Where a query's slots came from", ["source"])
+    LLM_CALL_SECONDS = Histogram("llm_call_seconds", "LLM extraction call latency", ["mode"], buckets=STAGE_BUCKETS)
+    LLM_TOKENS = Counter("llm_tokens_total", "Tokens sent to / received from the LLM", ["mode", "direction"])
+    LLM_OUTCOMES = Counter("llm_calls_total", "LLM calls by outcome (success, error, deadline, rejected)", ["outcome"])
+    LLM_HEDGES = Counter("llm_hedged_requests_total", "Hedged second LLM requests fired / won", ["outcome"])
+    LLM_BREAKER_TRANSITIONS = Counter("llm_breaker_transitions_total", "LLM circuit breaker state changes", ["state"])
+
+
+_stage_timings: ContextVar = ContextVar("stage_timings", default=None)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    if Histogram is not None:
+        STAGE_SECONDS.labels(stage).observe(seconds)
+    if has_request_context():
+        g.setdefault("server_timing", []).append((stage, seconds))
+    else:
+        timings = _stage_timings.get()
+        if timings is not None:
+            timings.append((stage, seconds))
+
+
+def collect_stage_timings() -> list:
+    """Start collecting stage timings for the current (async) request; returns the list."""
+    timings = []
+    _stage_timings.set(timings)
+    return timings
+
+
+@contextmanager
+def stage_timer(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+@contextmanager
+def backend_call(backend: str, operation: str):
+    """Count a call to the LLM / Qdrant / encoder and whether it raised."""
+    if Histogram is not None:
+        BACKEND_CALLS.labels(backend, operation).inc()
+    try:
+        yield
+    except Exception:
+        if Histogram is not None:
+            BACKEND_ERRORS.labels(backend, operation).inc()
+        raise
+
+
+def observe_ranking(tier, count: int) -> None:
+    if Histogram is not None:
+        TIER_ANSWERED.labels(tier or "none").inc()
+        RESULT_COUNT.observe(count)
+
+
+def observe_extraction(source: str) -> None:
+    if Histogram is not None:
+        SLOT_EXTRACTIONS.labels(source).inc()
+
+
+def record_llm_call(mode: str, seconds: float, input_tokens: int, output_tokens: int) -> None:
+    if Histogram is not None:
+        LLM_CALL_SECONDS.labels(mode).observe(seconds)
+        LLM_TOKENS.labels(mode, "input").inc(input_tokens)
+        LLM_TOKENS.labels(mode, "output").inc(output_tokens)
+
+
+def observe_llm_outcome(outcome: str) -> None:
+    if Histogram is not None:
+        LLM_OUTCOMES.labels(outcome).inc()
+
+
+def observe_hedge(outcome: str) -> None:
+    if Histogram is not None:
+        LLM_HEDGES.labels(outcome).inc()
+
+
+def observe_breaker_transition(state: str) -> None:
+    if Histogram is not None:
+        LLM_BREAKER_TRANSITIONS.labels(state).inc()
+
+
+def server_timing_header(timings=None) -> str:
+    if timings is None:
+        timings = g.get("server_timing", [])
+    return ", ".join(f"{stage};dur={seconds * 1000.0:.1f}" for stage, seconds in timings)
+
+
+def finish_request(response_headers, endpoint: str, method: str, status: int, elapsed: float, timings=None) -> None:
+    """Observe request latency and set Server-Timing (stages + total) on the response."""
+    if Histogram is not None:
+        REQUEST_SECONDS.labels(endpoint, method, str(status)).observe(elapsed)
+    timing = server_timing_header(timings)
+    total = f"total;dur={elapsed * 1000.0:.1f}"
+    response_headers["Server-Timing"] = f"{timing}, {total}" if timing else total
+
+
+class StatsCollector:
+    """Exposes nested stats() dicts as gauges: app_<source>{key="a.b", pid="..."}."""
+
+    def __init__(self, sources: Dict[str, Callable[[], Dict[str, Any]]]):
+        self.sources = sources
+
+    def collect(self):
+        pid = str(os.getpid())
+        for source, fn in self.sources.items():
+            family = GaugeMetricFamily(f"app_{source}", f"In-process {source} stats", labels=["key", "pid"])
+            for key, value in _flatten(fn()):
+                family.add_metric([key, pid], float(value))
+            yield family
+
+
+def _flatten(stats, prefix=""):
+    for key, value in stats.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{name}.")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+        elif isinstance(value, bool):
+            yield name, int(value)
+
+
+def init_metrics(app, stats_sources: Dict[str, Callable[[], Dict[str, Any]]]):
+    """Request latency + Server-Timing hooks and the /metrics endpoint."""
+    stats_collector = StatsCollector(stats_sources)
+    multiprocess_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if Histogram is not None and not multiprocess_dir:
+        REGISTRY.register(stats_collector)
+
+    @app.before_request
+    def _start_request_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def _finish_request_timer(response):
+        start = g.get("request_start")
+        if start is None:
+            return response
+        finish_request(response.headers, request.endpoint or "unknown", request.method,
+                       response.status_code, time.perf_counter() - start)
+        return response
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        if Histogram is None:
+            return Response("prometheus_client is not installed\n", status=503, mimetype="text/plain")
+        registry = REGISTRY
+        if multiprocess_dir:
+            # Aggregate every worker's samples; in-process stats are this worker's only
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            registry.register(stats_collector)
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+    return metrics
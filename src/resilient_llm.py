@@ -0,0 +1,391 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+
+from config import LLM_DEADLINE, LLM_HEDGE, LLM_HEDGE_DEFAULT_DELAY, LLM_HEDGE_MIN_DELAY, LLM_HEDGE_PERCENTILE
+from config import LLM_LATENCY_WINDOW, LLM_WORKERS
+from config import LLM_BREAKER_WINDOW, LLM_BREAKER_MIN_CALLS, LLM_BREAKER_FAILURE_RATE, LLM_BREAKER_COOLDOWN
+from src.metrics import observe_breaker_transition, observe_hedge, observe_llm_outcome
+
+# ------------------- 🛡️ RESILIENT LLM CLIENT -------------------
+# Wraps the ChatGroq client (or anything with invoke / ainvoke) with:
+#
+#   deadline  - a call gives up after LLM_DEADLINE seconds (LLMDeadlineExceeded);
+#               calls inside llm_deadline() share one deadline, and every
+#               request's HTTP timeout is the time left, so nothing outlives it
+#   hedging   - if the first request hasn't answered by the recent p95 latency
+#               (or failed before that), an identical second request is sent;
+#               the first successful answer wins
+#   breaker   - after sustained failures (LLM_BREAKER_FAILURE_RATE of the last
+#               LLM_BREAKER_WINDOW calls) calls are refused for
+#               LLM_BREAKER_COOLDOWN seconds (CircuitOpenError), then one trial
+#               call decides whether to close it again; results of calls
+#               admitted before the last state change are ignored
+#
+# Callers catch LLMUnavailable and fall back to a local extraction
+# (src/slots.py), so a slow or failing Groq no longer hangs /search.
+
+
+class LLMUnavailable(Exception):
+    """The LLM did not answer: deadline, open circuit or request error."""
+
+
+class LLMDeadlineExceeded(LLMUnavailable):
+    pass
+
+
+class CircuitOpenError(LLMUnavailable):
+    pass
+
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Absolute time.monotonic() deadline shared by the calls inside llm_deadline()
+_shared_deadline: ContextVar = ContextVar("llm_deadline", default=None)
+
+
+@contextmanager
+def llm_deadline(seconds: Optional[float] = LLM_DEADLINE):
+    """
+    Give every LLM call in the block one common deadline (a nested block can
+    only shorten it), e.g. a compact attempt and its full-prompt retry.
+    """
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    outer = _shared_deadline.get()
+    token = _shared_deadline.set(deadline if outer is None else min(deadline, outer))
+    try:
+        yield
+    finally:
+        _shared_deadline.reset(token)
+
+
+class CircuitBreaker:
+    """
+    allow() hands out an admission token, (state, epoch), that the caller passes
+    back to record(). The epoch changes on every transition, so a call admitted
+    while CLOSED that finishes after the breaker opened (or while a half-open
+    trial runs) cannot decide the breaker's state: only the trial does.
+    """
+
+    def __init__(self, window: int = LLM_BREAKER_WINDOW, min_calls: int = LLM_BREAKER_MIN_CALLS,
+                 failure_rate: float = LLM_BREAKER_FAILURE_RATE, cooldown: float = LLM_BREAKER_COOLDOWN):
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self._epoch = 0
+        self._outcomes = deque(maxlen=window)  # True = success
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.opened = 0
+        self.stale_results = 0
+
+    def _transition(self, state: str) -> None:
+        if state != self.state:
+            self.state = state
+            self._epoch += 1
+            observe_breaker_transition(state)
+            print(f"🛡️ LLM circuit breaker {state}")
+
+    def allow(self) -> Optional[Tuple[str, int]]:
+        """Token if a call may go out now, else None. In half-open state only one trial at a time."""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self._transition(HALF_OPEN)
+            if self.state == CLOSED:
+                return CLOSED, self._epoch
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return HALF_OPEN, self._epoch
+            self.rejected += 1
+            return None
+
+    def record(self, token: Tuple[str, int], success: bool) -> None:
+        admitted_in, epoch = token
+        with self._lock:
+            if epoch != self._epoch:
+                self.stale_results += 1  # admitted before the last transition
+                return
+            if admitted_in == HALF_OPEN:
+                self._trial_running = False
+                if success:
+                    self._outcomes.clear()
+                    self._transition(CLOSED)
+                else:
+                    self._open()
+                return
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+                self._open()
+
+    def abandon(self, token: Tuple[str, int]) -> None:
+        """The admitted call ended without an outcome (e.g. cancelled): free the trial slot."""
+        admitted_in, epoch = token
+        with self._lock:
+            if admitted_in == HALF_OPEN and epoch == self._epoch:
+                self._trial_running = False
+
+    def _open(self) -> None:
+        self._opened_at = time.monotonic()
+        self.opened += 1
+        self._transition(OPEN)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = len(self._outcomes)
+            return {
+                "state": self.state,
+                "state_code": STATE_CODES[self.state],
+                "window_failure_rate": round(self._outcomes.count(False) / calls, 4) if calls else 0.0,
+                "opened": self.opened,
+                "rejected": self.rejected,
+                "stale_results": self.stale_results,
+            }
+
+
+class _Resilience:
+    """State shared by a client and the structured-output runnables derived from it."""
+
+    def __init__(self, deadline: float, hedge: bool):
+        self.deadline = deadline
+        self.hedge = hedge
+        self.breaker = CircuitBreaker()
+        self.latencies = deque(maxlen=LLM_LATENCY_WINDOW)  # seconds, successful attempts
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+        self.counts = {"success": 0, "error": 0, "deadline": 0, "rejected": 0}
+        self.hedges = {"fired": 0, "won": 0}
+
+    def pool(self) -> ThreadPoolExecutor:
+        # Threads don't survive fork(): one pool per worker process
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._pool = ThreadPoolExecutor(max_workers=LLM_WORKERS, thread_name_prefix="llm")
+                    self._pid = os.getpid()
+        return self._pool
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before the hedged request: p95 of recent latencies."""
+        if not self.hedge or self.breaker.state != CLOSED:
+            return None
+        with self._lock:
+            samples = sorted(self.latencies)
+        if len(samples) < 20:
+            delay = LLM_HEDGE_DEFAULT_DELAY
+        else:
+            delay = samples[min(len(samples) - 1, math.ceil(len(samples) * LLM_HEDGE_PERCENTILE / 100.0) - 1)]
+        delay = max(LLM_HEDGE_MIN_DELAY, delay)
+        return delay if delay < self.deadline else None
+
+    def count(self, outcome: str) -> None:
+        with self._lock:
+            self.counts[outcome] += 1
+        observe_llm_outcome(outcome)
+
+    def count_hedge(self, outcome: str) -> None:
+        with self._lock:
+            self.hedges[outcome] += 1
+        observe_hedge(outcome)
+
+    def record_latency(self, seconds: float) -> None:
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        delay = self.hedge_delay()
+        with self._lock:
+            fired = self.hedges["fired"]
+            return {
+                "deadline": self.deadline,
+                "hedge_delay": round(delay, 3) if delay is not None else None,
+                "calls": dict(self.counts),
+                "hedges": dict(self.hedges),
+                "hedge_win_rate": round(self.hedges["won"] / fired, 4) if fired else 0.0,
+                "breaker": self.breaker.stats(),
+            }
+
+
+class ResilientLLM:
+    """
+    Drop-in for the ChatGroq client in extractor(): invoke / ainvoke /
+    bind_tools / with_structured_output with a deadline, hedging and a circuit
+    breaker. Other attributes are passed through to the wrapped client.
+
+    - timeout_kwarg: keyword the wrapped client takes a per-request timeout in
+      (ChatGroq forwards `timeout` to the API call); None to not send one.
+    """
+
+    def __init__(self, llm, deadline: float = LLM_DEADLINE, hedge: bool = LLM_HEDGE,
+                 timeout_kwarg: Optional[str] = "timeout", _state: _Resilience = None):
+        self.llm = llm
+        self.timeout_kwarg = timeout_kwarg
+        self.state = _state or _Resilience(deadline, hedge)
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    @property
+    def deadline(self) -> float:
+        return self.state.deadline
+
+    def _derived(self, llm) -> "ResilientLLM":
+        return ResilientLLM(llm, timeout_kwarg=self.timeout_kwarg, _state=self.state)
+
+    def bind_tools(self, *args, **kwargs) -> "ResilientLLM":
+        return self._derived(self.llm.bind_tools(*args, **kwargs))
+
+    def with_structured_output(self, *args, **kwargs) -> "ResilientLLM":
+        # Note: the structured runnable does not forward call kwargs, so no per-request timeout
+        return ResilientLLM(self.llm.with_structured_output(*args, **kwargs), timeout_kwarg=None, _state=self.state)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.state.stats()
+
+    # ---------- calls ----------
+
+    def _start(self) -> Tuple[float, Tuple[str, int]]:
+        """(absolute deadline, breaker token) for a new call, or raise."""
+        deadline = time.monotonic() + self.state.deadline
+        shared = _shared_deadline.get()
+        if shared is not None:
+            deadline = min(deadline, shared)
+        if deadline <= time.monotonic():
+            self.state.count("deadline")
+            raise LLMDeadlineExceeded("LLM deadline already spent")
+        token = self.state.breaker.allow()
+        if token is None:
+            self.state.count("rejected")
+            raise CircuitOpenError("LLM circuit breaker is open")
+        return deadline, token
+
+    def _request_kwargs(self, deadline: float, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        # Each request may only use the time left, so no thread outlives the deadline
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMDeadlineExceeded("LLM deadline passed before the request was sent")
+        if self.timeout_kwarg is None:
+            return kwargs
+        return {**kwargs, self.timeout_kwarg: remaining}
+
+    def _timed(self, deadline, input, **kwargs):
+        kwargs = self._request_kwargs(deadline, kwargs)
+        start = time.perf_counter()
+        result = self.llm.invoke(input, **kwargs)
+        self.state.record_latency(time.perf_counter() - start)
+        return result
+
+    async def _atimed(self, deadline, input, **kwargs):
+        kwargs = self._request_kwargs(deadline, kwargs)
+        start = time.perf_counter()
+        result = await self.llm.ainvoke(input, **kwargs)
+        self.state.record_latency(time.perf_counter() - start)
+        return result
+
+    def _finish(self, token, outcome: str) -> None:
+        self.state.count(outcome)
+        self.state.breaker.record(token, outcome == "success")
+
+    def invoke(self, input, **kwargs):
+        deadline, token = self._start()
+        try:
+            return self._invoke(deadline, token, input, **kwargs)
+        finally:
+            self.state.breaker.abandon(token)  # no-op once the outcome was recorded
+
+    async def ainvoke(self, input, **kwargs):
+        deadline, token = self._start()
+        try:
+            return await self._ainvoke(deadline, token, input, **kwargs)
+        finally:
+            self.state.breaker.abandon(token)
+
+    def _invoke(self, deadline, token, input, **kwargs):
+        state = self.state
+        start = time.monotonic()
+        hedge_delay = state.hedge_delay()
+        hedge_at = start + hedge_delay if hedge_delay is not None and start + hedge_delay < deadline else None
+        pool = state.pool()
+        primary = pool.submit(self._timed, deadline, input, **kwargs)
+        pending = {primary}
+        error = None
+
+        while time.monotonic() < deadline:
+            timeout = min(hedge_at, deadline) if hedge_at is not None else deadline
+            done, pending = wait(pending, timeout=max(0.0, timeout - time.monotonic()), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not primary:
+                        state.count_hedge("won")
+                    self._finish(token, "success")
+                    return future.result()
+                error = future.exception()
+
+            if hedge_at is not None and (not pending or time.monotonic() >= hedge_at):
+                # Slower than recent p95, or failed fast: race / retry with an identical request
+                hedge_at = None
+                state.count_hedge("fired")
+                pending.add(pool.submit(self._timed, deadline, input, **kwargs))
+            elif not pending:
+                break
+
+        if pending or isinstance(error, LLMDeadlineExceeded):
+            # Still running past the deadline: their request timeout ends them shortly
+            self._finish(token, "deadline")
+            raise LLMDeadlineExceeded(f"LLM did not answer within {deadline - start:.1f}s")
+        self._finish(token, "error")
+        raise LLMUnavailable(f"LLM request failed: {error}") from error
+
+    async def _ainvoke(self, deadline, token, input, **kwargs):
+        state = self.state
+        start = time.monotonic()
+        hedge_delay = state.hedge_delay()
+        hedge_at = start + hedge_delay if hedge_delay is not None and start + hedge_delay < deadline else None
+        primary = asyncio.ensure_future(self._atimed(deadline, input, **kwargs))
+        pending = {primary}
+        error = None
+
+        try:
+            while time.monotonic() < deadline:
+                timeout = min(hedge_at, deadline) if hedge_at is not None else deadline
+                done, pending = await asyncio.wait(pending, timeout=max(0.0, timeout - time.monotonic()),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            state.count_hedge("won")
+                        self._finish(token, "success")
+                        return task.result()
+                    error = task.exception()
+
+                if hedge_at is not None and (not pending or time.monotonic() >= hedge_at):
+                    hedge_at = None
+                    state.count_hedge("fired")
+                    pending.add(asyncio.ensure_future(self._atimed(deadline, input, **kwargs)))
+                elif not pending:
+                    break
+        finally:
+            # Unlike threads, tasks can be cancelled: drop the losing / late requests
+            for task in pending:
+                task.cancel()
+
+        if pending or isinstance(error, LLMDeadlineExceeded):
+            self._finish(token, "deadline")
+            raise LLMDeadlineExceeded(f"LLM did not answer within {deadline - start:.1f}s")
+        self._finish(token, "error")
+        raise LLMUnavailable(f"LLM request failed: {error}") from error
@@ -1,23 +1,186 @@
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from config import CLUSTER_URL, COLLECTION_NAME, QDRANT_API_KEY
+from config import EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_TTL
+from config import EMBEDDING_BATCHING, EMBEDDING_BATCH_WINDOW_MS, EMBEDDING_MAX_BATCH_SIZE
+from config import SEARCH_ENGINE, LOCAL_INDEX_DIR
+from config import FACET_INDEX_ENABLED, FACET_INDEX_MAX_AGE
+from config import SPECULATIVE_SEARCH_LIMIT, SPECULATIVE_WORKERS
 from qdrant_client.models import Filter, FieldCondition, MatchValue, MinShould
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import os
+import threading
+import time
 import requests
 from qdrant_client.http import models
+from src.cache import TTLCache
+from src.embedding_batcher import EmbeddingBatcher
+from src.encoder import get_encoder, reset_encoders_after_fork
+from src.facet_index import FacetIndex
+from src.local_index import payload_matches
+from src.metrics import backend_call, record_stage, stage_timer
+from src.catalog_version import get_catalog_version
+from src.vocabulary import ARTICLE_TYPE_NORM, COLOUR_NORM, GENDER_NORM
+from src.vocabulary import normalize_article_type, normalize_article_types, normalize_colour, normalize_gender
 # Load environment variables
 load_dotenv()
 
-# Initialize Qdrant client
-client = QdrantClient(
-    url=CLUSTER_URL,
-    api_key=QDRANT_API_KEY
+# Qdrant client and the text encoder are created lazily on first use
+# (or by warmup()), so importing this module stays cheap.
+_client = None
+_async_client = None
+_init_lock = threading.Lock()
+_warmup_state = {"ready": False, "error": None}
+
+# Browse postings, built by warmup() and rebuilt in the background when stale
+_facet_index = None
+_facet_refresh_lock = threading.Lock()
+_facet_refresh_scheduled = False
+_facet_schedule_lock = threading.Lock()
+
+# Facet-index page offsets are "f:<row>", so they never collide with the
+# integer point ids the Qdrant scroll path hands out as next_offset
+FACET_OFFSET_PREFIX = "f:"
+
+
+def get_client():
+    """
+    Search backend: a QdrantClient, or with SEARCH_ENGINE = "local" an in-process
+    LocalIndex over an exported snapshot (same search_batch / scroll / retrieve API).
+    """
+    global _client
+    if _client is None:
+        with _init_lock:
+            if _client is None:
+                if SEARCH_ENGINE == "local":
+                    from src.local_index import LocalIndex
+
+                    _client = LocalIndex.load(LOCAL_INDEX_DIR)
+                else:
+                    _client = QdrantClient(
+                        url=CLUSTER_URL,
+                        api_key=QDRANT_API_KEY
+                    )
+    return _client
+
+
+def get_model():
+    # Backend (PyTorch or quantized ONNX) is picked by ENCODER_BACKEND
+    return get_encoder()
+
+
+# Query text -> embedding, shared by search_collection and generate_embedding
+embedding_cache = TTLCache(maxsize=EMBEDDING_CACHE_SIZE, ttl=EMBEDDING_CACHE_TTL)
+
+# Coalesces concurrent cache misses from request threads into one model.encode call
+embedding_batcher = EmbeddingBatcher(
+    lambda texts: get_model().encode(texts, show_progress_bar=False),
+    window_ms=EMBEDDING_BATCH_WINDOW_MS,
+    max_batch_size=EMBEDDING_MAX_BATCH_SIZE,
 )
 
-# SentenceTransformer model (768-dim)
-model = SentenceTransformer("all-MiniLM-L6-v2")
+# ------------------- 🔥 WARMUP / READINESS -------------------
+
+def warmup():
+    """
+    Load the model, run a dummy encode through the cold path and ping Qdrant.
+    Marks the process ready on success; safe to call more than once.
+    """
+    try:
+        print("🔥 Warming up embedding model and Qdrant client...")
+        get_model().encode(["warmup query"], show_progress_bar=False)
+        get_client().get_collections()
+        if FACET_INDEX_ENABLED:
+            refresh_facet_index()
+        _warmup_state["ready"] = True
+        _warmup_state["error"] = None
+        print("✅ Warmup complete, ready to serve.")
+    except Exception as e:
+        _warmup_state["ready"] = False
+        _warmup_state["error"] = str(e)
+        print(f"❌ Warmup failed: {e}")
+    return _warmup_state["ready"]
+
+
+def refresh_facet_index():
+    """(Re)build the browse facet index from the current catalog and swap it in."""
+    global _facet_index, _facet_refresh_scheduled
+    if not _facet_refresh_lock.acquire(blocking=False):
+        _facet_refresh_scheduled = False
+        return _facet_index  # a rebuild is already running
+    try:
+        stamp = get_catalog_version()
+        index = FacetIndex.build(get_client(), "my_collection")
+        index.catalog_version = stamp["version"]
+        index.catalog_stamp = stamp
+        _facet_index = index
+    except Exception as e:
+        print(f"❌ Facet index build failed: {e}")
+    finally:
+        _facet_refresh_scheduled = False
+        _facet_refresh_lock.release()
+    return _facet_index
+
+
+def _schedule_facet_refresh():
+    """Start one background rebuild; later callers see the flag and return."""
+    global _facet_refresh_scheduled
+    with _facet_schedule_lock:
+        if _facet_refresh_scheduled:
+            return
+        _facet_refresh_scheduled = True
+    threading.Thread(target=refresh_facet_index, name="facet-index", daemon=True).start()
+
+
+def get_facet_index():
+    """Current facet index (None until built); schedules a rebuild once it is stale."""
+    index = _facet_index
+    if index is not None and (
+        time.time() - index.built_at > FACET_INDEX_MAX_AGE
+        or index.catalog_version != get_catalog_version()["version"]
+    ):
+        _schedule_facet_refresh()
+    return index
+
+
+def _facet_offset(offset) -> Optional[int]:
+    """Row position of a facet-index offset: 0 for the first page, None for a Qdrant scroll offset."""
+    if offset is None:
+        return 0
+    text = str(offset)
+    if text.startswith(FACET_OFFSET_PREFIX) and text[len(FACET_OFFSET_PREFIX):].isdigit():
+        return int(text[len(FACET_OFFSET_PREFIX):])
+    return None
+
+
+def get_facet_index_stats():
+    index = _facet_index
+    return index.stats() if index is not None else {"points": 0, "built": False}
+
+
+def reset_after_fork(num_threads=None):
+    """
+    Drop fork-unsafe state inherited from a preloading parent process.
+    The Qdrant client's connection pool is rebuilt lazily; the encoder keeps
+    its (copy-on-write shared) weights and only re-creates runtime state.
+    LocalIndex and the facet index are plain memory and stay shared.
+    """
+    global _client, _async_client, _speculation_pool
+    if isinstance(_client, QdrantClient):
+        _client = None
+    _async_client = None
+    _speculation_pool = ThreadPoolExecutor(max_workers=SPECULATIVE_WORKERS, thread_name_prefix="speculative-search")
+    reset_encoders_after_fork(num_threads)
+
+
+def is_ready():
+    return _warmup_state["ready"]
+
+
+def get_warmup_state():
+    return dict(_warmup_state)
 
 # ------------------- 🧠 CALL YOUR LLM -------------------
 
@@ -52,58 +215,58 @@ def call_llm_for_metadata(query_text):
 
 # ------------------- 🧠 GENERATE EMBEDDING -------------------
 
+def normalize_query(query_text):
+    """Cache key for a query: lowercased with whitespace collapsed."""
+    return " ".join(str(query_text).lower().split())
+
+
 def generate_embedding(query_text):
-    return model.encode(query_text).tolist()
+    key = normalize_query(query_text)
+    vector = embedding_cache.get(key)
+    if vector is None:
+        with stage_timer("encode"), backend_call("encoder", "encode"):
+            if EMBEDDING_BATCHING:
+                vector = embedding_batcher.encode(query_text)
+            else:
+                vector = get_model().encode(query_text).tolist()
+        embedding_cache.set(key, vector)
+    return vector
 
-# ------------------- 🔍 HYBRID SEARCH FUNCTION -------------------
-def search_collection(query_text, colour, individual_category, category, category_by_gender, top_k=50):
-    print(f"\n🔍 Incoming Filters - Colour: {colour}, Category: {category}, Individual: {individual_category}, Gender: {category_by_gender}")
-    
-    # Generate vector
-    try:
-        vector = model.encode(query_text).tolist()
-        print(f"📡 SentenceTransformer embedding generated. Vector length: {len(vector)}")
-    except Exception as e:
-        print(f"❌ Error generating embedding: {e}")
-        return []
 
-    # Map article types to database values
-    article_type_mapping = {
-        "saree": ["Saree", "saree", "Sarees", "sarees", "Sari", "sari"],
-        "kurtas": ["Kurtas", "kurtas", "Kurta", "kurta", "Kurta Sets", "kurta sets"],
-        "kurtis": ["Kurtis", "kurtis", "Kurti", "kurti"],
-        "jeans": ["Jeans", "jeans", "Jean", "jean"],
-        "skirts": ["Skirts", "skirts", "Skirt", "skirt"],
-        "tops": ["Tops", "tops", "Top", "top"],
-        "shorts": ["Shorts", "shorts", "Short", "short"],
-        "trousers": ["Trousers", "trousers", "Trouser", "trouser"],
-        "jumpsuit": ["Jumpsuit", "jumpsuit", "Jumpsuits", "jumpsuits"],
-        "ethnic-dresses": ["Dresses", "dresses", "Dress", "dress", "Ethnic Dresses", "ethnic dresses"],
-        "traditional-wear": ["Traditional", "traditional", "Ethnic", "ethnic", "Indian Wear", "indian wear"]
-    }
+def get_embedding_cache_stats():
+    return embedding_cache.stats()
 
+
+def get_embedding_batcher_stats():
+    return embedding_batcher.stats()
+
+# ------------------- 🔍 HYBRID SEARCH FUNCTION -------------------
+def _build_search_filters(colour, individual_category, category, category_by_gender):
+    """
+    Translate extracted slots into Qdrant conditions on the canonical facet fields.
+    Returns (must_filters, should_filters): colour + article type are required,
+    category + gender only boost.
+    """
     must_filters = []
     should_filters = []
     
     # Add colour filter if specified
-    if colour != "NA":
+    colour_norm = normalize_colour(colour)
+    if colour_norm:
+        must_filters.append(models.FieldCondition(
+            key=COLOUR_NORM,
+            match=models.MatchValue(value=colour_norm)
+        ))
+        print(f"🎨 Added colour filter: {colour_norm}")
+
+    # Add article type filter (spelling variants collapse to one canonical value)
+    article_type_norm = normalize_article_type(individual_category)
+    if article_type_norm:
         must_filters.append(models.FieldCondition(
-            key="baseColour",
-            match=models.MatchValue(value=colour)
+            key=ARTICLE_TYPE_NORM,
+            match=models.MatchValue(value=article_type_norm)
         ))
-        print(f"🎨 Added colour filter: {colour}")
-
-    # Add article type filter with mapping
-    if individual_category != "NA":
-        mapped_types = article_type_mapping.get(individual_category.lower(), [individual_category])
-        if mapped_types:
-            must_filters.append(models.FieldCondition(
-                key="articleType",
-                match=models.MatchAny(any=mapped_types)
-            ))
-            print(f"👕 Added article type filter: {mapped_types}")
-        else:
-            print(f"⚠️ No mapping found for article type: {individual_category}")
+        print(f"👕 Added article type filter: {article_type_norm}")
 
     # Add category filter as should (boosted but not required)
     if category != "NA":
@@ -114,186 +277,420 @@ def search_collection(query_text, colour, individual_category, category, categor
         print(f"🏷️ Added category filter: {category}")
     
     # Add gender filter as should (boosted but not required)
-    if category_by_gender != "NA":
+    gender_norm = normalize_gender(category_by_gender)
+    if gender_norm:
         should_filters.append(models.FieldCondition(
-            key="gender",
-            match=models.MatchValue(value=category_by_gender)
+            key=GENDER_NORM,
+            match=models.MatchValue(value=gender_norm)
         ))
-        print(f"👤 Added gender filter: {category_by_gender}")
+        print(f"👤 Added gender filter: {gender_norm}")
 
-    combined_filter = models.Filter(
-        must=must_filters,
-        should=should_filters,
-        must_not=[]
-    )
+    return must_filters, should_filters
 
-    print(f"🔍 Total filters: {len(must_filters)} must, {len(should_filters)} should")
-    print("📥 Performing hybrid search with filters...")
 
-    try:
-        search_result = client.search(
-            collection_name="my_collection",
-            query_vector=vector,
-            limit=top_k,
-            with_payload=True,
-            score_threshold=None,
-            query_filter=combined_filter
-        )
-    except Exception as e:
-        print(f"❌ Qdrant hybrid search failed: {e}")
-        search_result = []
-
-    results = []
-    seen_ids = set()
-
-    for item in search_result:
-        if item.payload is not None:
-            product_id = item.payload.get("id")
-            if product_id not in seen_ids:
-                result = item.payload
-                result["score"] = item.score
-                results.append(result)
-                seen_ids.add(product_id)
-
-    if results:
-        print(f"✅ Found {len(results)} products with hybrid search.")
-        # Sort by relevance score and return top results
-        results.sort(key=lambda x: x.get("score", 0), reverse=True)
-        return results[:top_k]
-
-    # 🔁 Fallback: Try with only essential filters (colour + article type)
-    print("⚠️ No matching products found with all filters. Trying with essential filters...")
-    essential_filters = []
-    
-    if colour != "NA":
-        essential_filters.append(models.FieldCondition(
-            key="baseColour",
-            match=models.MatchValue(value=colour)
-        ))
-    
-    if individual_category != "NA":
-        mapped_types = article_type_mapping.get(individual_category.lower(), [individual_category])
-        if mapped_types:
-            essential_filters.append(models.FieldCondition(
-                key="articleType",
-                match=models.MatchAny(any=mapped_types)
-            ))
-    
-    if essential_filters:
-        try:
-            fallback_result = client.search(
-                collection_name="my_collection",
-                query_vector=vector,
-                limit=top_k,
-                with_payload=True,
-                score_threshold=None,
-                query_filter=models.Filter(must=essential_filters)
-            )
-            
-            for item in fallback_result:
-                if item.payload is not None:
-                    product_id = item.payload.get("id")
-                    if product_id not in seen_ids:
-                        result = item.payload
-                        result["score"] = item.score
-                        results.append(result)
-                        seen_ids.add(product_id)
-            
-            if results:
-                print(f"🔁 Essential filters found {len(results)} products.")
-                results.sort(key=lambda x: x.get("score", 0), reverse=True)
-                return results[:top_k]
-        except Exception as e:
-            print(f"❌ Essential filters search failed: {e}")
-
-    # 🔄 Final fallback: vector-only search with relevance scoring
-    print("🔄 No products found with filters. Using vector-only search...")
-    try:
-        final_fallback = client.search(
-            collection_name="my_collection",
-            query_vector=vector,
-            limit=top_k * 2,  # Get more results for better selection
-            with_payload=True,
-            score_threshold=None
-        )
-        
-        # Filter results to prioritize products that might be related
-        for item in final_fallback:
+def _plan_search_tiers(must_filters, should_filters, top_k):
+    """
+    Fallback cascade, highest priority first, as (tier_name, filter, limit):
+      1. hybrid    - all filters
+      2. essential - colour + article type only (skipped when it equals tier 1)
+      3. vector    - no filters, 2x limit for better selection
+    """
+    tiers = [(
+        "hybrid",
+        models.Filter(must=must_filters, should=should_filters, must_not=[]),
+        top_k,
+    )]
+    if must_filters and should_filters:
+        tiers.append(("essential", models.Filter(must=must_filters), top_k))
+    tiers.append(("vector", None, top_k * 2))
+    return tiers
+
+
+def _boost_related(result, query_text):
+    # Boost score for products that might be related
+    article_type = result.get("articleType", "").lower()
+    if any(keyword in query_text.lower() for keyword in ["saree", "kurta", "kurti", "dress", "ethnic"]):
+        if any(keyword in article_type for keyword in ["saree", "kurta", "kurti", "dress", "ethnic", "traditional"]):
+            result["score"] *= 1.5  # Boost relevant products
+
+
+def _merge_tiers(tiers, tier_hits, query_text, top_k):
+    """
+    Walk the tiers in priority order and return the first one with results,
+    deduplicated by product id and sorted by (boosted) score.
+    Returns a list of (point_id, payload) pairs; each payload carries its "score".
+    """
+    return _merge_tiers_named(tiers, tier_hits, query_text, top_k)[1]
+
+
+def _merge_tiers_named(tiers, tier_hits, query_text, top_k):
+    """_merge_tiers that also reports which tier answered: (tier_name or None, ranked)."""
+    for (tier_name, _, _), hits in zip(tiers, tier_hits):
+        results = []
+        seen_ids = set()
+
+        for item in hits:
             if item.payload is not None:
                 product_id = item.payload.get("id")
                 if product_id not in seen_ids:
                     result = item.payload
                     result["score"] = item.score
-                    
-                    # Boost score for products that might be related
-                    article_type = result.get("articleType", "").lower()
-                    if any(keyword in query_text.lower() for keyword in ["saree", "kurta", "kurti", "dress", "ethnic"]):
-                        if any(keyword in article_type for keyword in ["saree", "kurta", "kurti", "dress", "ethnic", "traditional"]):
-                            result["score"] *= 1.5  # Boost relevant products
-                    
-                    results.append(result)
+                    if tier_name == "vector":
+                        _boost_related(result, query_text)
+                    results.append((item.id, result))
                     seen_ids.add(product_id)
-        
+
         if results:
-            print(f"🔄 Vector-only search found {len(results)} products.")
-            # Sort by boosted score and return top results
-            results.sort(key=lambda x: x.get("score", 0), reverse=True)
-            return results[:top_k]
-            
+            print(f"✅ Tier '{tier_name}' found {len(results)} products.")
+            # Sort by relevance score and return top results
+            results.sort(key=lambda x: x[1].get("score", 0), reverse=True)
+            return tier_name, results[:top_k]
+
+        print(f"⚠️ Tier '{tier_name}' returned no products.")
+
+    return None, []
+
+
+def search_ranked(query_text, colour, individual_category, category, category_by_gender, top_k=50):
+    """
+    Same search as search_collection, but keeps the Qdrant point ids:
+    returns the ranking as a list of (point_id, payload) pairs.
+    """
+    return search_ranked_tiered(
+        query_text, colour, individual_category, category, category_by_gender, top_k=top_k
+    )[1]
+
+
+def search_ranked_tiered(query_text, colour, individual_category, category, category_by_gender, top_k=50):
+    """search_ranked plus the name of the tier that produced the ranking: (tier_name or None, ranked)."""
+    print(f"\n🔍 Incoming Filters - Colour: {colour}, Category: {category}, Individual: {individual_category}, Gender: {category_by_gender}")
+    
+    # Generate vector
+    try:
+        vector = generate_embedding(query_text)
+        print(f"📡 SentenceTransformer embedding ready. Vector length: {len(vector)}")
     except Exception as e:
-        print(f"❌ Final fallback search failed: {e}")
+        print(f"❌ Error generating embedding: {e}")
+        return None, []
+
+    must_filters, should_filters = _build_search_filters(
+        colour, individual_category, category, category_by_gender
+    )
+    print(f"🔍 Total filters: {len(must_filters)} must, {len(should_filters)} should")
+
+    # Plan the whole fallback cascade up front and send it as one batch,
+    # so queries that fall through every tier still cost a single round trip.
+    tiers = _plan_search_tiers(must_filters, should_filters, top_k)
+    print(f"📥 Performing batched hybrid search over {len(tiers)} tiers...")
+
+    try:
+        with stage_timer("qdrant_search"), backend_call("qdrant", "search_batch"):
+            tier_hits = get_client().search_batch(
+                collection_name="my_collection",
+                requests=_search_requests(vector, tiers),
+            )
+    except Exception as e:
+        print(f"❌ Qdrant batched search failed: {e}")
+        return None, []
+
+    with stage_timer("merge"):
+        return _merge_tiers_named(tiers, tier_hits, query_text, top_k)
+
+
+def search_tier(query_text, tier_name, colour, individual_category, category, category_by_gender, top_k=50):
+    """
+    The ranking of one named tier of the cascade, as (point_id, payload) pairs.
+    Extends a stored search session deeper without re-running the cascade, so
+    the deeper ranking continues the one the session was built from.
+    """
+    must_filters, should_filters = _build_search_filters(
+        colour, individual_category, category, category_by_gender
+    )
+    tiers = [tier for tier in _plan_search_tiers(must_filters, should_filters, top_k) if tier[0] == tier_name]
+    if not tiers:
         return []
 
-    return []
+    vector = generate_embedding(query_text)
+    with stage_timer("qdrant_search"), backend_call("qdrant", "search_batch"):
+        hits = get_client().search_batch(
+            collection_name="my_collection",
+            requests=_search_requests(vector, tiers),
+        )
+    return _merge_tiers_named(tiers, hits, query_text, top_k)[1]
 
 
-# ------------------- 📜 FILTER-ONLY (SCROLL) FETCH -------------------
-def fetch_by_filters(
-    *,
-    article_types: Optional[List[str]] = None,
-    base_colour: Optional[str] = None,
-    gender: Optional[str] = None,
-    limit: int = 200,
-) -> List[Dict[str, Any]]:
+def _search_requests(vector, tiers):
+    return [
+        models.SearchRequest(
+            vector=vector,
+            filter=tier_filter,
+            limit=limit,
+            with_payload=True,
+            score_threshold=None,
+        )
+        for _, tier_filter, limit in tiers
+    ]
+
+
+def search_collection(query_text, colour, individual_category, category, category_by_gender, top_k=50):
+    ranked = search_ranked(
+        query_text, colour, individual_category, category, category_by_gender, top_k=top_k
+    )
+    return [payload for _, payload in ranked]
+
+
+# ------------------- 🔮 SPECULATIVE SEARCH -------------------
+# The query embedding and an unfiltered vector search don't depend on the LLM's
+# slots, so /search starts them before calling the extractor. When the slots
+# arrive they are applied as a post-filter over those candidates. Every point
+# outside the candidates scores below the last one, so the survivors are an
+# exact prefix of the filtered ranking: if enough survive, no second search.
+
+_speculation_pool = ThreadPoolExecutor(max_workers=SPECULATIVE_WORKERS, thread_name_prefix="speculative-search")
+_speculation_lock = threading.Lock()
+_speculation_stats = {"started": 0, "used": 0, "fallback": 0, "discarded": 0, "failed": 0, "wait_ms": 0.0}
+
+
+def _count_speculation(outcome, wait_ms=0.0, future=None):
+    with _speculation_lock:
+        if future is not None:
+            # Coalesced requests can resolve the same future: count it once
+            if getattr(future, "counted", False):
+                return
+            future.counted = True
+        _speculation_stats[outcome] += 1
+        _speculation_stats["wait_ms"] += wait_ms
+
+
+def _speculative_candidates(query_text, limit):
+    vector = generate_embedding(query_text)  # also warms the embedding cache for the fallback
+    with stage_timer("speculative_search"), backend_call("qdrant", "speculative_search"):
+        hits = get_client().search_batch(
+            collection_name="my_collection",
+            requests=[models.SearchRequest(vector=vector, filter=None, limit=limit, with_payload=True)],
+        )[0]
+    return hits, limit
+
+
+def start_speculative_search(query_text, limit=SPECULATIVE_SEARCH_LIMIT):
+    """Kick off embedding + unfiltered vector search in the background; returns a Future."""
+    _count_speculation("started")
+    return _speculation_pool.submit(_speculative_candidates, query_text, limit)
+
+
+def discard_speculative_search(future):
+    """The LLM asked a follow-up question instead: the candidates are not needed."""
+    future.cancel()
+    _count_speculation("discarded", future=future)
+
+
+def resolve_speculative_search(future, query_text, colour, individual_category, category,
+                               category_by_gender, top_k=50, min_results=1):
     """
-    Fetch products from Qdrant using ONLY metadata filters (no vector search),
-    returning up to `limit` payloads. Uses scroll under the hood and supports
-    large result sets (1k+).
+    Turn the speculative candidates into the ranking search_ranked_tiered would give.
+    Used when the first (hybrid) tier keeps at least `min_results` candidates,
+    otherwise falls back to the normal filtered search.
+    Returns (tier_name, ranked, complete); complete is False when the ranking is
+    an exact but shorter prefix of the top_k ranking.
+    """
+    start = time.perf_counter()
+    try:
+        candidates, limit = future.result()
+    except Exception as e:
+        print(f"⚠️ Speculative search failed, running filtered search: {e}")
+        _count_speculation("failed", future=future)
+        return (*search_ranked_tiered(
+            query_text, colour, individual_category, category, category_by_gender, top_k=top_k
+        ), True)
+    wait_ms = (time.perf_counter() - start) * 1000.0
+    record_stage("speculative_wait", wait_ms / 1000.0)
+
+    with stage_timer("speculative_filter"):
+        must_filters, should_filters = _build_search_filters(
+            colour, individual_category, category, category_by_gender
+        )
+        first_tier = _plan_search_tiers(must_filters, should_filters, top_k)[0]
+        survivors = [hit for hit in candidates if payload_matches(hit.payload or {}, first_tier[1])]
+        tier_name, ranked = _merge_tiers_named([first_tier], [survivors], query_text, top_k)
 
-    - article_types: list of acceptable values for `articleType` (e.g., ["Kurtis", "Kurtas"]).
-    - base_colour: single colour value (case-sensitive in Qdrant, so pass Title case like "Blue").
-    - gender: "Women" | "Men" (Title case recommended to match dataset).
-    - limit: max number of items to return.
+    if len(ranked) >= min_results:
+        _count_speculation("used", wait_ms, future)
+        print(f"🔮 Speculative search used: {len(survivors)} of {len(candidates)} candidates match the slots.")
+        complete = len(ranked) >= top_k or len(candidates) < limit
+        return tier_name, ranked, complete
+
+    _count_speculation("fallback", wait_ms, future)
+    print(f"🔮 Only {len(ranked)} speculative candidates match the slots, running filtered search.")
+    return (*search_ranked_tiered(
+        query_text, colour, individual_category, category, category_by_gender, top_k=top_k
+    ), True)
+
+
+def get_speculative_search_stats():
+    with _speculation_lock:
+        stats = dict(_speculation_stats)
+    resolved = stats["used"] + stats["fallback"]
+    stats["hit_rate"] = round(stats["used"] / resolved, 4) if resolved else 0.0
+    stats["avg_wait_ms"] = round(stats.pop("wait_ms") / resolved, 2) if resolved else 0.0
+    return stats
+
+
+# ------------------- ⚡ ASYNC SEARCH (ASGI) -------------------
+# Same pipeline for the async /search in asgi.py: nothing blocks the event loop
+# while waiting on Qdrant or on the encoder, so a waiting request holds no thread.
+
+def get_async_client():
+    """
+    Lazily created AsyncQdrantClient for the async pipeline.
+    None with SEARCH_ENGINE = "local": the in-process index has no network wait.
     """
+    global _async_client
+    if SEARCH_ENGINE == "local":
+        return None
+    if _async_client is None:
+        _async_client = AsyncQdrantClient(url=CLUSTER_URL, api_key=QDRANT_API_KEY)
+    return _async_client
+
+
+async def agenerate_embedding(query_text):
+    key = normalize_query(query_text)
+    vector = embedding_cache.get(key)
+    if vector is None:
+        with stage_timer("encode"), backend_call("encoder", "encode"):
+            if EMBEDDING_BATCHING:
+                # The batcher already runs the model on its own thread: just await its future
+                vector = await asyncio.wrap_future(embedding_batcher.submit(query_text))
+            else:
+                loop = asyncio.get_running_loop()
+                vector = await loop.run_in_executor(None, lambda: get_model().encode(query_text).tolist())
+        embedding_cache.set(key, vector)
+    return vector
+
+
+async def asearch_ranked_tiered(query_text, colour, individual_category, category, category_by_gender, top_k=50):
+    """Async search_ranked_tiered: same tiers and merge, awaited instead of blocking."""
+    print(f"\n🔍 Incoming Filters - Colour: {colour}, Category: {category}, Individual: {individual_category}, Gender: {category_by_gender}")
+
+    try:
+        vector = await agenerate_embedding(query_text)
+    except Exception as e:
+        print(f"❌ Error generating embedding: {e}")
+        return None, []
+
+    must_filters, should_filters = _build_search_filters(
+        colour, individual_category, category, category_by_gender
+    )
+    tiers = _plan_search_tiers(must_filters, should_filters, top_k)
+    search_requests = _search_requests(vector, tiers)
+    print(f"📥 Performing async batched hybrid search over {len(tiers)} tiers...")
+
+    try:
+        with stage_timer("qdrant_search"), backend_call("qdrant", "search_batch"):
+            client = get_async_client()
+            if client is None:
+                loop = asyncio.get_running_loop()
+                tier_hits = await loop.run_in_executor(
+                    None,
+                    lambda: get_client().search_batch(collection_name="my_collection", requests=search_requests),
+                )
+            else:
+                tier_hits = await client.search_batch(collection_name="my_collection", requests=search_requests)
+    except Exception as e:
+        print(f"❌ Qdrant async batched search failed: {e}")
+        return None, []
+
+    with stage_timer("merge"):
+        return _merge_tiers_named(tiers, tier_hits, query_text, top_k)
 
+
+# ------------------- 🆔 FETCH BY POINT IDS -------------------
+def _payload_selector(payload_fields: Optional[List[str]]):
+    # Include-projection when specific fields are requested, else the full payload
+    return models.PayloadSelectorInclude(include=list(payload_fields)) if payload_fields else True
+
+
+def fetch_by_ids(point_ids: List[Any], payload_fields: Optional[List[str]] = None) -> List[Tuple[Any, Dict[str, Any]]]:
+    """
+    Retrieve payloads for the given Qdrant point ids as (point_id, payload) pairs,
+    in the same order as `point_ids`. Ids that no longer exist are skipped.
+    Pass `payload_fields` to fetch only those payload keys.
+    """
+    if not point_ids:
+        return []
+
+    with stage_timer("qdrant_retrieve"), backend_call("qdrant", "retrieve"):
+        points = get_client().retrieve(
+            collection_name="my_collection",
+            ids=list(point_ids),
+            with_payload=_payload_selector(payload_fields),
+            with_vectors=False,
+        )
+    by_id = {p.id: p.payload for p in points if p.payload}
+    return [(pid, by_id[pid]) for pid in point_ids if pid in by_id]
+
+
+# ------------------- 📜 FILTER-ONLY (SCROLL) FETCH -------------------
+def _metadata_filter(article_types, base_colour, gender) -> models.Filter:
+    """Filter-only conditions on the canonical facet fields (any spelling accepted)."""
     must_filters: List[models.FieldCondition] = []
 
-    if article_types:
-        # Match any of multiple article types (e.g., Kurtis/Kurtas/Kurta Sets)
+    article_types_norm = normalize_article_types(article_types)
+    if len(article_types_norm) == 1:
         must_filters.append(
             models.FieldCondition(
-                key="articleType",
-                match=models.MatchAny(any=article_types),
+                key=ARTICLE_TYPE_NORM,
+                match=models.MatchValue(value=article_types_norm[0]),
+            )
+        )
+    elif article_types_norm:
+        # Several distinct types (e.g., kurtis + kurtas)
+        must_filters.append(
+            models.FieldCondition(
+                key=ARTICLE_TYPE_NORM,
+                match=models.MatchAny(any=article_types_norm),
             )
         )
 
-    if base_colour:
+    colour_norm = normalize_colour(base_colour)
+    if colour_norm:
         must_filters.append(
             models.FieldCondition(
-                key="baseColour",
-                match=models.MatchValue(value=base_colour),
+                key=COLOUR_NORM,
+                match=models.MatchValue(value=colour_norm),
             )
         )
 
-    if gender:
+    gender_norm = normalize_gender(gender)
+    if gender_norm:
         must_filters.append(
             models.FieldCondition(
-                key="gender",
-                match=models.MatchValue(value=gender),
+                key=GENDER_NORM,
+                match=models.MatchValue(value=gender_norm),
             )
         )
 
-    metadata_filter = models.Filter(must=must_filters, should=[], must_not=[])
+    return models.Filter(must=must_filters, should=[], must_not=[])
+
+
+def fetch_by_filters(
+    *,
+    article_types: Optional[List[str]] = None,
+    base_colour: Optional[str] = None,
+    gender: Optional[str] = None,
+    limit: int = 200,
+) -> List[Dict[str, Any]]:
+    """
+    Fetch products from Qdrant using ONLY metadata filters (no vector search),
+    returning up to `limit` payloads. Uses scroll under the hood and supports
+    large result sets (1k+).
+
+    - article_types: list of acceptable article types, any spelling (e.g., ["kurtis", "Kurtas"]).
+    - base_colour: single colour value, any case (e.g., "Blue" or "navy").
+    - gender: "Women" | "Men" (synonyms like "ladies" are accepted).
+    - limit: max number of items to return.
+    """
+
+    metadata_filter = _metadata_filter(article_types, base_colour, gender)
 
     collected: list[dict] = []
     next_offset = None
@@ -301,7 +698,7 @@ def fetch_by_filters(
     # Scroll in chunks to gather large result sets
     while len(collected) < limit:
         page_limit = min(256, limit - len(collected))
-        points, next_offset = client.scroll(
+        points, next_offset = get_client().scroll(
             collection_name="my_collection",
             scroll_filter=metadata_filter,
             with_payload=True,
@@ -325,6 +722,18 @@ def fetch_by_filters(
     return collected
 
 
+def _scroll_past(metadata_filter, count):
+    """Scroll offset of the match after the first `count` matches (ids only), or None past the end."""
+    _, next_offset = get_client().scroll(
+        collection_name="my_collection",
+        scroll_filter=metadata_filter,
+        with_payload=False,
+        with_vectors=False,
+        limit=count,
+    )
+    return next_offset
+
+
 def fetch_by_filters_page(
     *,
     article_types: Optional[List[str]] = None,
@@ -332,44 +741,58 @@ def fetch_by_filters_page(
     gender: Optional[str] = None,
     limit: int = 48,
     offset: Optional[Any] = None,
+    payload_fields: Optional[List[str]] = None,
 ) -> Dict[str, Any]:
     """
-    Scroll a single page using Qdrant filter-only query.
-    Returns dict with keys: { 'items': List[payload], 'next_offset': token or None }
-    Pass the returned next_offset back to continue scrolling.
+    Fetch a single page of products matching the metadata filters.
+    Returns dict with keys: { 'items': List[payload], 'next_offset': token or None, 'total': int or None,
+    'catalog_stamp': version stamp of the facet index snapshot, or None when read live from Qdrant }
+    Pass the returned next_offset back to continue paging, and `payload_fields`
+    to transfer only those payload keys.
+
+    Served from the in-memory facet index when it is built ("f:<row>" offsets,
+    exact totals, only the page's payloads fetched); otherwise falls back to a
+    Qdrant filter-only scroll (point-id offsets, no total), which also resumes
+    an "f:<row>" offset handed out by another worker's index.
     """
-    must_filters: List[models.FieldCondition] = []
-
-    if article_types:
-        must_filters.append(
-            models.FieldCondition(
-                key="articleType",
-                match=models.MatchAny(any=article_types),
-            )
+    position = _facet_offset(offset)
+    index = get_facet_index() if FACET_INDEX_ENABLED else None
+    if index is not None and position is not None:
+        colour_norm = normalize_colour(base_colour)
+        gender_norm = normalize_gender(gender)
+        page = index.page(
+            {
+                ARTICLE_TYPE_NORM: normalize_article_types(article_types),
+                COLOUR_NORM: [colour_norm] if colour_norm else None,
+                GENDER_NORM: [gender_norm] if gender_norm else None,
+            },
+            limit=limit,
+            offset=position,
         )
-
-    if base_colour:
-        must_filters.append(
-            models.FieldCondition(
-                key="baseColour",
-                match=models.MatchValue(value=base_colour),
-            )
-        )
-
-    if gender:
-        must_filters.append(
-            models.FieldCondition(
-                key="gender",
-                match=models.MatchValue(value=gender),
-            )
-        )
-
-    metadata_filter = models.Filter(must=must_filters, should=[], must_not=[])
-
-    points, next_offset = client.scroll(
+        items = [payload for _, payload in fetch_by_ids(page["point_ids"], payload_fields)]
+        next_offset = page["next_offset"]
+        if next_offset is not None:
+            next_offset = f"{FACET_OFFSET_PREFIX}{next_offset}"
+        return {"items": items, "next_offset": next_offset, "total": page["total"],
+                "catalog_stamp": index.catalog_stamp}
+
+    metadata_filter = _metadata_filter(article_types, base_colour, gender)
+    if position:
+        # A facet offset issued by a worker that had its index built. Rows are in
+        # point-id order, like the scroll, so skip that many matches and continue
+        # on the scroll path while our own index is built in the background.
+        if FACET_INDEX_ENABLED:
+            _schedule_facet_refresh()
+        offset = _scroll_past(metadata_filter, position)
+        if offset is None:
+            return {"items": [], "next_offset": None, "total": None, "catalog_stamp": None}
+    elif isinstance(offset, str) and offset.isdigit():
+        offset = int(offset)  # point ids are integers (see uploader.py)
+
+    points, next_offset = get_client().scroll(
         collection_name="my_collection",
         scroll_filter=metadata_filter,
-        with_payload=True,
+        with_payload=_payload_selector(payload_fields),
         with_vectors=False,
         limit=limit,
         offset=offset,
@@ -380,7 +803,7 @@ def fetch_by_filters_page(
         if p.payload:
             items.append(p.payload)
 
-    return {"items": items, "next_offset": next_offset}
+    return {"items": items, "next_offset": next_offset, "total": None, "catalog_stamp": None}
 
 
 
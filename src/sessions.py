@@ -0,0 +1,71 @@
+import secrets
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import SEARCH_SESSION_MAX, SEARCH_SESSION_TTL
+from src.cache import TTLCache
+from src.searcher import fetch_by_ids, search_tier
+
+# cursor -> (ranking [(point_id, score), ...], complete, source) computed once by /search.
+# source is (query, filters, tier_name): what a truncated ranking is extended from.
+_sessions = TTLCache(maxsize=SEARCH_SESSION_MAX, ttl=SEARCH_SESSION_TTL)
+
+
+def create_session(ranked: List[Tuple[Any, Dict[str, Any]]], complete: bool = True,
+                   source: Optional[Tuple[str, Dict[str, str], str]] = None) -> str:
+    """
+    Store a search ranking (as returned by search_ranked) and return an opaque cursor.
+    Only point ids and scores are kept; payloads are fetched per page.
+    complete=False marks an exact but truncated prefix (speculative search):
+    pages past its end extend it from `source` (query, search_filters(), tier),
+    the same slots and tier that produced the prefix.
+    """
+    cursor = secrets.token_urlsafe(16)
+    ranking = [(point_id, payload.get("score")) for point_id, payload in ranked]
+    _sessions.set(cursor, (ranking, complete, source))
+    return cursor
+
+
+def _extend_session(cursor: str, source: Tuple[str, Dict[str, str], str], depth: int):
+    """Re-rank the session's tier `depth` deep and store it: (ranking, complete, source)."""
+    query, filters, tier_name = source
+    ranked = search_tier(query, tier_name, top_k=depth, **filters)
+    # Fewer than asked for: that was the whole tier
+    session = ([(point_id, payload.get("score")) for point_id, payload in ranked], len(ranked) < depth, source)
+    _sessions.set(cursor, session)
+    return session
+
+
+def get_session_page(cursor: str, offset: int, limit: int) -> Optional[Dict[str, Any]]:
+    """
+    Resolve a cursor into one page of results by slicing the stored ranking
+    and fetching only that page's payloads.
+    A page past the end of a truncated ranking first extends the session to
+    offset + limit + 1 (one extra to know whether more exist).
+    Returns None if the cursor is unknown or expired, or a truncated ranking
+    has no source to extend it from (the caller then re-runs the search).
+    """
+    session = _sessions.get(cursor)
+    if session is None:
+        return None
+    ranking, complete, source = session
+    if not complete and offset + limit > len(ranking):
+        if source is None:
+            return None
+        ranking, complete, _ = _extend_session(cursor, source, offset + limit + 1)
+
+    page = ranking[offset:offset + limit]
+    scores = dict(page)
+    results = []
+    for point_id, payload in fetch_by_ids([point_id for point_id, _ in page]):
+        payload["score"] = scores[point_id]
+        results.append(payload)
+
+    return {
+        "results": results,
+        "has_more": len(ranking) > offset + limit or not complete,
+        "total_count": len(ranking),
+    }
+
+
+def get_session_stats() -> Dict[str, Any]:
+    return _sessions.stats()
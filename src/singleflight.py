@@ -0,0 +1,93 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The first caller for a key (the leader) runs fn(); callers arriving while it
+    is still running wait for it and get the same result (or exception).
+    Nothing is cached: once the leader finishes, the next call runs again.
+    Results are shared between requests, so callers must treat them as read-only.
+    do() and ado() share the same in-flight calls, so Flask threads and ASGI
+    coroutines in one process coalesce with each other.
+    """
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self.executed += 1
+            else:
+                self.coalesced += 1
+        return future, leader
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return (result, shared); shared is True when another call's result was reused."""
+        future, leader = self._join(key)
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                self.failures += 1
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        do() for coroutines. The leader's work runs as its own task, so a
+        cancelled caller (client gone) neither cancels it nor fails the others.
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return await asyncio.shield(asyncio.wrap_future(future)), True
+        return await asyncio.shield(asyncio.ensure_future(self._alead(key, future, fn))), False
+
+    async def _alead(self, key: Hashable, future: Future, fn: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            result = await fn()
+        except BaseException as e:
+            with self._lock:
+                self.failures += 1
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.executed + self.coalesced
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "failures": self.failures,
+                "in_flight": len(self._calls),
+                "coalesce_rate": round(self.coalesced / total, 4) if total else 0.0,
+            }
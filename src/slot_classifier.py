@@ -0,0 +1,300 @@
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import ENCODER_BACKEND, SLOT_CLASSIFIER_PATH, SLOT_CLASSIFIER_THRESHOLD, SLOT_CLASSIFIER_MIN_SIMILARITY
+from src.vocabulary import CATEGORY_BY_INDIVIDUAL, COLOURS, GENDERS, INDIVIDUAL_CATEGORY_SYNONYMS
+from src.vocabulary import WOMEN_ONLY_INDIVIDUAL
+
+# ------------------- 🎯 EMBEDDING SLOT CLASSIFIER -------------------
+# Predicts the extractor() slots from the query embedding /search computes
+# anyway for retrieval, so one MiniLM vector serves as both the search vector
+# and the slot extractor. One nearest-centroid head per slot:
+#
+#   Individual_category  <- articleType   (mapped onto the prompt vocabulary)
+#   colour               <- baseColour
+#   category_by_Gender   <- gender
+#
+# Each head also has an "NA" class learned from the same names with the slot's
+# words removed, so a query that doesn't mention a slot is not forced into one.
+#
+# Category follows from the predicted individual category, as in the fast path.
+# Scores are cosine similarities to each class centroid turned into
+# probabilities by a softmax whose temperature is fitted on held-out rows
+# (lowest negative log-likelihood), so "confidence" means what it says.
+#
+# Train from styles.csv product names: python -m src.slot_classifier train <styles.csv>
+
+NA = "NA"
+HEAD_FIELDS = ["Individual_category", "colour", "category_by_Gender"]
+TEMPERATURES = np.logspace(-4, 0, 81)
+
+_INDIVIDUAL_LOOKUP = {
+    spelling: value
+    for value, spellings in INDIVIDUAL_CATEGORY_SYNONYMS.items()
+    for spelling in [value] + spellings
+}
+# individual category -> its spellings as one word-boundary pattern, longest first
+_INDIVIDUAL_WORDS = {
+    value: re.compile(
+        r"\b(" + "|".join(re.escape(w) for w in sorted({value, *spellings}, key=len, reverse=True)) + r")\b",
+        re.IGNORECASE,
+    )
+    for value, spellings in INDIVIDUAL_CATEGORY_SYNONYMS.items()
+}
+_COLOUR_LOOKUP = {c.lower(): c for c in COLOURS}
+_GENDER_LOOKUP = {g.lower(): g for g in GENDERS}
+_GENDER_WORDS = re.compile(r"\b(men|women|men's|women's|mens|womens|boys|girls|kids|unisex)\b", re.IGNORECASE)
+
+
+def _softmax(scores: np.ndarray, temperature: float) -> np.ndarray:
+    z = scores / temperature
+    z = z - z.max(axis=-1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+class SlotClassifier:
+    """Nearest-centroid slot heads over unit query embeddings."""
+
+    def __init__(self, heads: Dict[str, Tuple[List[str], np.ndarray, float]], encoder: str = ""):
+        # field -> (labels, centroids [n_labels, dim], temperature)
+        self.heads = heads
+        self.encoder = encoder
+        self.dimension = next(iter(heads.values()))[1].shape[1]
+
+    # ---------- persistence ----------
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        arrays = {"encoder": np.array(self.encoder)}
+        for field, (labels, centroids, temperature) in self.heads.items():
+            arrays[f"{field}.labels"] = np.array(labels)
+            arrays[f"{field}.centroids"] = centroids.astype(np.float32)
+            arrays[f"{field}.temperature"] = np.array(temperature)
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "SlotClassifier":
+        with np.load(path) as data:
+            heads = {
+                field: (
+                    [str(label) for label in data[f"{field}.labels"]],
+                    data[f"{field}.centroids"],
+                    float(data[f"{field}.temperature"]),
+                )
+                for field in HEAD_FIELDS
+            }
+            return cls(heads, str(data["encoder"]))
+
+    # ---------- inference ----------
+
+    def predict(self, vector: Sequence[float]) -> Dict[str, Tuple[str, float, float]]:
+        """field -> (most likely label, calibrated probability, cosine similarity to its centroid)."""
+        v = np.asarray(vector, dtype=np.float32).ravel()
+        v = v / (np.linalg.norm(v) or 1.0)
+        out = {}
+        for field, (labels, centroids, temperature) in self.heads.items():
+            scores = centroids @ v
+            probs = _softmax(scores, temperature)
+            best = int(probs.argmax())
+            out[field] = (labels[best], float(probs[best]), float(scores[best]))
+        return out
+
+    def extract(self, vector: Sequence[float], threshold: float = SLOT_CLASSIFIER_THRESHOLD,
+                min_similarity: float = SLOT_CLASSIFIER_MIN_SIMILARITY) -> Tuple[Optional[Dict[str, Any]], str]:
+        """(slots in extractor() format, "resolved") or (None, why the LLM is needed)."""
+        predicted = self.predict(vector)
+        individual, confidence, similarity = predicted["Individual_category"]
+        if similarity < min_similarity:
+            # Far from every product the heads were trained on: probabilities mean nothing here
+            return None, "out_of_distribution"
+        if individual == NA or confidence < threshold:
+            return None, "low_confidence_individual_category"
+
+        confident = {field: label for field, (label, p, _) in predicted.items() if p >= threshold and label != NA}
+        gender = confident.get("category_by_Gender")
+        if gender is None and individual in WOMEN_ONLY_INDIVIDUAL:
+            gender = "Women"
+        colour = confident.get("colour")
+        if gender is None and colour is None:
+            return None, "low_confidence_colour_and_gender"
+
+        described = " ".join(v for v in (colour and colour.lower(), individual.replace("-", " ")) if v)
+        return {
+            "Category": CATEGORY_BY_INDIVIDUAL.get(individual, "Other"),
+            "Individual_category": individual,
+            "category_by_Gender": gender or NA,
+            "colour": colour or NA,
+            "MOVE_ON": True,
+            "FOLLOW_UP_MESSAGE": f"Searching for {described}" + (f" for {gender.lower()}." if gender else "."),
+        }, "resolved"
+
+
+# ------------------- 🏋️ TRAINING -------------------
+
+def training_examples(df) -> Dict[str, Tuple[List[str], List[str]]]:
+    """
+    field -> (texts, labels) from a styles.csv frame. Rows whose value is
+    outside the prompt vocabulary, or whose name doesn't mention it, are left
+    out of that head. The "NA" class is the same names with those words removed.
+    """
+    examples = {field: ([], []) for field in HEAD_FIELDS}
+    for row in df.itertuples(index=False):
+        name = str(row.productDisplayName).strip()
+        if not name:
+            continue
+        individual = _INDIVIDUAL_LOOKUP.get(str(row.articleType).strip().lower())
+        if individual and _INDIVIDUAL_WORDS[individual].search(name):
+            examples["Individual_category"][0].extend([name, _INDIVIDUAL_WORDS[individual].sub(" ", name)])
+            examples["Individual_category"][1].extend([individual, NA])
+
+        colour = _COLOUR_LOOKUP.get(str(row.baseColour).strip().lower())
+        if colour and re.search(rf"\b{re.escape(colour)}\b", name, re.IGNORECASE):
+            examples["colour"][0].extend([name, re.sub(rf"\b{re.escape(colour)}\b", " ", name, flags=re.IGNORECASE)])
+            examples["colour"][1].extend([colour, NA])
+
+        gender = _GENDER_LOOKUP.get(str(row.gender).strip().lower())
+        if gender and _GENDER_WORDS.search(name):
+            examples["category_by_Gender"][0].extend([name, _GENDER_WORDS.sub(" ", name)])
+            examples["category_by_Gender"][1].extend([gender, NA])
+    return examples
+
+
+def _centroids(vectors: np.ndarray, labels: np.ndarray, classes: List[str]) -> np.ndarray:
+    centroids = np.stack([vectors[labels == c].mean(axis=0) for c in classes])
+    return centroids / np.clip(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12, None)
+
+
+def fit_head(vectors: np.ndarray, labels: Sequence[str], min_samples: int = 20,
+             holdout: float = 0.2, seed: int = 0) -> Tuple[List[str], np.ndarray, float, Dict[str, float]]:
+    """Centroids on all rows + softmax temperature fitted on a held-out split."""
+    labels = np.asarray(labels)
+    classes, counts = np.unique(labels, return_counts=True)
+    classes = [c for c, n in zip(classes, counts) if n >= min_samples]
+    keep = np.isin(labels, classes)
+    vectors, labels = vectors[keep], labels[keep]
+
+    rng = np.random.default_rng(seed)
+    test = rng.random(len(labels)) < holdout
+    train_classes = [c for c in classes if (labels[~test] == c).any()]
+    scores = vectors[test] @ _centroids(vectors[~test], labels[~test], train_classes).T
+    target = np.array([train_classes.index(l) if l in train_classes else -1 for l in labels[test]])
+    scored = target >= 0
+    scores, target = scores[scored], target[scored]
+
+    def nll(temperature):
+        probs = _softmax(scores, temperature)
+        return -np.log(np.clip(probs[np.arange(len(target)), target], 1e-12, None)).mean()
+
+    temperature = float(min(TEMPERATURES, key=nll))
+    probs = _softmax(scores, temperature)
+    confident = probs.max(axis=1) >= SLOT_CLASSIFIER_THRESHOLD
+    correct = probs.argmax(axis=1) == target
+    report = {
+        "classes": len(classes),
+        "samples": int(len(labels)),
+        "temperature": round(temperature, 5),
+        "holdout_accuracy": round(float(correct.mean()), 4) if len(target) else 0.0,
+        "holdout_coverage_at_threshold": round(float(confident.mean()), 4) if len(target) else 0.0,
+        "holdout_accuracy_at_threshold": round(float(correct[confident].mean()), 4) if confident.any() else 0.0,
+    }
+    return classes, _centroids(vectors, labels, classes), temperature, report
+
+
+def train(csv_path: str, output_path: str = SLOT_CLASSIFIER_PATH, limit: int = None) -> SlotClassifier:
+    import pandas as pd
+
+    from src.encoder import get_encoder
+
+    df = pd.read_csv(csv_path, on_bad_lines="skip").fillna("")
+    if limit:
+        df = df.head(limit)
+    encoder = get_encoder()
+    heads = {}
+    for field, (texts, labels) in training_examples(df).items():
+        print(f"🏋️ {field}: encoding {len(texts)} product names...")
+        vectors = np.asarray(encoder.encode(texts, batch_size=128), dtype=np.float32)
+        classes, centroids, temperature, report = fit_head(vectors, labels)
+        heads[field] = (classes, centroids, temperature)
+        print(f"✅ {field}: {report}")
+
+    classifier = SlotClassifier(heads, encoder=ENCODER_BACKEND)
+    classifier.save(output_path)
+    print(f"💾 Slot classifier written to {output_path}")
+    return classifier
+
+
+# ------------------- ⚙️ RUNTIME -------------------
+
+_classifier: Optional[SlotClassifier] = None
+_load_attempted = False
+_lock = threading.Lock()
+_stats = {"attempts": 0, "resolved": 0, "total_us": 0.0}
+_fallthrough: Dict[str, int] = {}
+
+
+def get_slot_classifier() -> Optional[SlotClassifier]:
+    """The trained classifier, or None when it was never trained for this encoder."""
+    global _classifier, _load_attempted
+    if not _load_attempted:
+        with _lock:
+            if not _load_attempted:
+                _load_attempted = True
+                if not os.path.exists(SLOT_CLASSIFIER_PATH):
+                    print(f"⚠️ {SLOT_CLASSIFIER_PATH} not found; slot classifier disabled. "
+                          f"Train it with: python -m src.slot_classifier train <styles.csv>")
+                else:
+                    classifier = SlotClassifier.load(SLOT_CLASSIFIER_PATH)
+                    if classifier.encoder != ENCODER_BACKEND:
+                        # Centroids from another embedding space would give confident nonsense
+                        print(f"⚠️ Slot classifier was trained with '{classifier.encoder or 'unknown'}', "
+                              f"serving with '{ENCODER_BACKEND}'; slot classifier disabled. Retrain it.")
+                    else:
+                        _classifier = classifier
+    return _classifier
+
+
+def classify_slots(vector: Sequence[float]) -> Optional[Dict[str, Any]]:
+    """Slots predicted from the query embedding; None means ask the LLM."""
+    classifier = get_slot_classifier()
+    if classifier is None or classifier.dimension != len(vector):
+        return None
+    start = time.perf_counter()
+    slots, reason = classifier.extract(vector)
+    elapsed_us = (time.perf_counter() - start) * 1e6
+    with _lock:
+        _stats["attempts"] += 1
+        _stats["total_us"] += elapsed_us
+        if slots is None:
+            _fallthrough[reason] = _fallthrough.get(reason, 0) + 1
+        else:
+            _stats["resolved"] += 1
+    return slots
+
+
+def get_slot_classifier_stats() -> Dict[str, Any]:
+    with _lock:
+        attempts = _stats["attempts"]
+        return {
+            "loaded": _classifier is not None,
+            "threshold": SLOT_CLASSIFIER_THRESHOLD,
+            "attempts": attempts,
+            "resolved": _stats["resolved"],
+            "coverage_rate": round(_stats["resolved"] / attempts, 4) if attempts else 0.0,
+            "avg_us": round(_stats["total_us"] / attempts, 1) if attempts else 0.0,
+            "fallthrough": dict(_fallthrough),
+        }
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 2 and sys.argv[1] == "train":
+        train(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else SLOT_CLASSIFIER_PATH)
+    else:
+        print("Usage: python -m src.slot_classifier train <styles.csv> [output.npz]")
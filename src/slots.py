@@ -0,0 +1,185 @@
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from config import EXTRACTION_CACHE_SIZE, EXTRACTION_CACHE_TTL
+from config import EXTRACTION_SEMANTIC_CACHE, EXTRACTION_SEMANTIC_SIZE, EXTRACTION_SEMANTIC_THRESHOLD
+from config import FAST_EXTRACTOR, SLOT_CLASSIFIER
+from src.cache import SimilarityCache, TTLCache
+from src.extractor import aextract_with_llm, extract_with_llm, get_extraction_mode_stats
+from src.fast_extractor import best_effort_slots, fast_extract, get_fast_extractor_stats
+from src.metrics import backend_call, observe_extraction
+from src.slot_classifier import classify_slots, get_slot_classifier_stats
+from src.searcher import agenerate_embedding, generate_embedding, normalize_query
+from src.vocabulary import has_negation, query_terms
+
+# ------------------- 🧠 SLOT EXTRACTION -------------------
+# /search turns a query into slots through extract_slots(). Sources, cheapest first:
+#
+#   exact_cache     - TTL cache keyed on the normalized query text
+#   fast_path       - deterministic vocabulary matcher for unambiguous queries
+#                     (src/fast_extractor.py), no model call at all
+#   semantic_cache  - the cached query whose embedding is closest, above a cosine
+#                     threshold, and only if both queries mention the same
+#                     vocabulary terms: "red saree" never answers "blue saree".
+#                     Negated queries ("no red saree") never use it either way.
+#   classifier      - nearest-centroid slot heads on the same query embedding,
+#                     used when every needed slot is above the confidence
+#                     threshold (src/slot_classifier.py). Skipped for negated
+#                     queries too: it has no notion of "not red".
+#   llm             - the Groq extraction (EXTRACTION_MODE); its result fills both caches
+#   fallback        - the LLM missed its deadline, failed or its circuit breaker
+#                     is open (src/resilient_llm.py): lenient vocabulary match
+#
+# The semantic lookup and the classifier use the same cached embedding the
+# vector search needs, so they cost a few matrix-vector products, not an
+# extra model call.
+
+SLOT_FIELDS = ["Category", "Individual_category", "category_by_Gender", "colour"]
+
+exact_cache = TTLCache(maxsize=EXTRACTION_CACHE_SIZE, ttl=EXTRACTION_CACHE_TTL)
+semantic_cache = SimilarityCache(
+    maxsize=EXTRACTION_SEMANTIC_SIZE, ttl=EXTRACTION_CACHE_TTL, threshold=EXTRACTION_SEMANTIC_THRESHOLD
+)
+
+_sources_lock = threading.Lock()
+_sources: Dict[str, int] = {}
+
+
+def _count(source: str) -> None:
+    with _sources_lock:
+        _sources[source] = _sources.get(source, 0) + 1
+    observe_extraction(source)
+
+
+def _is_cacheable(extracted: Dict[str, Any]) -> bool:
+    # Parse failures come back as all-"NA" defaults: don't pin those for hours
+    return bool(extracted.get("MOVE_ON")) or any(
+        str(extracted.get(field, "NA")).strip().upper() not in ("", "NA") for field in SLOT_FIELDS
+    )
+
+
+def _exact_lookup(key: str) -> Optional[Dict[str, Any]]:
+    extracted = exact_cache.get(key)
+    if extracted is None:
+        return None
+    _count("exact_cache")
+    return dict(extracted)
+
+
+def _fast_lookup(query: str) -> Optional[Dict[str, Any]]:
+    if not FAST_EXTRACTOR:
+        return None
+    extracted = fast_extract(query)
+    if extracted is not None:
+        _count("fast_path")
+    return extracted
+
+
+def _semantic_lookup(query: str, key: str, vector) -> Optional[Dict[str, Any]]:
+    if vector is None or not EXTRACTION_SEMANTIC_CACHE or has_negation(query):
+        return None
+    extracted = semantic_cache.get(vector, guard=query_terms(query))
+    if extracted is None:
+        return None
+    exact_cache.set(key, extracted)  # next time this exact wording is a dict lookup
+    _count("semantic_cache")
+    return dict(extracted)
+
+
+def _classifier_lookup(query: str, vector) -> Optional[Dict[str, Any]]:
+    if vector is None or not SLOT_CLASSIFIER or has_negation(query):
+        return None
+    extracted = classify_slots(vector)
+    if extracted is not None:
+        _count("classifier")
+    return extracted
+
+
+def _fallback(query: str, error: Exception) -> Dict[str, Any]:
+    # Never cached: the next request should get the LLM again once it recovers
+    print("⚠️ LLM extraction unavailable, using local fallback:", error)
+    _count("fallback")
+    return best_effort_slots(query)
+
+
+def _store(query: str, key: str, vector, extracted: Dict[str, Any]) -> None:
+    _count("llm")
+    if _is_cacheable(extracted):
+        exact_cache.set(key, dict(extracted))
+        if vector is not None and EXTRACTION_SEMANTIC_CACHE and not has_negation(query):
+            semantic_cache.set(vector, dict(extracted), guard=query_terms(query))
+
+
+def extract_slots(llm, query: str, on_local_miss: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    """
+    extractor() output for `query`, served from the caches when possible.
+    on_local_miss runs once the exact cache and the fast path both miss, before
+    any model work (app.py starts its speculative search there).
+    """
+    key = normalize_query(query)
+    cached = _exact_lookup(key) or _fast_lookup(query)
+    if cached is not None:
+        return cached
+    if on_local_miss is not None:
+        on_local_miss()
+
+    vector = None
+    if EXTRACTION_SEMANTIC_CACHE or SLOT_CLASSIFIER:
+        try:
+            vector = generate_embedding(query)
+        except Exception as e:
+            print("⚠️ Semantic cache and slot classifier skipped, embedding failed:", e)
+    cached = _semantic_lookup(query, key, vector) or _classifier_lookup(query, vector)
+    if cached is not None:
+        return cached
+
+    try:
+        with backend_call("llm", "extract"):
+            extracted = extract_with_llm(llm, query)
+    except Exception as e:
+        return _fallback(query, e)
+    _store(query, key, vector, extracted)
+    return extracted
+
+
+async def aextract_slots(llm, query: str, on_local_miss: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    """Async extract_slots() for the ASGI pipeline."""
+    key = normalize_query(query)
+    cached = _exact_lookup(key) or _fast_lookup(query)
+    if cached is not None:
+        return cached
+    if on_local_miss is not None:
+        on_local_miss()
+
+    vector = None
+    if EXTRACTION_SEMANTIC_CACHE or SLOT_CLASSIFIER:
+        try:
+            vector = await agenerate_embedding(query)
+        except Exception as e:
+            print("⚠️ Semantic cache and slot classifier skipped, embedding failed:", e)
+    cached = _semantic_lookup(query, key, vector) or _classifier_lookup(query, vector)
+    if cached is not None:
+        return cached
+
+    try:
+        with backend_call("llm", "extract"):
+            extracted = await aextract_with_llm(llm, query)
+    except Exception as e:
+        return _fallback(query, e)
+    _store(query, key, vector, extracted)
+    return extracted
+
+
+def get_slot_extraction_stats() -> Dict[str, Any]:
+    with _sources_lock:
+        sources = dict(_sources)
+    total = sum(sources.values())
+    return {
+        "sources": sources,
+        "llm_rate": round(sources.get("llm", 0) / total, 4) if total else 0.0,
+        "exact_cache": exact_cache.stats(),
+        "fast_path": get_fast_extractor_stats(),
+        "semantic_cache": semantic_cache.stats(),
+        "classifier": get_slot_classifier_stats(),
+        "llm_modes": get_extraction_mode_stats(),
+    }
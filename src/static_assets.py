@@ -0,0 +1,107 @@
+import json
+import mimetypes
+import os
+import threading
+from typing import Dict, Optional
+
+from flask import Response, abort, render_template, request, send_file
+
+# ------------------- 🧱 BUILT ASSETS + PAGE CACHE -------------------
+# Serves the output of build_assets.py when build/manifest.json exists:
+#   - /static/<name>.<hash><ext>  Cache-Control: immutable, one year
+#   - /static/<original path>     revalidated with ETag (url() refs inside CSS)
+#   - precompressed .br / .gz variants picked from Accept-Encoding
+# Pages are kept in memory: prebuilt bytes when available, otherwise the
+# template is rendered once per process instead of on every hit.
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+class BuiltAssets:
+    def __init__(self, build_dir: str):
+        self.build_dir = build_dir
+        with open(os.path.join(build_dir, "manifest.json")) as f:
+            manifest = json.load(f)
+        self.hashed = set(manifest.get("static", {}).values())
+        self.pages = set(manifest.get("pages", {}))
+
+    @classmethod
+    def load(cls, build_dir: str) -> Optional["BuiltAssets"]:
+        if not os.path.exists(os.path.join(build_dir, "manifest.json")):
+            return None
+        assets = cls(build_dir)
+        print(f"🧱 Serving built assets from {build_dir}/ ({len(assets.hashed)} hashed files)")
+        return assets
+
+    @staticmethod
+    def variant(path: str):
+        """(file path, content-coding) of the best precompressed variant the client accepts."""
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if request.accept_encodings.quality(encoding) > 0 and os.path.exists(path + suffix):
+                return path + suffix, encoding
+        return path, ""
+
+
+def _send_variant(path: str, encoding: str, mimetype: str):
+    # ETag comes from the variant file, so each encoding validates separately
+    response = send_file(path, mimetype=mimetype, conditional=True, etag=True)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+_page_cache: Dict[str, bytes] = {}
+_page_lock = threading.Lock()
+
+
+def init_static_assets(app, build_dir: str) -> Optional[BuiltAssets]:
+    """Take over /static when a build exists and install render_page's backing store."""
+    assets = BuiltAssets.load(build_dir)
+    app.extensions["built_assets"] = assets
+    if assets is None:
+        return None
+
+    static_root = os.path.join(build_dir, "static")
+
+    def serve_static(filename):
+        path = os.path.realpath(os.path.join(static_root, filename))
+        if not path.startswith(os.path.realpath(static_root) + os.sep) or not os.path.isfile(path):
+            abort(404)
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        response = _send_variant(*assets.variant(path), mimetype)
+        if filename in assets.hashed:
+            response.headers["Cache-Control"] = IMMUTABLE
+        else:
+            response.headers["Cache-Control"] = "public, no-cache"
+        return response
+
+    app.view_functions["static"] = serve_static
+    return assets
+
+
+def render_page(template: str):
+    """
+    Page with no server context. Prebuilt and precompressed when built,
+    otherwise rendered once and kept in memory (re-rendered every time in debug).
+    """
+    from flask import current_app
+
+    assets = current_app.extensions.get("built_assets")
+    if assets is not None and template in assets.pages:
+        path = os.path.join(assets.build_dir, "pages", template)
+        response = _send_variant(*assets.variant(path), "text/html")
+        response.headers["Cache-Control"] = "no-cache"  # revalidate to pick up new asset hashes
+        return response
+
+    if current_app.debug:
+        return render_template(template)
+
+    html = _page_cache.get(template)
+    if html is None:
+        with _page_lock:
+            html = _page_cache.get(template)
+            if html is None:
+                html = render_template(template).encode("utf-8")
+                _page_cache[template] = html
+    return Response(html, mimetype="text/html")
@@ -2,7 +2,9 @@ import json
 import pandas as pd
 from qdrant_client import QdrantClient, models
 from qdrant_client.http.models import PointStruct
-from sentence_transformers import SentenceTransformer
+from src.encoder import get_encoder
+from src.vocabulary import canonical_fields
+from src.catalog_version import bump_catalog_version
 from kaggle_secrets import UserSecretsClient
 
 # --- Kaggle Setup ---
@@ -12,7 +14,7 @@ CLUSTER_URL = "add yours"
 COLLECTION_NAME = "my_collection"
 
 # --- Initialize Models ---
-embedding_model = SentenceTransformer("all-MiniLM-L6-v2")  # 384-dim embeddings
+embedding_model = get_encoder()  # all-MiniLM-L6-v2, 384-dim embeddings
 
 # --- Load Data ---
 df = pd.read_csv("/kaggle/input/dataset-qdrant/styles.csv", on_bad_lines="skip")
@@ -59,6 +61,8 @@ for filename, url in mapping.items():
             "usage": product_data["usage"],
             "gender": product_data.get("gender", "Unisex"),
         }
+        # Canonical lowercase facet fields used by all filters
+        payload.update(canonical_fields(payload))
 
         # Generate embedding from product metadata
         vector = get_embedding(payload)
@@ -85,3 +89,4 @@ if points:
     print(f"✅ Uploaded final batch of {len(points)} items")
 
 print("✨ All data uploaded with embeddings!")
+bump_catalog_version("update_qdrant_urls")
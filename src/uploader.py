@@ -5,7 +5,9 @@ import pandas as pd
 import os
 import uuid
 import time
-from sentence_transformers import SentenceTransformer  # ✅ New import
+from src.encoder import get_encoder  # run as: python -m src.uploader
+from src.vocabulary import canonical_fields
+from src.catalog_version import bump_catalog_version
 
 # Load environment variables
 load_dotenv()
@@ -19,7 +21,7 @@ print("API key loaded:", bool(QDRANT_API_KEY))
 
 # Initialize clients
 client = QdrantClient(url=CLUSTER_URL, api_key=QDRANT_API_KEY, timeout=30.0)
-model = SentenceTransformer('all-MiniLM-L6-v2')  # ✅ Use open-source 768-dim model
+model = get_encoder()  # ✅ Shared all-MiniLM-L6-v2 encoder (384-dim), backend set in config
 
 # Embedding batch generator
 def get_batch_embeddings(texts):
@@ -64,6 +66,12 @@ for idx, row in df.iterrows():
             "Individual_category": row.get("subcategory", "NA"),
             "category_by_Gender": row.get("gender", "NA")
         }
+        # Canonical lowercase facet fields used by all filters
+        payload.update(canonical_fields({
+            "articleType": row.get("articletype"),
+            "baseColour": row.get("basecolour"),
+            "gender": row.get("gender"),
+        }))
         embed_text = f"{payload['colour']} {payload['Individual_category']} {payload['Category']} {payload['category_by_Gender']}"
         all_payloads.append(payload)
         embedding_texts.append(embed_text)
@@ -97,6 +105,7 @@ try:
         time.sleep(0.2)
 
     print("🎉 All product data uploaded successfully!")
+    bump_catalog_version("uploader")
 
 except Exception as e:
     print("❌ Upload failed:", str(e))
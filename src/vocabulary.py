@@ -0,0 +1,243 @@
+import re
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+# ------------------- 📚 CANONICAL FACET VOCABULARY -------------------
+# One place that maps catalog values, user wording and LLM output onto the
+# canonical lowercase values stored at ingestion time in:
+#
+#   article_type_norm  <- articleType
+#   colour_norm        <- baseColour
+#   gender_norm        <- gender
+#
+# Filters then become single indexed MatchValue lookups on those fields instead
+# of MatchAny unions over case / plural variants.
+
+ARTICLE_TYPE_NORM = "article_type_norm"
+COLOUR_NORM = "colour_norm"
+GENDER_NORM = "gender_norm"
+NORM_FIELDS = [ARTICLE_TYPE_NORM, COLOUR_NORM, GENDER_NORM]
+
+# canonical article type -> known spellings (catalog, user and LLM terms)
+ARTICLE_TYPE_ALIASES = {
+    "saree": ["saree", "sarees", "sari", "saris"],
+    "kurtas": ["kurta", "kurtas", "kurta sets", "kurta set", "kurta-sets"],
+    "kurtis": ["kurti", "kurtis"],
+    "jeans": ["jeans", "jean", "skinny jeans", "straight jeans", "bootcut jeans", "wide leg jeans"],
+    "skirts": ["skirt", "skirts", "mini skirt", "midi skirt", "maxi skirt"],
+    "tops": ["top", "tops"],
+    "thermal-tops": ["thermal top", "thermal tops", "thermal-tops"],
+    "shorts": ["short", "shorts"],
+    "trousers": ["trouser", "trousers", "pants"],
+    "palazzos": ["palazzo", "palazzos"],
+    "jumpsuit": ["jumpsuit", "jumpsuits"],
+    "co-ords": ["co-ord", "co-ords", "coord", "coords", "co ord set", "co-ord set"],
+    "clothing-set": ["clothing set", "clothing sets", "clothing-set"],
+    "tunics": ["tunic", "tunics"],
+    "lehengas": ["lehenga", "lehengas", "lehenga choli"],
+    "anarkalis": ["anarkali", "anarkalis"],
+    "salwar-kameez": ["salwar", "salwar kameez", "salwar-kameez", "salwar and dupatta", "churidar", "patiala"],
+    "dupattas": ["dupatta", "dupattas"],
+    "blouses": ["blouse", "blouses"],
+    "ethnic-dresses": ["dress", "dresses", "ethnic dress", "ethnic dresses", "ethnic-dresses"],
+    "traditional-wear": ["traditional", "ethnic", "indian wear", "traditional wear", "traditional-wear"],
+}
+
+GENDER_ALIASES = {
+    "women": ["women", "woman", "female", "ladies", "lady", "womens", "women's"],
+    "men": ["men", "man", "male", "gents", "mens", "men's"],
+    "girls": ["girls", "girl"],
+    "boys": ["boys", "boy"],
+    "unisex": ["unisex"],
+}
+
+COLOUR_ALIASES = {
+    "grey": ["grey", "gray"],
+    "navy blue": ["navy blue", "navy"],
+    "off white": ["off white", "off-white"],
+    "multi": ["multi", "multicolour", "multicolor", "multi-colour", "multi-color"],
+}
+
+# ------------------- 🗂️ EXTRACTION SLOT VOCABULARY -------------------
+# Closed value lists the extraction prompt lets the LLM choose from
+# (src/extractor.py builds its prompt from them), in the LLM's own spelling.
+
+CATEGORIES = [
+    "Indian Wear", "Plus Size", "Western", "Sports Wear", "Inner Wear & Sleep Wear", "Lingerie & Sleep Wear",
+]
+
+INDIVIDUAL_CATEGORIES = [
+    "kurta-sets", "kurtas", "tops", "thermal-tops", "jeans", "skirts", "shorts", "trousers", "palazzos",
+    "jumpsuit", "co-ords", "clothing-set", "kurtis", "tunics", "saree", "lehengas", "anarkalis",
+    "salwar-kameez", "dupattas", "blouses", "ethnic-dresses", "traditional-wear",
+]
+
+GENDERS = ["Women", "Men"]
+
+COLOURS = [
+    "Black", "Orange", "Navy Blue", "Red", "Beige", "Yellow", "Green", "Mustard", "Teal", "Peach",
+    "Blue", "Sea Green", "Pink", "Burgundy", "Maroon", "Lavender", "Purple", "White", "Grey",
+    "Lime Green", "Brown", "Cream", "Rust", "Off White", "Turquoise Blue", "Multi", "Mauve",
+    "Assorted", "Magenta", "Fuchsia", "Coral", "Olive", "Rose", "Gold", "Fluorescent Green",
+    "Silver", "Nude", "Violet", "Charcoal", "Grey Melange", "Khaki", "Coffee Brown", "Taupe", "Copper",
+]
+
+# Slot value -> user wordings, for matching queries without the LLM
+# (src/fast_extractor.py). Includes the prompt's own mappings:
+# kurta -> kurtas, kurti -> kurtis, dress -> ethnic-dresses.
+INDIVIDUAL_CATEGORY_SYNONYMS = {
+    "kurta-sets": ["kurta set", "kurta sets", "kurta-set", "kurta-sets"],
+    "kurtas": ["kurta", "kurtas"],
+    "tops": ["top", "tops"],
+    "thermal-tops": ["thermal", "thermals", "thermal top", "thermal tops", "thermal-tops"],
+    "jeans": ["jeans", "jean", "denims", "skinny jeans", "straight jeans", "bootcut jeans", "wide leg jeans"],
+    "skirts": ["skirt", "skirts", "mini skirt", "midi skirt", "maxi skirt"],
+    "shorts": ["shorts"],
+    "trousers": ["trouser", "trousers", "pants"],
+    "palazzos": ["palazzo", "palazzos", "palazzo pants"],
+    "jumpsuit": ["jumpsuit", "jumpsuits"],
+    "co-ords": ["co-ord", "co-ords", "coord", "coords", "co ord", "co ords", "co ord set", "co-ord set"],
+    "clothing-set": ["clothing set", "clothing sets", "clothing-set"],
+    "kurtis": ["kurti", "kurtis"],
+    "tunics": ["tunic", "tunics"],
+    "saree": ["saree", "sarees", "sari", "saris"],
+    "lehengas": ["lehenga", "lehengas", "lehenga choli", "lehenga cholis"],
+    "anarkalis": ["anarkali", "anarkalis", "anarkali kurta", "anarkali kurtas"],
+    "salwar-kameez": ["salwar", "salwar kameez", "salwar-kameez", "salwar suit", "churidar", "patiala"],
+    "dupattas": ["dupatta", "dupattas"],
+    "blouses": ["blouse", "blouses"],
+    "ethnic-dresses": ["dress", "dresses", "ethnic dress", "ethnic dresses", "ethnic-dresses"],
+    "traditional-wear": ["traditional wear", "traditional-wear"],
+}
+
+CATEGORY_SYNONYMS = {
+    "Indian Wear": ["indian wear", "indian", "ethnic", "ethnic wear", "traditional"],
+    "Plus Size": ["plus size", "plus-size", "plus sized"],
+    "Western": ["western", "western wear"],
+    "Sports Wear": ["sports wear", "sportswear", "sports", "activewear", "active wear", "gym", "workout"],
+    "Inner Wear & Sleep Wear": ["innerwear", "inner wear", "sleepwear", "sleep wear", "nightwear", "night wear", "loungewear"],
+    "Lingerie & Sleep Wear": ["lingerie"],
+}
+
+# Category the LLM infers for an individual category when the query names none
+CATEGORY_BY_INDIVIDUAL = {
+    **dict.fromkeys([
+        "kurta-sets", "kurtas", "kurtis", "tunics", "saree", "lehengas", "anarkalis", "salwar-kameez",
+        "dupattas", "blouses", "ethnic-dresses", "traditional-wear", "palazzos",
+    ], "Indian Wear"),
+    **dict.fromkeys(["tops", "jeans", "skirts", "shorts", "trousers", "jumpsuit", "co-ords", "clothing-set"], "Western"),
+    "thermal-tops": "Inner Wear & Sleep Wear",
+}
+
+# Individual categories only sold for women: gender is implied when not stated
+WOMEN_ONLY_INDIVIDUAL = {
+    "kurtis", "saree", "lehengas", "anarkalis", "dupattas", "blouses", "ethnic-dresses", "skirts",
+    "palazzos", "salwar-kameez",
+}
+
+
+def _key(term: Any) -> str:
+    return " ".join(str(term).strip().lower().replace("_", " ").split())
+
+
+def _compile(aliases: Dict[str, List[str]]) -> Dict[str, str]:
+    lookup = {}
+    for canonical, spellings in aliases.items():
+        lookup[_key(canonical)] = canonical
+        for spelling in spellings:
+            lookup[_key(spelling)] = canonical
+    return lookup
+
+
+# Compiled once at import: spelling -> canonical value
+_ARTICLE_TYPES = _compile(ARTICLE_TYPE_ALIASES)
+_GENDERS = _compile(GENDER_ALIASES)
+_COLOURS = _compile(COLOUR_ALIASES)
+
+_EMPTY = {"", "na", "nan", "none", "other", "null"}
+
+
+def normalize_article_type(term: Any) -> Optional[str]:
+    """'Kurta Sets' / 'kurta' / 'KURTAS' -> 'kurtas'; unknown types -> lowercase-hyphenated."""
+    if term is None or _key(term) in _EMPTY:
+        return None
+    key = _key(term)
+    return _ARTICLE_TYPES.get(key, key.replace(" ", "-"))
+
+
+def normalize_colour(term: Any) -> Optional[str]:
+    """'Navy Blue' / 'navy' -> 'navy blue'; unknown colours are just lowercased."""
+    if term is None or _key(term) in _EMPTY:
+        return None
+    key = _key(term)
+    return _COLOURS.get(key, key)
+
+
+def normalize_gender(term: Any) -> Optional[str]:
+    """'Women' / 'female' / 'ladies' -> 'women'."""
+    if term is None or _key(term) in _EMPTY:
+        return None
+    key = _key(term)
+    return _GENDERS.get(key, key)
+
+
+def normalize_article_types(terms: Optional[Iterable[Any]]) -> List[str]:
+    """Normalize and dedupe a list of article type terms, keeping order."""
+    seen = []
+    for term in terms or []:
+        canonical = normalize_article_type(term)
+        if canonical and canonical not in seen:
+            seen.append(canonical)
+    return seen
+
+
+def canonical_fields(payload: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """
+    Canonical facet fields for a product payload, to be stored next to the raw
+    values at ingestion. Accepts both payload layouts used in this repo
+    (articleType/baseColour/gender and Individual_category/colour/category_by_Gender).
+    """
+    return {
+        ARTICLE_TYPE_NORM: normalize_article_type(payload.get("articleType", payload.get("Individual_category"))),
+        COLOUR_NORM: normalize_colour(payload.get("baseColour", payload.get("colour"))),
+        GENDER_NORM: normalize_gender(payload.get("gender", payload.get("category_by_Gender"))),
+    }
+
+
+# ------------------- 🔎 VOCABULARY TERMS IN FREE TEXT -------------------
+
+# spelling -> (field, canonical value), for scanning user queries
+_TERMS: Dict[str, Tuple[str, str]] = {}
+for _field, _lookup in (("article_type", _ARTICLE_TYPES), ("gender", _GENDERS), ("colour", _COLOURS)):
+    for _spelling, _canonical in _lookup.items():
+        _TERMS[_spelling] = (_field, _canonical)
+for _colour in COLOURS:
+    _TERMS.setdefault(_key(_colour), ("colour", normalize_colour(_colour)))
+_MAX_TERM_WORDS = max(len(spelling.split()) for spelling in _TERMS)
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9'&-]*")
+NEGATIONS = {"not", "no", "without", "except", "excluding", "non", "dont", "don't", "avoid"}
+
+
+def has_negation(text: Any) -> bool:
+    """True for queries like 'saree but not red': their terms alone don't say what is wanted."""
+    return not NEGATIONS.isdisjoint(_WORD.findall(str(text).lower()))
+
+
+def query_terms(text: Any) -> FrozenSet[Tuple[str, str]]:
+    """
+    Vocabulary terms mentioned in a free-text query, longest phrase first:
+    'Navy blue kurti for ladies' -> {('colour', 'navy blue'), ('article_type', 'kurtis'), ('gender', 'women')}.
+    """
+    words = _WORD.findall(str(text).lower())
+    found = set()
+    i = 0
+    while i < len(words):
+        for n in range(min(_MAX_TERM_WORDS, len(words) - i), 0, -1):
+            term = _TERMS.get(" ".join(words[i:i + n]))
+            if term:
+                found.add(term)
+                i += n
+                break
+        else:
+            i += 1
+    return frozenset(found)
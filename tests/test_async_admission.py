@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from src.admission import AdmissionPool, AdmissionRejected
+from src.singleflight import SingleFlight
+
+
+def test_queued_coroutine_gets_the_released_slot():
+    async def main():
+        pool = AdmissionPool("t", max_concurrent=1, max_queue=1, queue_timeout=2.0)
+        await pool.aacquire()
+        waiter = asyncio.ensure_future(pool.aacquire())
+        await asyncio.sleep(0.01)
+        assert pool.stats()["queue_depth"] == 1
+
+        with pytest.raises(AdmissionRejected) as shed:
+            await pool.aacquire()
+        assert shed.value.status == 429
+
+        pool.release(0.01)
+        await asyncio.wait_for(waiter, 1.0)
+        assert pool.stats()["active"] == 1 and pool.stats()["queue_depth"] == 0
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def main():
+        pool = AdmissionPool("t", max_concurrent=1, max_queue=4, queue_timeout=2.0)
+        await pool.aacquire()
+        cancelled = asyncio.ensure_future(pool.aacquire())
+        live = asyncio.ensure_future(pool.aacquire())
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        await asyncio.sleep(0.01)
+        assert pool.stats()["queue_depth"] == 1
+
+        pool.release()
+        await asyncio.wait_for(live, 1.0)
+        assert pool.stats()["active"] == 1
+
+    asyncio.run(main())
+
+
+def test_async_single_flight_survives_a_cancelled_caller():
+    async def main():
+        flight = SingleFlight("t")
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "slots"
+
+        leader = asyncio.ensure_future(flight.ado("q", work))
+        follower = asyncio.ensure_future(flight.ado("q", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        assert await follower == ("slots", True)
+        assert calls == [1]
+        assert flight.stats()["in_flight"] == 0
+
+    asyncio.run(main())
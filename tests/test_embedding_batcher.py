@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+from src.embedding_batcher import EmbeddingBatcher
+
+
+def _gated_batcher(encode_fn=None):
+    """A batcher whose encode call waits until the test releases it."""
+    release = threading.Event()
+
+    def encode(texts):
+        release.wait(timeout=5)
+        return encode_fn(texts) if encode_fn else [[float(len(t))] for t in texts]
+
+    return EmbeddingBatcher(encode, window_ms=200, max_batch_size=8), release
+
+
+def test_identical_texts_share_one_encode():
+    calls = []
+    batcher = EmbeddingBatcher(lambda texts: calls.append(list(texts)) or [[1.0]] * len(texts), window_ms=50)
+    futures = [batcher.submit("red saree") for _ in range(3)]
+    assert [f.result(timeout=5) for f in futures] == [[1.0]] * 3
+    assert calls == [["red saree"]]
+
+
+def test_cancelled_future_does_not_fail_the_batch():
+    batcher, release = _gated_batcher()
+    first = batcher.submit("red saree")
+    second = batcher.submit("blue kurta")
+    assert first.cancel()
+    release.set()
+
+    assert second.result(timeout=5) == [10.0]
+    assert first.cancelled()
+
+
+def test_encode_error_reaches_every_live_caller():
+    def boom(texts):
+        raise RuntimeError("encoder down")
+
+    batcher, release = _gated_batcher(boom)
+    cancelled = batcher.submit("a")
+    live = [batcher.submit("b"), batcher.submit("c")]
+    cancelled.cancel()
+    release.set()
+
+    for future in live:
+        with pytest.raises(RuntimeError, match="encoder down"):
+            future.result(timeout=5)
@@ -0,0 +1,118 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src import searcher
+from src.facet_index import FacetIndex
+from src.vocabulary import ARTICLE_TYPE_NORM, COLOUR_NORM, GENDER_NORM
+
+
+class _ScrollClient:
+    def __init__(self):
+        self.scroll_offsets = []
+
+    def scroll(self, *, offset=None, **kwargs):
+        self.scroll_offsets.append(offset)
+        return [], None
+
+
+def _index(n=10):
+    rows = np.arange(n, dtype=np.int32)
+    index = FacetIndex(list(range(100, 100 + n)), {
+        ARTICLE_TYPE_NORM: {"kurtis": rows}, COLOUR_NORM: {}, GENDER_NORM: {},
+    })
+    index.catalog_stamp = searcher.get_catalog_version()
+    index.catalog_version = index.catalog_stamp["version"]
+    return index
+
+
+def _patch(monkeypatch, index):
+    client = _ScrollClient()
+    monkeypatch.setattr(searcher, "_facet_index", index)
+    monkeypatch.setattr(searcher, "get_client", lambda: client)
+    monkeypatch.setattr(searcher, "fetch_by_ids", lambda ids, fields=None: [(i, {"id": i}) for i in ids])
+    return client
+
+
+def test_facet_offset_format():
+    assert searcher._facet_offset(None) == 0
+    assert searcher._facet_offset("f:48") == 48
+    assert searcher._facet_offset("48") is None
+    assert searcher._facet_offset(48) is None
+
+
+def test_index_pages_use_prefixed_offsets(monkeypatch):
+    _patch(monkeypatch, _index())
+    first = searcher.fetch_by_filters_page(article_types=["kurtis"], limit=4)
+    assert [p["id"] for p in first["items"]] == [100, 101, 102, 103]
+    assert first["next_offset"] == "f:4" and first["total"] == 10
+    assert first["catalog_stamp"] == searcher.get_catalog_version()
+
+    last = searcher.fetch_by_filters_page(article_types=["kurtis"], limit=8, offset=first["next_offset"])
+    assert [p["id"] for p in last["items"]] == [104, 105, 106, 107, 108, 109]
+    assert last["next_offset"] is None
+
+
+def test_scroll_offset_is_not_read_as_a_row(monkeypatch):
+    client = _patch(monkeypatch, _index())
+    page = searcher.fetch_by_filters_page(article_types=["kurtis"], limit=4, offset="104")
+    assert client.scroll_offsets == [104]
+    assert page["total"] is None
+
+
+def test_stale_index_schedules_one_rebuild(monkeypatch):
+    import threading
+
+    index = _index()
+    index.catalog_version = "stale"
+    release, builds = threading.Event(), []
+
+    def slow_build(client, collection_name):
+        builds.append(collection_name)
+        release.wait(timeout=5)
+        return _index()
+
+    _patch(monkeypatch, index)
+    monkeypatch.setattr(searcher, "_facet_refresh_scheduled", False)
+    monkeypatch.setattr(searcher.FacetIndex, "build", staticmethod(slow_build))
+    started = threading.active_count()
+    for _ in range(20):
+        searcher.get_facet_index()
+    assert threading.active_count() - started <= 1
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == "facet-index":
+            thread.join(timeout=5)
+    assert len(builds) == 1
+    assert searcher._facet_index.catalog_version == searcher.get_catalog_version()["version"]
+
+
+class _CatalogClient:
+    """Qdrant-like scroll over point ids 100..109 (offset = first id to return)."""
+
+    def __init__(self, ids=range(100, 110)):
+        self.ids = list(ids)
+
+    def scroll(self, *, limit, offset=None, with_payload=True, **kwargs):
+        start = self.ids.index(offset) if offset is not None else 0
+        chunk = self.ids[start:start + limit]
+        next_offset = self.ids[start + limit] if start + limit < len(self.ids) else None
+        points = [SimpleNamespace(id=i, payload={"id": i} if with_payload else None) for i in chunk]
+        return points, next_offset
+
+
+def test_facet_offset_without_an_index_resumes_on_the_scroll(monkeypatch):
+    scheduled = []
+    monkeypatch.setattr(searcher, "_facet_index", None)
+    monkeypatch.setattr(searcher, "get_client", lambda: _CatalogClient())
+    monkeypatch.setattr(searcher, "_schedule_facet_refresh", lambda: scheduled.append(True))
+    monkeypatch.setattr(searcher, "refresh_facet_index", lambda: pytest.fail("built on the request thread"))
+
+    page = searcher.fetch_by_filters_page(article_types=["kurtis"], limit=4, offset="f:4")
+    assert [p["id"] for p in page["items"]] == [104, 105, 106, 107]  # same rows the index would serve
+    assert page["next_offset"] == 108 and page["catalog_stamp"] is None
+    assert scheduled == [True]
+
+    past_end = searcher.fetch_by_filters_page(article_types=["kurtis"], limit=4, offset="f:10")
+    assert past_end == {"items": [], "next_offset": None, "total": None, "catalog_stamp": None}
@@ -0,0 +1,57 @@
+import pytest
+
+from src.fast_extractor import best_effort_slots, match_slots
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("red kurti", ("Indian Wear", "kurtis", "Women", "Red")),
+    ("navy blue jeans for men", ("Western", "jeans", "Men", "Navy Blue")),
+    ("red dress", ("Indian Wear", "ethnic-dresses", "Women", "Red")),
+])
+def test_unambiguous_queries_resolve(query, expected):
+    slots, reason = match_slots(query)
+    assert reason == "resolved"
+    assert (slots["Category"], slots["Individual_category"], slots["category_by_Gender"], slots["colour"]) == expected
+    assert slots["MOVE_ON"] is True
+
+
+@pytest.mark.parametrize("query, reason", [
+    ("not red kurti", "negation"),
+    ("kurti without embroidery", "negation"),
+    ("saree but no red", "negation"),
+    ("crimson anarkali", "unlisted_colour"),
+    ("dark blue jeans for men", "unlisted_colour"),
+    ("red and blue kurti", "ambiguous_colour"),
+    ("kurti and jeans for women", "ambiguous_individual_category"),
+    ("kurti for men and women", "ambiguous_category_by_gender"),
+    ("jeans for girls", "unsupported_gender"),
+    ("something nice", "missing_individual_category"),
+    ("", "empty"),
+    ("i am looking for something to wear at my cousin's wedding next month in jaipur", "too_long"),
+])
+def test_uncertain_queries_fall_through_to_the_llm(query, reason):
+    assert match_slots(query) == (None, reason)
+
+
+def test_best_effort_drops_negated_colours():
+    slots = best_effort_slots("saree but not red")
+    assert slots["Individual_category"] == "saree" and slots["colour"] == "NA"
+
+
+def test_best_effort_takes_the_first_value_and_maps_kids_genders():
+    slots = best_effort_slots("red and blue jeans for girls")
+    assert (slots["Individual_category"], slots["category_by_Gender"], slots["colour"]) == ("jeans", "Women", "Red")
+    assert slots["MOVE_ON"] is True
+
+
+def test_best_effort_asks_for_a_product_type():
+    slots = best_effort_slots("something red")
+    assert slots["MOVE_ON"] is False
+    assert slots["Individual_category"] == "NA" and slots["colour"] == "Red"
+    assert slots["FOLLOW_UP_MESSAGE"]
+
+
+def test_best_effort_resolves_whatever_match_slots_resolves():
+    for query in ("red kurti", "navy blue jeans for men", "black saree"):
+        slots, _ = match_slots(query)
+        assert best_effort_slots(query) == slots
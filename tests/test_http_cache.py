@@ -0,0 +1,39 @@
+from flask import Flask, jsonify
+
+from src import http_cache
+
+CURRENT = {"version": "v2", "updated_at": 2_000_000_000}
+OLD = {"version": "v1", "updated_at": 1_000_000_000}
+
+
+def _client(monkeypatch, served):
+    monkeypatch.setattr(http_cache, "get_catalog_version", lambda: CURRENT)
+    app = Flask(__name__)
+
+    @app.route("/page")
+    @http_cache.cached_by_catalog_version(max_age=300)
+    def page():
+        http_cache.served_catalog_version(served)
+        return jsonify({"ok": True})
+
+    return app.test_client()
+
+
+def test_current_snapshot_revalidates_to_304(monkeypatch):
+    client = _client(monkeypatch, served=None)
+    first = client.get("/page")
+    assert first.status_code == 200 and first.headers["Cache-Control"] == "public, max-age=300"
+    again = client.get("/page", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_stale_snapshot_gets_its_own_validators(monkeypatch):
+    current = _client(monkeypatch, served=None).get("/page")
+    stale = _client(monkeypatch, served=OLD).get("/page")
+    assert stale.status_code == 200
+    assert stale.headers["ETag"] != current.headers["ETag"]
+    assert stale.last_modified.timestamp() == OLD["updated_at"]
+
+    # Once the fresh snapshot serves, the stale validator no longer matches
+    refreshed = _client(monkeypatch, served=None).get("/page", headers={"If-None-Match": stale.headers["ETag"]})
+    assert refreshed.status_code == 200
@@ -0,0 +1,172 @@
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from src.local_index import LocalIndex, payload_matches
+
+N, DIM = 80, 8
+COLLECTION = "my_collection"
+
+
+def _catalog(seed=3):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(N, DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    payloads = []
+    for i in range(N):
+        payload = {
+            "id": 1000 + i,
+            "colour_norm": ["red", "blue", "green"][i % 3],
+            "article_type_norm": ["saree", "kurtis", "jeans", "tops"][i % 4],
+            "masterCategory": "Indian Wear" if i % 2 else "Western",
+            "productDisplayName": f"Product {i}",
+            "tags": [["festive", "silk"], ["casual"], []][i % 3],  # list-valued, not an indexed column
+        }
+        if i % 5:
+            payload["gender_norm"] = "women" if i % 3 else "men"  # missing on every 5th product
+        payloads.append(payload)
+    point_ids = [10 * i + 7 for i in range(N)]  # sparse integer ids, ascending
+    return vectors, point_ids, payloads
+
+
+@pytest.fixture(scope="module")
+def engines():
+    vectors, point_ids, payloads = _catalog()
+    qdrant = QdrantClient(":memory:")
+    qdrant.create_collection(COLLECTION, vectors_config=models.VectorParams(size=DIM, distance=models.Distance.COSINE))
+    qdrant.upsert(COLLECTION, points=[
+        models.PointStruct(id=pid, vector=vector.tolist(), payload=payload)
+        for pid, vector, payload in zip(point_ids, vectors, payloads)
+    ])
+    return LocalIndex(vectors, point_ids, payloads), qdrant
+
+
+def _match(key, *values):
+    match = models.MatchValue(value=values[0]) if len(values) == 1 else models.MatchAny(any=list(values))
+    return models.FieldCondition(key=key, match=match)
+
+
+FILTERS = {
+    "none": None,
+    "empty": models.Filter(must=[], should=[], must_not=[]),
+    "must": models.Filter(must=[_match("colour_norm", "red"), _match("article_type_norm", "saree", "kurtis")]),
+    "hybrid": models.Filter(must=[_match("colour_norm", "blue")],
+                            should=[_match("masterCategory", "Indian Wear"), _match("gender_norm", "women")]),
+    "must_not_missing_field": models.Filter(must_not=[_match("gender_norm", "men")]),
+    "nested": models.Filter(must=[
+        models.Filter(should=[_match("colour_norm", "green"), _match("article_type_norm", "tops")]),
+    ]),
+    "non_indexed": models.Filter(must=[_match("productDisplayName", "Product 4", "Product 9", "Product 12")]),
+    "list_valued": models.Filter(must=[_match("tags", "silk", "casual")], must_not=[_match("colour_norm", "blue")]),
+    "no_match": models.Filter(must=[_match("colour_norm", "purple")]),
+}
+
+
+def _reference(flt):
+    """
+    The filter as the Qdrant server evaluates it. The server treats an empty
+    should list as no constraint, but older qdrant-client local modes (the
+    reference engine here) match nothing for it.
+    """
+    if flt is not None and flt.should == []:
+        return flt.model_copy(update={"should": None})
+    return flt
+
+
+def _query(seed):
+    vector = np.random.default_rng(seed).normal(size=DIM)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def _scored(points):
+    return [(point.id, round(point.score, 4), point.payload) for point in points]
+
+
+@pytest.mark.parametrize("name", FILTERS)
+def test_search_batch_matches_qdrant(engines, name):
+    local, qdrant = engines
+    requests = [
+        models.SearchRequest(vector=_query(seed), filter=FILTERS[name], limit=limit, with_payload=True)
+        for seed, limit in [(1, 5), (2, 20), (3, N * 2)]
+    ]
+    expected = qdrant.search_batch(collection_name=COLLECTION, requests=[
+        request.model_copy(update={"filter": _reference(request.filter)}) for request in requests
+    ])
+    actual = local.search_batch(collection_name=COLLECTION, requests=requests)
+    assert [_scored(hits) for hits in actual] == [_scored(hits) for hits in expected]
+
+
+def test_empty_should_is_no_constraint(engines):
+    local, _ = engines
+    assert local.filter_mask(FILTERS["empty"]) is None
+    assert all(payload_matches(payload, models.Filter(should=[])) for payload in local.payloads)
+
+
+def test_search_offset_threshold_and_payload_selection_match_qdrant(engines):
+    local, qdrant = engines
+    kwargs = dict(query_vector=_query(4), query_filter=FILTERS["hybrid"], limit=4, offset=3, score_threshold=-0.1,
+                  with_payload=models.PayloadSelectorInclude(include=["id", "colour_norm"]))
+    assert _scored(local.search(**kwargs)) == _scored(qdrant.search(COLLECTION, **kwargs))
+    no_payload = dict(kwargs, with_payload=False)
+    assert _scored(local.search(**no_payload)) == _scored(qdrant.search(COLLECTION, **no_payload))
+
+
+@pytest.mark.parametrize("name", FILTERS)
+def test_scroll_pages_match_qdrant(engines, name):
+    local, qdrant = engines
+    for limit in (7, N):
+        local_pages, qdrant_pages = [], []
+        engines_and_filters = ((local, FILTERS[name], local_pages), (qdrant, _reference(FILTERS[name]), qdrant_pages))
+        for client, flt, pages in engines_and_filters:
+            offset = None
+            while True:
+                records, offset = client.scroll(collection_name=COLLECTION, scroll_filter=flt,
+                                                limit=limit, offset=offset, with_payload=True)
+                pages.append(([(r.id, r.payload) for r in records], offset))
+                if offset is None:
+                    break
+        assert local_pages == qdrant_pages
+
+
+def test_scroll_accepts_offsets_echoed_back_as_text(engines):
+    local, _ = engines
+    first, next_offset = local.scroll(limit=5)
+    assert local.scroll(limit=5, offset=str(next_offset)) == local.scroll(limit=5, offset=next_offset)
+
+
+def test_retrieve_matches_qdrant(engines):
+    local, qdrant = engines
+    ids = [207, 7, 99999, 797]  # 99999 does not exist
+    for with_payload in (True, False, models.PayloadSelectorInclude(include=["id", "tags"])):
+        expected = {r.id: r.payload for r in qdrant.retrieve(COLLECTION, ids=ids, with_payload=with_payload)}
+        actual = local.retrieve(COLLECTION, ids=ids, with_payload=with_payload)
+        assert [r.id for r in actual] == [207, 7, 797]
+        assert {r.id: r.payload for r in actual} == expected
+
+
+def test_returned_payloads_are_copies(engines):
+    local, _ = engines
+    local.retrieve(COLLECTION, ids=[7])[0].payload["score"] = 1.0
+    assert "score" not in local.retrieve(COLLECTION, ids=[7])[0].payload
+
+
+@pytest.mark.parametrize("name", FILTERS)
+def test_payload_matches_agrees_with_the_index_and_qdrant(engines, name):
+    local, qdrant = engines
+    flt = FILTERS[name]
+    matched = [pid for pid, payload in zip(local.point_ids, local.payloads) if payload_matches(payload, flt)]
+    expected, _ = qdrant.scroll(COLLECTION, scroll_filter=_reference(flt), limit=N, with_payload=False)
+    assert matched == [r.id for r in expected]
+
+    mask = local.filter_mask(flt)
+    assert matched == (local.point_ids if mask is None else [local.point_ids[row] for row in np.flatnonzero(mask)])
+
+
+def test_unsupported_conditions_are_refused(engines):
+    local, _ = engines
+    range_filter = models.Filter(must=[models.FieldCondition(key="id", range=models.Range(gte=1010))])
+    with pytest.raises(NotImplementedError):
+        local.search(_query(5), query_filter=range_filter)
+    with pytest.raises(NotImplementedError):
+        payload_matches(local.payloads[0], range_filter)
@@ -0,0 +1,198 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src import resilient_llm
+from src.resilient_llm import (CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, LLMDeadlineExceeded,
+                               LLMUnavailable, ResilientLLM, llm_deadline)
+
+
+class ScriptedLLM:
+    """Replies after `delays[i]` seconds for the i-th request (or raises if the delay is an exception)."""
+
+    def __init__(self, *delays):
+        self.delays = list(delays)
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def _next(self, kwargs):
+        with self._lock:
+            n = len(self.requests)
+            self.requests.append(kwargs)
+        return n, self.delays[min(n, len(self.delays) - 1)]
+
+    def invoke(self, input, **kwargs):
+        n, delay = self._next(kwargs)
+        if isinstance(delay, Exception):
+            raise delay
+        time.sleep(delay)
+        return f"reply {n}"
+
+    async def ainvoke(self, input, **kwargs):
+        n, delay = self._next(kwargs)
+        if isinstance(delay, Exception):
+            raise delay
+        await asyncio.sleep(delay)
+        return f"reply {n}"
+
+
+@pytest.fixture(autouse=True)
+def fixed_hedge_delay(monkeypatch):
+    monkeypatch.setattr(resilient_llm, "LLM_HEDGE_DEFAULT_DELAY", 0.1)
+    monkeypatch.setattr(resilient_llm, "LLM_HEDGE_MIN_DELAY", 0.05)
+
+
+# ---------- deadline ----------
+
+def test_deadline_raises_and_counts():
+    llm = ResilientLLM(ScriptedLLM(1.0), deadline=0.2, hedge=False)
+    start = time.monotonic()
+    with pytest.raises(LLMDeadlineExceeded):
+        llm.invoke("q")
+    assert time.monotonic() - start < 0.5
+    assert llm.stats()["calls"]["deadline"] == 1
+
+
+def test_each_request_gets_the_time_left_as_its_timeout():
+    inner = ScriptedLLM(0.0)
+    ResilientLLM(inner, deadline=2.0, hedge=False).invoke("q")
+    assert 1.5 < inner.requests[0]["timeout"] <= 2.0
+
+
+def test_calls_in_llm_deadline_share_one_deadline():
+    inner = ScriptedLLM(0.15, 0.15)
+    llm = ResilientLLM(inner, deadline=10.0, hedge=False)
+    with llm_deadline(0.2):
+        assert llm.invoke("compact") == "reply 0"
+        assert inner.requests[0]["timeout"] <= 0.2
+        with pytest.raises(LLMDeadlineExceeded):
+            llm.invoke("full prompt retry")  # only ~0.05s left, not a fresh 10s
+
+
+def test_spent_deadline_fails_without_a_request():
+    inner = ScriptedLLM(0.0)
+    llm = ResilientLLM(inner, deadline=10.0, hedge=False)
+    with llm_deadline(0.0):
+        with pytest.raises(LLMDeadlineExceeded):
+            llm.invoke("q")
+    assert inner.requests == []
+
+
+def test_async_deadline():
+    llm = ResilientLLM(ScriptedLLM(1.0), deadline=0.2, hedge=False)
+    with pytest.raises(LLMDeadlineExceeded):
+        asyncio.run(llm.ainvoke("q"))
+
+
+# ---------- hedging ----------
+
+def test_slow_primary_is_hedged_and_the_hedge_wins():
+    llm = ResilientLLM(ScriptedLLM(1.0, 0.0), deadline=2.0, hedge=True)
+    assert llm.invoke("q") == "reply 1"
+    assert llm.stats()["hedges"] == {"fired": 1, "won": 1}
+
+
+def test_fast_failure_is_retried_by_the_hedge():
+    llm = ResilientLLM(ScriptedLLM(RuntimeError("503"), 0.0), deadline=2.0, hedge=True)
+    assert llm.invoke("q") == "reply 1"
+
+
+def test_no_hedge_when_the_primary_is_fast():
+    inner = ScriptedLLM(0.0)
+    llm = ResilientLLM(inner, deadline=2.0, hedge=True)
+    assert llm.invoke("q") == "reply 0"
+    assert len(inner.requests) == 1 and llm.stats()["hedges"]["fired"] == 0
+
+
+def test_async_hedge():
+    llm = ResilientLLM(ScriptedLLM(1.0, 0.0), deadline=2.0, hedge=True)
+    assert asyncio.run(llm.ainvoke("q")) == "reply 1"
+
+
+def test_both_attempts_failing_is_an_error():
+    llm = ResilientLLM(ScriptedLLM(RuntimeError("boom")), deadline=2.0, hedge=True)
+    with pytest.raises(LLMUnavailable, match="boom"):
+        llm.invoke("q")
+    assert llm.stats()["calls"]["error"] == 1
+
+
+# ---------- circuit breaker ----------
+
+def _tripped(cooldown=60.0):
+    breaker = CircuitBreaker(window=4, min_calls=4, failure_rate=0.5, cooldown=cooldown)
+    for _ in range(4):
+        breaker.record(breaker.allow(), False)
+    return breaker
+
+
+def test_breaker_opens_on_sustained_failures_and_rejects():
+    breaker = _tripped()
+    assert breaker.state == OPEN
+    assert breaker.allow() is None
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_half_open_admits_one_trial_and_closes_on_success():
+    breaker = _tripped(cooldown=0.0)
+    trial = breaker.allow()
+    assert breaker.state == HALF_OPEN and trial is not None
+    assert breaker.allow() is None  # one trial at a time
+    breaker.record(trial, True)
+    assert breaker.state == CLOSED
+
+
+def test_failed_trial_reopens():
+    breaker = _tripped(cooldown=0.0)
+    breaker.record(breaker.allow(), False)
+    assert breaker.state == OPEN
+
+
+def test_late_closed_era_result_cannot_decide_the_trial():
+    breaker = CircuitBreaker(window=4, min_calls=4, failure_rate=0.5, cooldown=0.0)
+    straggler = breaker.allow()  # admitted while CLOSED, finishes much later
+    for _ in range(4):
+        breaker.record(breaker.allow(), False)
+    trial = breaker.allow()
+    assert breaker.state == HALF_OPEN
+
+    breaker.record(straggler, True)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() is None  # the real trial still holds the slot
+    assert breaker.stats()["stale_results"] == 1
+
+    breaker.record(trial, False)
+    assert breaker.state == OPEN
+
+
+def test_abandoned_trial_frees_the_slot():
+    breaker = _tripped(cooldown=0.0)
+    trial = breaker.allow()
+    breaker.abandon(trial)
+    assert breaker.allow() is not None
+
+
+def test_open_breaker_refuses_calls_without_a_request():
+    inner = ScriptedLLM(RuntimeError("down"))
+    llm = ResilientLLM(inner, deadline=1.0, hedge=False)
+    llm.state.breaker = _tripped()
+    with pytest.raises(CircuitOpenError):
+        llm.invoke("q")
+    assert inner.requests == []
+    assert llm.stats()["calls"]["rejected"] == 1
+
+
+def test_cancelled_trial_call_does_not_wedge_the_breaker():
+    llm = ResilientLLM(ScriptedLLM(1.0), deadline=5.0, hedge=False)
+    llm.state.breaker = _tripped(cooldown=0.0)
+
+    async def main():
+        call = asyncio.ensure_future(llm.ainvoke("q"))
+        await asyncio.sleep(0.05)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+
+    asyncio.run(main())
+    assert llm.state.breaker.allow() is not None
@@ -0,0 +1,149 @@
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src import searcher
+from src.local_index import LocalIndex
+
+SLOTS = {"colour": "Red", "individual_category": "sarees", "category": "Indian Wear", "category_by_gender": "Women"}
+
+
+def _hit(point_id, score, **payload):
+    return SimpleNamespace(id=point_id, score=score, payload=dict({"id": point_id}, **payload))
+
+
+class _BatchClient:
+    """search_batch() answering each tier request from a scripted list of hits."""
+
+    def __init__(self, *tier_hits):
+        self.tier_hits = tier_hits
+        self.batches = []
+
+    def search_batch(self, collection_name, requests):
+        self.batches.append(requests)
+        return [list(self.tier_hits[i]) for i in range(len(requests))]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def install(*tier_hits):
+        client = _BatchClient(*tier_hits)
+        monkeypatch.setattr(searcher, "get_client", lambda: client)
+        return client
+
+    monkeypatch.setattr(searcher, "generate_embedding", lambda text: [1.0, 0.0, 0.0, 0.0])
+    return install
+
+
+def _ids(ranked):
+    return [point_id for point_id, _ in ranked]
+
+
+# ---------- batched tier cascade ----------
+
+def test_cascade_is_one_batch_in_priority_order(client):
+    batch = client([_hit(1, 0.9)], [], []).batches
+    searcher.search_ranked_tiered("red saree", top_k=10, **SLOTS)
+    assert len(batch) == 1
+    assert [request.limit for request in batch[0]] == [10, 10, 20]  # hybrid, essential, vector
+    assert batch[0][2].filter is None
+
+
+def test_first_tier_with_results_wins(client):
+    client([_hit(1, 0.5)], [_hit(2, 0.99), _hit(1, 0.8)], [_hit(3, 1.0)])
+    tier, ranked = searcher.search_ranked_tiered("red saree", top_k=10, **SLOTS)
+    assert tier == "hybrid" and _ids(ranked) == [1]
+    assert ranked[0][1]["score"] == 0.5  # the hybrid tier's score, nothing merged in from later tiers
+
+
+def test_empty_tiers_fall_through(client):
+    client([], [_hit(2, 0.7), _hit(4, 0.9)], [_hit(3, 1.0)])
+    tier, ranked = searcher.search_ranked_tiered("red saree", top_k=10, **SLOTS)
+    assert tier == "essential" and _ids(ranked) == [4, 2]
+
+    client([SimpleNamespace(id=9, score=0.9, payload=None)], [], [_hit(3, 0.4)])
+    tier, ranked = searcher.search_ranked_tiered("red saree", top_k=10, **SLOTS)
+    assert tier == "vector" and _ids(ranked) == [3]  # payload-less hits don't count as results
+
+    client([], [], [])
+    assert searcher.search_ranked_tiered("red saree", top_k=10, **SLOTS) == (None, [])
+
+
+def test_duplicate_products_are_kept_once_sorted_and_cut_to_top_k(client):
+    hits = [_hit(1, 0.85), SimpleNamespace(id=11, score=0.95, payload={"id": 1}), _hit(2, 0.9), _hit(3, 0.8)]
+    client(hits, [], [])
+    _, ranked = searcher.search_ranked_tiered("red saree", top_k=2, **SLOTS)
+    assert _ids(ranked) == [2, 1]  # product 1 keeps its first hit (point 1), not the duplicate point 11
+    assert [payload["score"] for _, payload in ranked] == [0.9, 0.85]
+
+
+def test_vector_tier_boosts_related_products(client):
+    client([], [], [_hit(1, 0.6, articleType="Sarees"), _hit(2, 0.8, articleType="Watches")])
+    tier, ranked = searcher.search_ranked_tiered("red saree", top_k=10, **SLOTS)
+    assert tier == "vector" and _ids(ranked) == [1, 2]
+    assert ranked[0][1]["score"] == pytest.approx(0.9)
+
+
+# ---------- speculative search ----------
+
+def _catalog(n=60, seed=7):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, 4)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    payloads = [{
+        "id": i,
+        "colour_norm": ["red", "blue"][i % 2],
+        "article_type_norm": ["saree", "kurtis", "jeans"][i % 3],
+        "gender_norm": "women" if i % 5 else "men",
+        "masterCategory": "Indian Wear",
+    } for i in range(n)]
+    return LocalIndex(vectors, list(range(n)), payloads)
+
+
+def _speculation(index, limit):
+    future = Future()
+    future.set_result((index.search([1.0, 0.0, 0.0, 0.0], limit=limit), limit))
+    return future
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    index = _catalog()
+    monkeypatch.setattr(searcher, "get_client", lambda: index)
+    monkeypatch.setattr(searcher, "generate_embedding", lambda text: [1.0, 0.0, 0.0, 0.0])
+    return index
+
+
+def test_speculative_survivors_are_a_prefix_of_the_filtered_ranking(catalog, monkeypatch):
+    _, full = searcher.search_ranked_tiered("red saree", top_k=10, **SLOTS)
+    monkeypatch.setattr(catalog, "search_batch", lambda *a, **k: pytest.fail("ran the filtered search"))
+
+    tier, ranked, complete = searcher.resolve_speculative_search(
+        _speculation(catalog, 30), "red saree", top_k=10, min_results=2, **SLOTS)
+    assert tier == "hybrid" and 2 <= len(ranked) < 10
+    assert _ids(ranked) == _ids(full)[:len(ranked)]
+    assert complete is False  # a prefix: the candidate list was cut at its limit
+
+
+def test_speculation_covering_the_catalog_is_complete(catalog):
+    _, full = searcher.search_ranked_tiered("red saree", top_k=10, **SLOTS)
+    tier, ranked, complete = searcher.resolve_speculative_search(
+        _speculation(catalog, 100), "red saree", top_k=10, min_results=1, **SLOTS)
+    assert _ids(ranked) == _ids(full) and complete is True
+
+
+def test_too_few_survivors_run_the_filtered_search(catalog):
+    _, full = searcher.search_ranked_tiered("red saree", top_k=10, **SLOTS)
+    tier, ranked, complete = searcher.resolve_speculative_search(
+        _speculation(catalog, 4), "red saree", top_k=10, min_results=10, **SLOTS)
+    assert _ids(ranked) == _ids(full) and complete is True
+
+
+def test_failed_speculation_runs_the_filtered_search(catalog):
+    future = Future()
+    future.set_exception(RuntimeError("qdrant down"))
+    _, full = searcher.search_ranked_tiered("red saree", top_k=10, **SLOTS)
+    tier, ranked, complete = searcher.resolve_speculative_search(future, "red saree", top_k=10, **SLOTS)
+    assert tier == "hybrid" and _ids(ranked) == _ids(full) and complete is True
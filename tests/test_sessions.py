@@ -0,0 +1,141 @@
+import time
+
+import pytest
+
+import config
+from src import sessions
+from src.cache import TTLCache
+
+FILTERS = {"colour": "Red", "individual_category": "sarees", "category": "NA", "category_by_gender": "Women"}
+
+
+def _ranked(ids):
+    return [(point_id, {"id": point_id, "score": 1.0 - point_id / 100}) for point_id in ids]
+
+
+@pytest.fixture
+def tier_searches(monkeypatch):
+    """Fresh session store over a 20-item tier; records every search_tier() call."""
+    calls = []
+
+    def search_tier(query_text, tier_name, top_k=50, **filters):
+        calls.append((query_text, tier_name, top_k, filters))
+        return _ranked(range(min(top_k, 20)))
+
+    monkeypatch.setattr(sessions, "_sessions", TTLCache(maxsize=16, ttl=60))
+    monkeypatch.setattr(sessions, "search_tier", search_tier)
+    monkeypatch.setattr(sessions, "fetch_by_ids", lambda ids: [(i, {"id": i}) for i in ids])
+    return calls
+
+
+def _ids(page):
+    return [payload["id"] for payload in page["results"]]
+
+
+def test_complete_session_pages_are_slices_of_the_stored_ranking(tier_searches):
+    cursor = sessions.create_session(_ranked(range(10)))
+    page = sessions.get_session_page(cursor, 3, 4)
+    assert _ids(page) == [3, 4, 5, 6]
+    assert [payload["score"] for payload in page["results"]] == [0.97, 0.96, 0.95, 0.94]
+    assert page["has_more"] is True and page["total_count"] == 10
+
+    last = sessions.get_session_page(cursor, 8, 4)
+    assert _ids(last) == [8, 9] and last["has_more"] is False
+    assert sessions.get_session_page(cursor, 12, 4)["results"] == []
+    assert tier_searches == []
+
+
+def test_truncated_session_has_more_until_it_is_known_to_end(tier_searches):
+    cursor = sessions.create_session(_ranked(range(6)), complete=False,
+                                     source=("red saree", FILTERS, "hybrid"))
+    page = sessions.get_session_page(cursor, 0, 6)
+    assert _ids(page) == [0, 1, 2, 3, 4, 5]
+    assert page["has_more"] is True  # the prefix ends here, the ranking may not
+
+
+def test_unknown_and_expired_cursors_are_not_served(tier_searches, monkeypatch):
+    monkeypatch.setattr(sessions, "_sessions", TTLCache(maxsize=16, ttl=0.2))
+    assert sessions.get_session_page("no-such-cursor", 0, 6) is None
+    cursor = sessions.create_session(_ranked(range(10)))
+    assert sessions.get_session_page(cursor, 0, 6) is not None
+    time.sleep(0.25)
+    assert sessions.get_session_page(cursor, 0, 6) is None
+
+
+def test_truncated_session_is_extended_from_its_own_slots_and_tier(tier_searches):
+    cursor = sessions.create_session(_ranked(range(6)), complete=False,
+                                     source=("red saree", FILTERS, "hybrid"))
+    assert _ids(sessions.get_session_page(cursor, 0, 6)) == [0, 1, 2, 3, 4, 5]
+    assert tier_searches == []
+
+    page = sessions.get_session_page(cursor, 6, 6)
+    assert _ids(page) == [6, 7, 8, 9, 10, 11]  # continues the prefix: no repeats, no gaps
+    assert page["has_more"] is True
+    assert tier_searches == [("red saree", "hybrid", 13, FILTERS)]
+
+
+def test_extension_that_reaches_the_end_of_the_tier_completes_the_session(tier_searches):
+    cursor = sessions.create_session(_ranked(range(6)), complete=False,
+                                     source=("red saree", FILTERS, "hybrid"))
+    page = sessions.get_session_page(cursor, 12, 12)
+    assert _ids(page) == [12, 13, 14, 15, 16, 17, 18, 19]
+    assert page["has_more"] is False and page["total_count"] == 20
+
+    sessions.get_session_page(cursor, 0, 6)
+    assert len(tier_searches) == 1  # stored: earlier pages are slices again
+
+
+def test_truncated_session_without_a_source_is_not_served(tier_searches):
+    cursor = sessions.create_session(_ranked(range(6)), complete=False)
+    assert sessions.get_session_page(cursor, 6, 6) is None
+    assert tier_searches == []
+
+
+# ---------- /search/more ----------
+
+@pytest.fixture
+def search_more(tier_searches, monkeypatch):
+    """POST /search/more on the Flask app; records client-filter re-searches."""
+    monkeypatch.setattr(config, "WARMUP_ON_START", False)
+    import app as app_module
+
+    researches = []
+
+    def search_collection(**kwargs):
+        researches.append(kwargs)
+        return [{"id": i} for i in range(kwargs["top_k"])]
+
+    monkeypatch.setattr(app_module, "search_collection", search_collection)
+    client = app_module.app.test_client()
+
+    def post(**body):
+        body = dict({"query": "red saree", "filters": {"colour": "Red"}}, **body)
+        return client.post("/search/more", json=body).get_json()
+
+    post.researches = researches
+    return post
+
+
+def test_search_more_serves_the_session(search_more):
+    cursor = sessions.create_session(_ranked(range(10)))
+    body = search_more(cursor=cursor, offset=6, limit=6)
+    assert _ids(body) == [6, 7, 8, 9]
+    assert body["pagination"] == {"offset": 6, "limit": 6, "has_more": False, "total_count": 10, "cursor": cursor}
+    assert search_more.researches == []
+
+
+def test_search_more_past_a_truncated_session_extends_it(search_more, tier_searches):
+    cursor = sessions.create_session(_ranked(range(6)), complete=False,
+                                     source=("red saree", FILTERS, "hybrid"))
+    body = search_more(cursor=cursor, offset=6, limit=6)
+    assert _ids(body) == [6, 7, 8, 9, 10, 11]
+    assert body["pagination"]["has_more"] is True and body["pagination"]["cursor"] == cursor
+    assert search_more.researches == [] and len(tier_searches) == 1
+
+
+def test_search_more_without_a_live_session_re_runs_the_search(search_more):
+    body = search_more(cursor="expired", offset=6, limit=6)
+    assert _ids(body) == [6, 7, 8, 9, 10, 11]
+    assert body["pagination"]["has_more"] is True and "cursor" not in body["pagination"]
+    assert search_more.researches[0]["top_k"] == 13
+    assert search_more.researches[0]["colour"] == "Red"
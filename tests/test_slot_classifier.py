@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from src import slot_classifier
+from src.slot_classifier import HEAD_FIELDS, SlotClassifier
+
+
+def _classifier(encoder):
+    heads = {field: (["NA", "x"], np.eye(2, 4, dtype=np.float32), 1.0) for field in HEAD_FIELDS}
+    return SlotClassifier(heads, encoder=encoder)
+
+
+@pytest.fixture
+def saved(tmp_path, monkeypatch):
+    path = str(tmp_path / "slot_classifier.npz")
+    monkeypatch.setattr(slot_classifier, "SLOT_CLASSIFIER_PATH", path)
+    monkeypatch.setattr(slot_classifier, "ENCODER_BACKEND", "sentence-transformers")
+    monkeypatch.setattr(slot_classifier, "_classifier", None)
+    monkeypatch.setattr(slot_classifier, "_load_attempted", False)
+    return path
+
+
+def test_classifier_for_the_serving_encoder_is_loaded(saved):
+    _classifier("sentence-transformers").save(saved)
+    loaded = slot_classifier.get_slot_classifier()
+    assert loaded is not None and loaded.encoder == "sentence-transformers"
+
+
+def test_classifier_for_another_encoder_is_disabled(saved):
+    _classifier("onnx-int8").save(saved)
+    assert slot_classifier.get_slot_classifier() is None
+    assert slot_classifier.classify_slots([1.0, 0.0, 0.0, 0.0]) is None
+    assert slot_classifier.get_slot_classifier_stats()["loaded"] is False
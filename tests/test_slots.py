@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from src import slots
+from src.cache import SimilarityCache, TTLCache
+
+RED_SAREE = {"Category": "Indian Wear", "Individual_category": "sarees", "category_by_Gender": "Women",
+             "colour": "Red", "MOVE_ON": True, "FOLLOW_UP_MESSAGE": ""}
+ANY_SAREE = dict(RED_SAREE, colour="NA")
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """extract_slots() with fresh caches, one shared embedding and a scripted LLM."""
+    calls = []
+    replies = {"red saree please": RED_SAREE, "saree please, no red": ANY_SAREE}
+    monkeypatch.setattr(slots, "exact_cache", TTLCache(maxsize=16, ttl=60))
+    monkeypatch.setattr(slots, "semantic_cache", SimilarityCache(maxsize=16, ttl=60, threshold=0.9))
+    monkeypatch.setattr(slots, "FAST_EXTRACTOR", False)
+    monkeypatch.setattr(slots, "SLOT_CLASSIFIER", False)
+    monkeypatch.setattr(slots, "EXTRACTION_SEMANTIC_CACHE", True)
+    # Near-duplicate wording: both queries embed to the same vector
+    monkeypatch.setattr(slots, "generate_embedding", lambda query: np.ones(8) / np.sqrt(8))
+    monkeypatch.setattr(slots, "extract_with_llm", lambda llm, query: calls.append(query) or dict(replies[query]))
+    return calls
+
+
+def test_negated_query_is_not_served_from_the_semantic_cache(pipeline):
+    assert slots.extract_slots(None, "red saree please")["colour"] == "Red"
+    assert slots.extract_slots(None, "saree please, no red")["colour"] == "NA"
+    assert pipeline == ["red saree please", "saree please, no red"]
+
+
+def test_negated_query_is_not_stored_in_the_semantic_cache(pipeline):
+    slots.extract_slots(None, "saree please, no red")
+    assert slots.semantic_cache.stats()["size"] == 0
+    assert slots.extract_slots(None, "red saree please")["colour"] == "Red"
+
+
+def test_negated_query_is_not_answered_by_the_classifier(pipeline, monkeypatch):
+    monkeypatch.setattr(slots, "SLOT_CLASSIFIER", True)
+    monkeypatch.setattr(slots, "classify_slots", lambda vector: dict(RED_SAREE))
+    assert slots.extract_slots(None, "red saree please")["colour"] == "Red"
+    assert pipeline == []  # a confident classifier answers plain queries
+    assert slots.extract_slots(None, "saree please, no red")["colour"] == "NA"
+    assert pipeline == ["saree please, no red"]